@@ -3,18 +3,24 @@ from django.contrib import admin
 from .models import (
     Asset,
     AssetArtistAssignment,
+    AssetPart,
     AssetTexture,
     AssetVersion,
     AssetTag,
     Artist,
+    ChangeEvent,
+    IdempotencyKey,
+    LayerRebuildJob,
     Project,
     Publish,
     PublishComponent,
+    SceneFile,
     Sequence,
     SequenceTag,
     Shot,
     ShotAssetUsage,
     ShotTag,
+    StreamHead,
     Tag,
     Task,
     TaskAssignment,
@@ -103,6 +109,48 @@ class PublishAdmin(admin.ModelAdmin):
     list_filter = ("status", "software", "created_at")
 
 
+@admin.register(AssetPart)
+class AssetPartAdmin(admin.ModelAdmin):
+    list_display = ("asset_name", "part_name", "project", "seq_code", "shot_code", "dept", "artist_name", "latest_publish", "updated_at")
+    search_fields = ("asset_name", "part_name", "artist_name", "part_usd_path")
+    list_filter = ("project", "dept")
+
+
 admin.site.register(PublishComponent)
 admin.site.register(VersionLink)
 admin.site.register(ShotAssetUsage)
+
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    list_display = ("endpoint", "key", "status_code", "created_at", "expires_at")
+    list_filter = ("endpoint",)
+    search_fields = ("key",)
+
+
+@admin.register(ChangeEvent)
+class ChangeEventAdmin(admin.ModelAdmin):
+    list_display = ("id", "entity", "entity_id", "project_id", "action", "txid", "created_at")
+    list_filter = ("entity", "action")
+
+
+@admin.register(SceneFile)
+class SceneFileAdmin(admin.ModelAdmin):
+    list_display = ("file_path", "task", "artist", "software", "version", "iteration", "updated_at")
+    list_filter = ("software",)
+    search_fields = ("file_path",)
+    raw_id_fields = ("task", "artist")
+
+
+@admin.register(StreamHead)
+class StreamHeadAdmin(admin.ModelAdmin):
+    list_display = ("stream", "task_id", "software", "target_type_id", "target_id", "version", "iteration", "updated_at")
+    list_filter = ("stream", "software")
+    search_fields = ("stream", "software")
+
+
+@admin.register(LayerRebuildJob)
+class LayerRebuildJobAdmin(admin.ModelAdmin):
+    list_display = ("id", "project", "seq_code", "shot_code", "dept", "status", "request_count", "requested_at", "finished_at")
+    search_fields = ("seq_code", "shot_code", "dept", "shared_root")
+    list_filter = ("status", "project")
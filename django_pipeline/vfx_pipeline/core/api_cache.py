@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import hashlib
+import time
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+# Cached list responses are keyed on generation counters of the scope they were read from:
+#   meta                  rarely-edited reference rows (projects, sequences, artists); part of every key
+#   root                  every write
+#   project:<id>          every write inside the project
+#   shot:<id>:<code>      writes touching one shot of the project
+# A write bumps its shot, its project and root, so only reads of that branch miss afterwards.
+_META = "gen:meta"
+_ROOT = "gen:root"
+_HITS = "stats:hits"
+_MISSES = "stats:misses"
+
+
+def _cache():
+    return caches[settings.API_CACHE_ALIAS]
+
+
+def _project_key(project_id: int) -> str:
+    return f"gen:project:{project_id}"
+
+
+def _shot_key(project_id: int, shot_code: str) -> str:
+    return f"gen:shot:{project_id}:{shot_code.lower()}"
+
+
+def _incr(key: str, start: Optional[int] = None) -> None:
+    cache = _cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        # A missing or evicted generation restarts from the clock so old entries can never match it again.
+        cache.add(key, time.time_ns() if start is None else start, timeout=None)
+
+
+def _generations(project_id: Optional[int], shot_code: str, reference: bool) -> list[Any]:
+    if reference:
+        keys = [_META]
+    elif project_id and shot_code:
+        keys = [_META, _shot_key(project_id, shot_code)]
+    elif project_id:
+        keys = [_META, _project_key(project_id)]
+    else:
+        keys = [_META, _ROOT]
+    cache = _cache()
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            cache.add(key, time.time_ns(), timeout=None)
+            found[key] = cache.get(key)
+    return [found[key] for key in keys]
+
+
+def response_key(full_path: str, project_id: Optional[int] = None, shot_code: str = "", reference: bool = False) -> str:
+    """Cache key of a GET; `reference` lists (projects, sequences) only depend on the meta counter."""
+    generations = ":".join(str(value) for value in _generations(project_id, shot_code, reference))
+    return f"resp:{generations}:{hashlib.sha256(full_path.encode('utf-8')).hexdigest()}"
+
+
+def get_response(key: str) -> Optional[Dict[str, Any]]:
+    entry = _cache().get(key)
+    _incr(_HITS if entry is not None else _MISSES, start=1)
+    return entry
+
+
+def set_response(key: str, content: bytes, etag: str) -> None:
+    _cache().set(key, {"content": content, "etag": etag}, timeout=settings.API_CACHE_TIMEOUT)
+
+
+def invalidate(project_id: Optional[int] = None, shot_code: str = "", meta: bool = False) -> None:
+    """Bump the counters of a written scope once the surrounding transaction commits.
+
+    Bumping before commit would let a concurrent read cache pre-commit rows under the new generation.
+    """
+
+    def bump() -> None:
+        keys = [_ROOT]
+        if meta:
+            keys.append(_META)
+        if project_id:
+            keys.append(_project_key(project_id))
+            if shot_code:
+                keys.append(_shot_key(project_id, shot_code))
+        for key in keys:
+            _incr(key)
+
+    transaction.on_commit(bump)
+
+
+def stats() -> Dict[str, Any]:
+    cache = _cache()
+    counts = cache.get_many([_HITS, _MISSES])
+    hits, misses = counts.get(_HITS, 0), counts.get(_MISSES, 0)
+    return {
+        "enabled": settings.API_CACHE_ENABLED,
+        "backend": settings.CACHES[settings.API_CACHE_ALIAS]["BACKEND"],
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / (hits + misses), 4) if hits + misses else None,
+    }
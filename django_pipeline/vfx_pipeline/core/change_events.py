@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+from datetime import timedelta
+from typing import Iterable, Optional
+
+from django.db import connection, models
+from django.utils import timezone
+
+from core.models import Asset, ChangeEvent, Sequence, Shot, Task
+
+
+class ChangeLogGap(Exception):
+    """The `since` event is no longer in the log (purged by retention); the client has to resync."""
+
+
+def task_scope(task: Task) -> tuple[Optional[int], str]:
+    """(project_id, shot code) of a task, looked up through its shot, asset or sequence."""
+    if task.shot_id:
+        row = Shot.objects.filter(id=task.shot_id).values_list("project_id", "code").first()
+        return row or (None, "")
+    for model, related_id in ((Asset, task.asset_id), (Sequence, task.sequence_id)):
+        if related_id:
+            return model.objects.filter(id=related_id).values_list("project_id", flat=True).first(), ""
+    return None, ""
+
+
+def record(entity: str, entity_id: int, project_id: Optional[int], action: str) -> None:
+    ChangeEvent.objects.create(entity=entity, entity_id=entity_id, project_id=project_id, action=action)
+
+
+def record_many(entity: str, rows: Iterable[tuple[int, Optional[int]]], action: str) -> None:
+    """One event per (entity_id, project_id) row, in a single INSERT."""
+    ChangeEvent.objects.bulk_create(
+        [ChangeEvent(entity=entity, entity_id=entity_id, project_id=project_id, action=action) for entity_id, project_id in rows]
+    )
+
+
+def _visible_horizon() -> int:
+    # Transactions with ids at or above the oldest running one may still commit events with lower ids
+    # than ones already visible; events are only handed out once every transaction before them finished.
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT txid_snapshot_xmin(txid_current_snapshot())")
+        return cursor.fetchone()[0]
+
+
+def changes_since(
+    since: Optional[int],
+    project_id: Optional[int] = None,
+    limit: int = 500,
+) -> tuple[list[ChangeEvent], Optional[int], bool]:
+    """Events after event `since`, in commit-safe order, as (events, next_since, has_more).
+
+    `since=None` returns no events and the position to start following from; `since=0` starts at the
+    oldest retained event. Raises ChangeLogGap when `since` was purged.
+    """
+    qs = ChangeEvent.objects.filter(txid__lt=_visible_horizon())
+    if since is None:
+        head = qs.order_by("-txid", "-id").values_list("id", flat=True).first()
+        return [], head or 0, False
+    if since:
+        anchor = ChangeEvent.objects.filter(id=since).values_list("txid", flat=True).first()
+        if anchor is None:
+            raise ChangeLogGap(since)
+        qs = qs.filter(models.Q(txid__gt=anchor) | models.Q(txid=anchor, id__gt=since))
+    if project_id:
+        qs = qs.filter(project_id=project_id)
+    events = list(qs.order_by("txid", "id")[: limit + 1])
+    has_more = len(events) > limit
+    events = events[:limit]
+    return events, (events[-1].id if events else since), has_more
+
+
+def purge_old_events(days: int) -> int:
+    deleted, _ = ChangeEvent.objects.filter(created_at__lt=timezone.now() - timedelta(days=days)).delete()
+    return deleted
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from contextlib import contextmanager
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.http import HttpRequest, JsonResponse
+from django.utils import timezone
+
+from core.models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+
+
+def _error(message: str, status: int) -> JsonResponse:
+    return JsonResponse({"ok": False, "error": message}, status=status)
+
+
+def _lock_id(endpoint: str, key: str) -> int:
+    digest = hashlib.sha256(f"{endpoint}:{key}".encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big", signed=True)
+
+
+@contextmanager
+def _key_lock(endpoint: str, key: str):
+    """Yield whether this request got the key's advisory lock; it is held until the block exits.
+
+    Session-level rather than transaction-level so it outlives views that commit on the raw connection
+    (the scene views). Postgres releases it when the holder's connection goes away, so a free lock means
+    no request is working on the key any more.
+    """
+    lock_id = _lock_id(endpoint, key)
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_try_advisory_lock(%s)", [lock_id])
+        locked = cursor.fetchone()[0]
+    try:
+        yield locked
+    finally:
+        if locked:
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT pg_advisory_unlock(%s)", [lock_id])
+            except DatabaseError:
+                # The connection is gone, and the lock with it.
+                pass
+
+
+def idempotent(view):
+    """Replay the stored response for POSTs repeating an Idempotency-Key instead of running the view again.
+
+    The key row, the view's writes and the stored response commit in one transaction, so a request that dies
+    leaves nothing behind for its retry to duplicate. Only successful responses are stored; errors release
+    the key so the client can fix the request and retry.
+    """
+    endpoint = view.__name__
+
+    @wraps(view)
+    def wrapper(request: HttpRequest, *args, **kwargs):
+        key = (request.headers.get(IDEMPOTENCY_HEADER) or "").strip()
+        if request.method != "POST" or not key:
+            return view(request, *args, **kwargs)
+        if len(key) > 255:
+            return _error(f"{IDEMPOTENCY_HEADER} must be at most 255 characters", 400)
+
+        request_hash = hashlib.sha256(request.body or b"").hexdigest()
+        with _key_lock(endpoint, key) as locked:
+            if not locked:
+                response = _error(f"A request with this {IDEMPOTENCY_HEADER} is still in progress", 409)
+                response["Retry-After"] = "1"
+                return response
+            now = timezone.now()
+            record = IdempotencyKey.objects.filter(endpoint=endpoint, key=key).first()
+            if record and record.expires_at > now:
+                if record.request_hash != request_hash:
+                    return _error(f"{IDEMPOTENCY_HEADER} was already used with a different request body", 422)
+                if record.status_code is not None:
+                    response = JsonResponse(record.response_body, status=record.status_code, safe=False)
+                    response["Idempotent-Replayed"] = "true"
+                    return response
+            if record:
+                # Expired, or left without a response by a scene view whose process died after its own
+                # commit; the free lock shows nobody is still working on it.
+                record.delete()
+
+            with transaction.atomic():
+                record = IdempotencyKey.objects.create(
+                    endpoint=endpoint,
+                    key=key,
+                    request_hash=request_hash,
+                    expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL_SECONDS),
+                )
+                response = view(request, *args, **kwargs)
+                if 200 <= response.status_code < 300:
+                    record.status_code = response.status_code
+                    record.response_body = json.loads(response.content)
+                    record.save(update_fields=["status_code", "response_body"])
+                else:
+                    record.delete()
+            return response
+
+    return wrapper
+
+
+def purge_expired_keys() -> int:
+    deleted, _ = IdempotencyKey.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import heapq
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, Optional
+
+
+@dataclass
+class LayerRebuildReport:
+    written: list[str] = field(default_factory=list)
+    skipped: list[str] = field(default_factory=list)
+    warning: Optional[str] = None
+
+
+class LayerGraph:
+    """Sublayer dependency graph of a layer stack.
+
+    Nodes are layer paths; a path that is only ever a sublayer (a part file) is a leaf. Dirty nodes are
+    re-rendered bottom-up and only a layer whose content actually changed dirties the layers above it.
+    """
+
+    def __init__(self) -> None:
+        self._sublayers: Dict[str, list[str]] = {}
+        self._parents: Dict[str, list[str]] = {}
+        self._depths: Dict[str, int] = {}
+
+    def add_layer(self, layer_path: str, sublayers: list[str]) -> None:
+        self._sublayers[layer_path] = list(sublayers)
+        for sub in sublayers:
+            self._parents.setdefault(sub, []).append(layer_path)
+        self._depths.clear()
+
+    def layers(self) -> list[str]:
+        return list(self._sublayers)
+
+    def sublayers(self, layer_path: str) -> list[str]:
+        return self._sublayers[layer_path]
+
+    def _depth(self, path: str) -> int:
+        if path not in self._sublayers:
+            return 0
+        if path not in self._depths:
+            self._depths[path] = 1 + max((self._depth(sub) for sub in self._sublayers[path]), default=0)
+        return self._depths[path]
+
+    def propagate(self, dirty: Iterable[str], write: Callable[[str, list[str]], bool]) -> LayerRebuildReport:
+        """Write dirty layers lowest first; `write` returns False when the layer on disk is already current."""
+        report = LayerRebuildReport()
+        queue: list[tuple[int, str]] = []
+        queued: set[str] = set()
+
+        def push(path: str) -> None:
+            if path in queued:
+                return
+            queued.add(path)
+            if path in self._sublayers:
+                heapq.heappush(queue, (self._depth(path), path))
+            else:
+                # A changed leaf (part file) dirties every layer that sublayers it.
+                for parent in self._parents.get(path, []):
+                    push(parent)
+
+        for path in dirty:
+            push(path)
+        while queue:
+            _, path = heapq.heappop(queue)
+            if write(path, self._sublayers[path]):
+                report.written.append(path)
+                for parent in self._parents.get(path, []):
+                    push(parent)
+            else:
+                report.skipped.append(path)
+        return report
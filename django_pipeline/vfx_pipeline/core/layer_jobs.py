@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+from datetime import timedelta
+from typing import Any, Dict, Optional
+
+from django.db import IntegrityError, models, transaction
+from django.utils import timezone
+
+from core.models import LayerRebuildJob, Publish
+from core.usd_layers import extract_usd_context, rebuild_shared_usd_layers
+
+
+def enqueue_layer_rebuild(
+    publish: Publish,
+    dirty_paths: Optional[list[str]] = None,
+) -> tuple[Optional[LayerRebuildJob], Optional[str]]:
+    """Queue a shared layer rebuild for the publish's shot/dept, coalescing with any pending job.
+
+    `dirty_paths` are the part files that changed (default: the publish's own part).
+    """
+    context = extract_usd_context(publish.asset_usd_path or "")
+    if not context:
+        return None, "Skipped shared layer rebuild: could not parse USD context from asset_usd_path."
+    if not all([context["seq"], context["shot"], context["dept"], context["artist"], context["asset"]]):
+        return None, "Skipped shared layer rebuild: missing one or more context fields (seq/shot/dept/artist/asset)."
+
+    dirty = [path for path in (dirty_paths or [publish.asset_usd_path]) if path]
+    now = timezone.now()
+    for _ in range(2):
+        with transaction.atomic():
+            job = (
+                LayerRebuildJob.objects.select_for_update()
+                .filter(shared_root=context["shared_root"], status="pending")
+                .first()
+            )
+            if job:
+                job.publish = publish
+                job.request_count = models.F("request_count") + 1
+                job.requested_at = now
+                job.dirty_paths = sorted(set(job.dirty_paths or []) | set(dirty))
+                job.save(update_fields=["publish", "request_count", "requested_at", "dirty_paths"])
+                job.refresh_from_db(fields=["request_count"])
+                return job, None
+        try:
+            with transaction.atomic():
+                job = LayerRebuildJob.objects.create(
+                    project_id=publish.project_id,
+                    publish=publish,
+                    seq_code=context["seq"],
+                    shot_code=context["shot"],
+                    dept=context["dept"],
+                    shared_root=context["shared_root"],
+                    dirty_paths=sorted(set(dirty)),
+                    requested_at=now,
+                )
+            return job, None
+        except IntegrityError:
+            # Another request created the pending job between our lookup and insert; coalesce into it.
+            continue
+    return None, "Skipped shared layer rebuild: could not enqueue job."
+
+
+def _start(job: LayerRebuildJob) -> LayerRebuildJob:
+    # Once running, the job leaves the pending unique slot, so later requests queue a fresh job
+    # instead of coalescing dirty paths into one that is already being rebuilt.
+    job.status = "running"
+    job.started_at = timezone.now()
+    job.attempts += 1
+    job.save(update_fields=["status", "started_at", "attempts"])
+    return job
+
+
+def claim_next_job() -> Optional[LayerRebuildJob]:
+    with transaction.atomic():
+        job = (
+            LayerRebuildJob.objects.select_for_update(skip_locked=True)
+            .filter(status="pending")
+            .order_by("created_at", "id")
+            .first()
+        )
+        return _start(job) if job else None
+
+
+def claim_job(job: LayerRebuildJob) -> Optional[LayerRebuildJob]:
+    """Claim one specific pending job (inline rebuilds); None if a worker already took it."""
+    with transaction.atomic():
+        job = (
+            LayerRebuildJob.objects.select_for_update()
+            .filter(id=job.id, status="pending")
+            .first()
+        )
+        return _start(job) if job else None
+
+
+def _needs_full_rebuild(job: LayerRebuildJob) -> bool:
+    # Incremental propagation stops at layers that are already current on disk; after a crashed or failed
+    # rebuild the layers above them may be stale, so check the whole scope once.
+    if job.attempts > 1 or not job.dirty_paths:
+        return True
+    last_status = (
+        LayerRebuildJob.objects.filter(shared_root=job.shared_root, status__in=["done", "failed"])
+        .exclude(id=job.id)
+        .order_by("-finished_at", "-id")
+        .values_list("status", flat=True)
+        .first()
+    )
+    return last_status == "failed"
+
+
+def run_job(job: LayerRebuildJob) -> LayerRebuildJob:
+    try:
+        report = rebuild_shared_usd_layers(
+            job.project_id,
+            job.seq_code,
+            job.shot_code,
+            job.dept,
+            job.shared_root,
+            dirty_paths=None if _needs_full_rebuild(job) else job.dirty_paths,
+        )
+    except Exception as exc:  # noqa: BLE001
+        job.status = "failed"
+        job.error = str(exc)
+    else:
+        job.status = "done"
+        job.warning = report.warning or ""
+        job.error = ""
+        job.written_layers = report.written
+        job.layers_skipped = len(report.skipped)
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "warning", "error", "written_layers", "layers_skipped", "finished_at"])
+    return job
+
+
+def requeue_stale_jobs(older_than: timedelta) -> int:
+    """Return jobs left in `running` by a dead worker to the queue."""
+    cutoff = timezone.now() - older_than
+    count = 0
+    for job in LayerRebuildJob.objects.filter(status="running", started_at__lt=cutoff):
+        try:
+            with transaction.atomic():
+                job.status = "pending"
+                job.save(update_fields=["status"])
+        except IntegrityError:
+            # A newer pending job already covers this scope.
+            job.status = "failed"
+            job.error = "Worker lost; superseded by a newer pending job."
+            job.finished_at = timezone.now()
+            job.save(update_fields=["status", "error", "finished_at"])
+        count += 1
+    return count
+
+
+def serialize_job(job: LayerRebuildJob) -> Dict[str, Any]:
+    return {
+        "id": job.id,
+        "project_id": job.project_id,
+        "publish_id": job.publish_id,
+        "seq": job.seq_code,
+        "shot": job.shot_code,
+        "dept": job.dept,
+        "status": job.status,
+        "request_count": job.request_count,
+        "attempts": job.attempts,
+        "layers_written": len(job.written_layers or []),
+        "layers_skipped": job.layers_skipped,
+        "written_layers": job.written_layers,
+        "warning": job.warning,
+        "error": job.error,
+        "requested_at": job.requested_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.change_events import purge_old_events
+
+
+class Command(BaseCommand):
+    help = "Delete change-feed events older than CHANGE_EVENT_RETENTION_DAYS."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=None, help="Override the retention window.")
+
+    def handle(self, *args, **options):
+        days = options["days"] if options["days"] is not None else settings.CHANGE_EVENT_RETENTION_DAYS
+        deleted = purge_old_events(days)
+        self.stdout.write(f"Deleted {deleted} change event(s) older than {days} day(s).")
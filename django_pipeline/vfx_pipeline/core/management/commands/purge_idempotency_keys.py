@@ -0,0 +1,13 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from core.idempotency import purge_expired_keys
+
+
+class Command(BaseCommand):
+    help = "Delete Idempotency-Key records whose TTL (IDEMPOTENCY_KEY_TTL_SECONDS) has passed."
+
+    def handle(self, *args, **options):
+        deleted = purge_expired_keys()
+        self.stdout.write(f"Deleted {deleted} expired idempotency key(s).")
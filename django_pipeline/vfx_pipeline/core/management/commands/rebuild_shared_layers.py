@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from core.models import AssetPart, Project
+from core.usd_layers import SHARED_LAYER_PART_FIELDS, build_shared_layer_graph, usda_sublayers_current, write_usda_sublayers
+
+_SCOPE_FIELDS = ("seq_code", "shot_code", "dept", "shared_root")
+
+
+def _would_write(layer_path: str, sublayers: list[str]) -> bool:
+    return not usda_sublayers_current(layer_path, sublayers)
+
+
+def _rebuild_scope(args):
+    scope, parts, dry_run = args
+    seq, shot, dept, shared_root = scope
+    graph = build_shared_layer_graph(parts, seq, shot, dept, shared_root)
+    try:
+        report = graph.propagate(graph.layers(), _would_write if dry_run else write_usda_sublayers)
+    except OSError as exc:
+        return scope, [], 0, str(exc)
+    return scope, report.written, len(report.skipped), None
+
+
+class Command(BaseCommand):
+    help = "Regenerate every shared USD layer of a project from the AssetPart registry."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--project", required=True, help="Project id or code.")
+        parser.add_argument("--seq", action="append", default=[], help="Only this sequence code (repeatable).")
+        parser.add_argument(
+            "--jobs",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Worker processes writing layers (default: CPU count; 1 runs in-process).",
+        )
+        parser.add_argument("--dry-run", action="store_true", help="Report the layers that would change without writing them.")
+
+    def _project(self, value: str) -> Project:
+        lookup = {"id": int(value)} if value.isdigit() else {"code__iexact": value}
+        project = Project.objects.filter(**lookup).first()
+        if not project:
+            raise CommandError(f"Project not found: {value}")
+        return project
+
+    def handle(self, *args, **options):
+        project = self._project(str(options["project"]).strip())
+        dry_run = options["dry_run"]
+        jobs = max(1, options["jobs"])
+        started = time.perf_counter()
+
+        qs = AssetPart.objects.filter(project=project).exclude(artist_name="").exclude(shared_root="")
+        if options["seq"]:
+            qs = qs.filter(seq_code__in=options["seq"])
+        scopes: dict[tuple[str, str, str, str], list[tuple]] = {}
+        for row in qs.order_by().values_list(*_SCOPE_FIELDS, *SHARED_LAYER_PART_FIELDS).iterator(chunk_size=5000):
+            scopes.setdefault(row[:4], []).append(row[4:])
+        tasks = [(scope, parts, dry_run) for scope, parts in sorted(scopes.items())]
+
+        pool = None
+        if jobs > 1 and len(tasks) > 1:
+            # Workers only touch the filesystem; don't let them inherit this process's DB connection.
+            connections.close_all()
+            pool = ProcessPoolExecutor(max_workers=jobs, initializer=django.setup)
+            results = pool.map(_rebuild_scope, tasks, chunksize=max(1, len(tasks) // (jobs * 8)))
+        else:
+            results = map(_rebuild_scope, tasks)
+
+        written = skipped = failed = 0
+        verb = "would write" if dry_run else "wrote"
+        try:
+            for (seq, shot, dept, _root), layers, scope_skipped, error in results:
+                skipped += scope_skipped
+                if error:
+                    failed += 1
+                    self.stdout.write(self.style.ERROR(f"{seq}/{shot}/{dept}: {error}"))
+                    continue
+                written += len(layers)
+                if options["verbosity"] > 1:
+                    for layer in layers:
+                        self.stdout.write(f"{verb} {layer}")
+        finally:
+            if pool:
+                pool.shutdown()
+
+        elapsed = time.perf_counter() - started
+        summary = (
+            f"{project.code}: {len(tasks)} shot/dept scope(s), {verb} {written} layer(s), "
+            f"{skipped} unchanged, {failed} failed in {elapsed:.1f}s"
+        )
+        self.stdout.write(self.style.ERROR(summary) if failed else self.style.SUCCESS(summary))
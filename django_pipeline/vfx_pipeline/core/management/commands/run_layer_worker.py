@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.layer_jobs import claim_next_job, requeue_stale_jobs, run_job
+
+
+class Command(BaseCommand):
+    help = "Work the shared USD layer rebuild queue filled by the publish API."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Drain the queue and exit instead of polling forever.",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1.0,
+            help="Seconds to sleep when the queue is empty (default: 1.0).",
+        )
+        parser.add_argument(
+            "--stale-after",
+            type=int,
+            default=600,
+            help="Requeue jobs left running longer than this many seconds at startup (default: 600).",
+        )
+
+    def handle(self, *args, **options):
+        requeued = requeue_stale_jobs(timedelta(seconds=options["stale_after"]))
+        if requeued:
+            self.stdout.write(self.style.WARNING(f"Requeued {requeued} stale job(s)."))
+
+        poll_interval = max(0.1, float(options["poll_interval"]))
+        try:
+            while True:
+                job = claim_next_job()
+                if not job:
+                    if options["once"]:
+                        break
+                    close_old_connections()
+                    time.sleep(poll_interval)
+                    continue
+                job = run_job(job)
+                message = f"job {job.id} {job.seq_code}/{job.shot_code}/{job.dept}: {job.status}"
+                if job.status == "failed":
+                    self.stdout.write(self.style.ERROR(f"{message} ({job.error})"))
+                else:
+                    self.stdout.write(message + (f" ({job.warning})" if job.warning else ""))
+        except KeyboardInterrupt:
+            self.stdout.write("Stopped.")
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:09
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_assetversion_deform_type_assetversion_pose_type'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LayerRebuildJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('seq_code', models.CharField(max_length=64)),
+                ('shot_code', models.CharField(max_length=64)),
+                ('dept', models.CharField(max_length=64)),
+                ('shared_root', models.TextField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=16)),
+                ('request_count', models.PositiveIntegerField(default=1)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('warning', models.TextField(blank=True)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('requested_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='layer_jobs', to='core.project')),
+                ('publish', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='layer_jobs', to='core.publish')),
+            ],
+            options={
+                'ordering': ['-requested_at', '-id'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='core_layerjob_status_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status', 'pending')), fields=('shared_root',), name='core_layerjob_pending_scope_uniq')],
+            },
+        ),
+    ]
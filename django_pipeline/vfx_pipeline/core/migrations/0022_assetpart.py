@@ -0,0 +1,160 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:11
+
+from pathlib import Path
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+# Frozen copies of the core.usd_layers helpers as they were when this migration was written, so later
+# changes to them cannot change what this backfill does.
+def _path_to_posix(value):
+    return str(value or "").replace("\\", "/")
+
+
+def _extract_usd_context(path_value):
+    path = _path_to_posix(path_value).strip()
+    if not path:
+        return None
+    parts = [p for p in path.split("/") if p]
+    if "sequences" not in parts or "usd" not in parts:
+        return None
+    seq_idx = parts.index("sequences")
+    try:
+        seq = parts[seq_idx + 1]
+        shot = parts[seq_idx + 2]
+        dept = parts[seq_idx + 3]
+    except IndexError:
+        return None
+
+    artist = ""
+    try:
+        houdini_idx = parts.index("houdini", seq_idx + 4)
+        if parts[houdini_idx + 1] == "scenes":
+            artist = parts[houdini_idx + 2]
+    except Exception:
+        pass
+
+    usd_idx = parts.index("usd", seq_idx + 4)
+    asset = parts[usd_idx + 1] if len(parts) > usd_idx + 1 else ""
+    return {
+        "seq": seq,
+        "shot": shot,
+        "dept": dept,
+        "artist": artist,
+        "shared_root": "/".join(parts[: seq_idx + 4]) + "/usd",
+        "asset_layer_path": "/".join(parts[: usd_idx + 2]) + f"/{asset}.usd" if asset else "",
+    }
+
+
+def _derive_asset_part_and_stable_path(asset_usd_path, item_usd_path, metadata):
+    path = _path_to_posix(asset_usd_path or item_usd_path or "")
+    parts = [p for p in path.split("/") if p]
+    asset_name = str(metadata.get("asset_name") or metadata.get("asset") or "").strip()
+    part_name = str(metadata.get("part_name") or metadata.get("fx_layer") or "").strip()
+
+    if "usd" in parts:
+        usd_idx = parts.index("usd")
+        if not asset_name and len(parts) > usd_idx + 1:
+            asset_name = parts[usd_idx + 1]
+        if not part_name and len(parts) > usd_idx + 2:
+            part_name = parts[usd_idx + 2]
+
+    if not part_name and path:
+        part_name = Path(path).stem
+    asset_name = asset_name or "unknown_asset"
+    part_name = part_name or "unknown_part"
+
+    if asset_usd_path:
+        parent = Path(_path_to_posix(asset_usd_path)).parent
+    else:
+        item_parent = Path(_path_to_posix(item_usd_path)).parent
+        parent = item_parent.parent if item_parent.name.lower() == "data" else item_parent
+    return asset_name, part_name, _path_to_posix(str(parent / f"{part_name}.usd"))
+
+
+def backfill_asset_parts(apps, schema_editor):
+    Publish = apps.get_model("core", "Publish")
+    AssetPart = apps.get_model("core", "AssetPart")
+    latest = {}
+    qs = Publish.objects.exclude(item_usd_path="").exclude(asset_usd_path="").order_by("id")
+    for publish in qs.iterator(chunk_size=2000):
+        metadata = publish.metadata if isinstance(publish.metadata, dict) else {}
+        asset_name, part_name, stable_path = _derive_asset_part_and_stable_path(
+            publish.asset_usd_path, publish.item_usd_path, metadata
+        )
+        context = _extract_usd_context(publish.asset_usd_path) or {}
+        key = (
+            publish.project_id,
+            context.get("seq", ""),
+            context.get("shot", ""),
+            context.get("dept", ""),
+            context.get("artist", ""),
+            asset_name,
+            part_name,
+        )
+        rank = (int(publish.source_version or 0), int(publish.source_iteration or 0), publish.id)
+        prev = latest.get(key)
+        if prev and prev[0] > rank:
+            continue
+        latest[key] = (rank, stable_path, context)
+
+    AssetPart.objects.bulk_create(
+        [
+            AssetPart(
+                project_id=key[0],
+                seq_code=key[1],
+                shot_code=key[2],
+                dept=key[3],
+                artist_name=key[4],
+                asset_name=key[5],
+                part_name=key[6],
+                part_usd_path=stable_path,
+                asset_layer_path=context.get("asset_layer_path", ""),
+                shared_root=context.get("shared_root", ""),
+                latest_publish_id=rank[2],
+                source_version=rank[0],
+                source_iteration=rank[1],
+            )
+            for key, (rank, stable_path, context) in latest.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_layerrebuildjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssetPart',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('seq_code', models.CharField(blank=True, max_length=64)),
+                ('shot_code', models.CharField(blank=True, max_length=64)),
+                ('dept', models.CharField(blank=True, max_length=64)),
+                ('artist_name', models.CharField(blank=True, max_length=150)),
+                ('asset_name', models.CharField(max_length=128)),
+                ('part_name', models.CharField(max_length=128)),
+                ('part_usd_path', models.TextField()),
+                ('asset_layer_path', models.TextField(blank=True)),
+                ('shared_root', models.TextField(blank=True)),
+                ('source_version', models.IntegerField(default=0)),
+                ('source_iteration', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('latest_publish', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.publish')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='asset_parts', to='core.project')),
+            ],
+            options={
+                'ordering': ['project', 'seq_code', 'shot_code', 'dept', 'artist_name', 'asset_name', 'part_name'],
+                'indexes': [models.Index(fields=['project', 'asset_name'], name='core_assetpart_asset_idx')],
+                'constraints': [models.UniqueConstraint(fields=('project', 'seq_code', 'shot_code', 'dept', 'artist_name', 'asset_name', 'part_name'), name='core_assetpart_context_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_asset_parts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,150 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:12
+
+from pathlib import Path
+
+from django.db import migrations, models
+
+
+# Frozen copies of the core.usd_layers helpers as they were when this migration was written, so later
+# changes to them cannot change what this backfill does.
+def _path_to_posix(value):
+    return str(value or "").replace("\\", "/")
+
+
+def _extract_usd_context(path_value):
+    path = _path_to_posix(path_value).strip()
+    if not path:
+        return None
+    parts = [p for p in path.split("/") if p]
+    if "sequences" not in parts or "usd" not in parts:
+        return None
+    seq_idx = parts.index("sequences")
+    try:
+        seq = parts[seq_idx + 1]
+        shot = parts[seq_idx + 2]
+        dept = parts[seq_idx + 3]
+    except IndexError:
+        return None
+
+    artist = ""
+    try:
+        houdini_idx = parts.index("houdini", seq_idx + 4)
+        if parts[houdini_idx + 1] == "scenes":
+            artist = parts[houdini_idx + 2]
+    except Exception:
+        pass
+
+    return {
+        "seq": seq,
+        "shot": shot,
+        "dept": dept,
+        "artist": artist,
+    }
+
+
+def _derive_asset_part_and_stable_path(asset_usd_path, item_usd_path, metadata):
+    path = _path_to_posix(asset_usd_path or item_usd_path or "")
+    parts = [p for p in path.split("/") if p]
+    asset_name = str(metadata.get("asset_name") or metadata.get("asset") or "").strip()
+    part_name = str(metadata.get("part_name") or metadata.get("fx_layer") or "").strip()
+
+    if "usd" in parts:
+        usd_idx = parts.index("usd")
+        if not asset_name and len(parts) > usd_idx + 1:
+            asset_name = parts[usd_idx + 1]
+        if not part_name and len(parts) > usd_idx + 2:
+            part_name = parts[usd_idx + 2]
+
+    if not part_name and path:
+        part_name = Path(path).stem
+    asset_name = asset_name or "unknown_asset"
+    part_name = part_name or "unknown_part"
+
+    if asset_usd_path:
+        parent = Path(_path_to_posix(asset_usd_path)).parent
+    else:
+        item_parent = Path(_path_to_posix(item_usd_path)).parent
+        parent = item_parent.parent if item_parent.name.lower() == "data" else item_parent
+    return asset_name, part_name, _path_to_posix(str(parent / f"{part_name}.usd"))
+
+
+def _publish_context_fields(stable_path, asset_name, part_name):
+    context = _extract_usd_context(stable_path) or {}
+    return {
+        "seq_code": context.get("seq", ""),
+        "shot_code": context.get("shot", ""),
+        "dept": context.get("dept", ""),
+        "artist_name": context.get("artist", ""),
+        "asset_name": asset_name,
+        "part_name": part_name,
+    }
+
+
+def backfill_publish_context(apps, schema_editor):
+    Publish = apps.get_model("core", "Publish")
+    fields = ["seq_code", "shot_code", "dept", "artist_name", "asset_name", "part_name"]
+    batch = []
+    qs = Publish.objects.exclude(item_usd_path="").exclude(asset_usd_path="").order_by("id")
+    for publish in qs.iterator(chunk_size=2000):
+        metadata = publish.metadata if isinstance(publish.metadata, dict) else {}
+        asset_name, part_name, stable_path = _derive_asset_part_and_stable_path(
+            publish.asset_usd_path, publish.item_usd_path, metadata
+        )
+        for attr, value in _publish_context_fields(stable_path, asset_name, part_name).items():
+            setattr(publish, attr, value)
+        batch.append(publish)
+        if len(batch) >= 1000:
+            Publish.objects.bulk_update(batch, fields)
+            batch = []
+    if batch:
+        Publish.objects.bulk_update(batch, fields)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('core', '0022_assetpart'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='publish',
+            name='artist_name',
+            field=models.CharField(blank=True, max_length=150),
+        ),
+        migrations.AddField(
+            model_name='publish',
+            name='asset_name',
+            field=models.CharField(blank=True, max_length=128),
+        ),
+        migrations.AddField(
+            model_name='publish',
+            name='dept',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='publish',
+            name='part_name',
+            field=models.CharField(blank=True, max_length=128),
+        ),
+        migrations.AddField(
+            model_name='publish',
+            name='seq_code',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='publish',
+            name='shot_code',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.RunPython(backfill_publish_context, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='publish',
+            index=models.Index(fields=['project', 'seq_code', 'shot_code', 'dept', 'artist_name', 'asset_name', 'part_name', '-source_version', '-source_iteration', '-id'], include=('asset_usd_path',), name='core_publish_part_latest_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='publish',
+            index=models.Index(fields=['project', 'asset_name', 'part_name'], name='core_publish_asset_part_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0023_publish_usd_context'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StreamHead',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stream', models.CharField(max_length=64)),
+                ('target_type_id', models.IntegerField(default=0)),
+                ('target_id', models.IntegerField(default=0)),
+                ('task_id', models.IntegerField(default=0)),
+                ('software', models.CharField(blank=True, max_length=32)),
+                ('version', models.IntegerField(default=0)),
+                ('iteration', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('stream', 'target_type_id', 'target_id', 'task_id', 'software'), name='core_streamhead_key_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0025_idempotencykey'),
+    ]
+
+    operations = [
+        # Keep the newest row of any duplicate (publish, name, component_type) before enforcing uniqueness.
+        migrations.RunSQL(
+            """
+            DELETE FROM core_publishcomponent older
+            USING core_publishcomponent newer
+            WHERE older.publish_id = newer.publish_id
+              AND older.name = newer.name
+              AND older.component_type = newer.component_type
+              AND older.id < newer.id;
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AddConstraint(
+            model_name='publishcomponent',
+            constraint=models.UniqueConstraint(fields=('publish', 'name', 'component_type'), name='core_publishcomponent_uniq'),
+        ),
+    ]
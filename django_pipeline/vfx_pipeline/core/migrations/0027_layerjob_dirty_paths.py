@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0026_publishcomponent_unique'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='layerrebuildjob',
+            name='dirty_paths',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='layerrebuildjob',
+            name='layers_skipped',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='layerrebuildjob',
+            name='written_layers',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:26
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0027_layerjob_dirty_paths'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='assetpart',
+            index=models.Index(django.db.models.functions.text.Upper('asset_name'), django.db.models.functions.text.Lower('part_name'), name='core_assetpart_asset_ci_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('core', '0028_assetpart_asset_ci_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='publish',
+            index=models.Index(fields=['-published_at', '-id'], name='core_publish_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='publish',
+            index=models.Index(fields=['project', '-published_at', '-id'], name='core_publish_proj_pub_idx'),
+        ),
+    ]
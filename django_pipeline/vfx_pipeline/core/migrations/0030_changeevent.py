@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:36
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0029_publish_published_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeEvent',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('txid', models.BigIntegerField(db_default=models.Func(function='txid_current', output_field=models.BigIntegerField()))),
+                ('entity', models.CharField(max_length=16)),
+                ('entity_id', models.BigIntegerField()),
+                ('project_id', models.IntegerField(blank=True, null=True)),
+                ('action', models.CharField(choices=[('created', 'Created'), ('updated', 'Updated'), ('deleted', 'Deleted')], max_length=8)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['txid', 'id'], name='core_changeevent_tx_idx'), models.Index(fields=['project_id', 'txid', 'id'], name='core_changeevent_proj_tx_idx'), models.Index(fields=['created_at'], name='core_changeevent_created_idx')],
+            },
+        ),
+    ]
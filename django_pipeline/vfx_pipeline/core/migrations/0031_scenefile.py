@@ -0,0 +1,87 @@
+import django.db.models.deletion
+import django.db.models.functions.datetime
+from django.db import migrations, models
+
+# core_scene_file used to be created on demand by pipeline_scripts.versioning.ensure_scene_table, so it
+# may already exist (in its older shape). Create it if missing, bring an existing one up to the model,
+# and only then hand it to Django.
+SCENE_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS core_scene_file (
+    id SERIAL PRIMARY KEY,
+    task_id BIGINT NOT NULL REFERENCES core_task(id) ON DELETE CASCADE,
+    artist_id BIGINT NOT NULL REFERENCES core_artist(id) ON DELETE CASCADE,
+    software VARCHAR(32) NOT NULL,
+    file_path TEXT NOT NULL,
+    version INTEGER NOT NULL DEFAULT 1,
+    iteration INTEGER NOT NULL DEFAULT 1,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+ALTER TABLE core_scene_file
+    ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1,
+    ADD COLUMN IF NOT EXISTS iteration INTEGER NOT NULL DEFAULT 1;
+DO $$
+DECLARE
+    server_tz TEXT := (SELECT reset_val FROM pg_settings WHERE name = 'TimeZone');
+BEGIN
+    -- Naive timestamps were written by NOW() in the server's time zone.
+    IF (SELECT data_type FROM information_schema.columns
+        WHERE table_name = 'core_scene_file' AND column_name = 'created_at') = 'timestamp without time zone' THEN
+        EXECUTE format(
+            'ALTER TABLE core_scene_file'
+            ' ALTER COLUMN created_at TYPE TIMESTAMP WITH TIME ZONE USING created_at AT TIME ZONE %L,'
+            ' ALTER COLUMN updated_at TYPE TIMESTAMP WITH TIME ZONE USING updated_at AT TIME ZONE %L',
+            server_tz, server_tz
+        );
+    END IF;
+    IF (SELECT data_type FROM information_schema.columns
+        WHERE table_name = 'core_scene_file' AND column_name = 'task_id') = 'integer' THEN
+        ALTER TABLE core_scene_file ALTER COLUMN task_id TYPE BIGINT, ALTER COLUMN artist_id TYPE BIGINT;
+    END IF;
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'core_scene_file_uniq') THEN
+        IF to_regclass('core_scene_file_uniq') IS NOT NULL THEN
+            ALTER TABLE core_scene_file ADD CONSTRAINT core_scene_file_uniq UNIQUE USING INDEX core_scene_file_uniq;
+        ELSE
+            ALTER TABLE core_scene_file ADD CONSTRAINT core_scene_file_uniq UNIQUE (task_id, software, version, iteration);
+        END IF;
+    END IF;
+END
+$$;
+CREATE INDEX IF NOT EXISTS core_scene_file_task_idx ON core_scene_file (task_id, software, version);
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0030_changeevent'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(SCENE_TABLE_SQL, reverse_sql=migrations.RunSQL.noop),
+            ],
+            state_operations=[
+                migrations.CreateModel(
+                    name='SceneFile',
+                    fields=[
+                        ('id', models.AutoField(primary_key=True, serialize=False)),
+                        ('software', models.CharField(max_length=32)),
+                        ('file_path', models.TextField()),
+                        ('version', models.IntegerField(db_default=1, default=1)),
+                        ('iteration', models.IntegerField(db_default=1, default=1)),
+                        ('created_at', models.DateTimeField(blank=True, db_default=django.db.models.functions.datetime.Now(), null=True)),
+                        ('updated_at', models.DateTimeField(blank=True, db_default=django.db.models.functions.datetime.Now(), null=True)),
+                        ('artist', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='scene_files', to='core.artist')),
+                        ('task', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='scene_files', to='core.task')),
+                    ],
+                    options={
+                        'db_table': 'core_scene_file',
+                        'indexes': [models.Index(fields=['task', 'software', 'version'], name='core_scene_file_task_idx')],
+                        'constraints': [models.UniqueConstraint(fields=('task', 'software', 'version', 'iteration'), name='core_scene_file_uniq')],
+                    },
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,27 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0031_scenefile'),
+    ]
+
+    operations = [
+        # pipeline_scripts.versioning.ensure_scene_table may already have added the column.
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    "ALTER TABLE core_scene_file ADD COLUMN IF NOT EXISTS status VARCHAR(16) NOT NULL DEFAULT 'saved';",
+                    reverse_sql="ALTER TABLE core_scene_file DROP COLUMN IF EXISTS status;",
+                ),
+            ],
+            state_operations=[
+                migrations.AddField(
+                    model_name='scenefile',
+                    name='status',
+                    field=models.CharField(choices=[('pending', 'Pending'), ('saved', 'Saved')], db_default='saved', default='saved', max_length=16),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Every publish and scene stream gets a head row carrying its newest numbers, then each publish head
+# points at the publish that was flagged latest.
+BACKFILL_SQL = """
+    INSERT INTO core_streamhead AS head (stream, target_type_id, target_id, task_id, software, version, iteration, updated_at)
+    SELECT DISTINCT ON (task_id, software) 'core_scene_file', 0, 0, task_id, software, version, iteration, NOW()
+    FROM core_scene_file
+    ORDER BY task_id, software, version DESC, iteration DESC
+    ON CONFLICT (stream, target_type_id, target_id, task_id, software) DO UPDATE SET
+        version = EXCLUDED.version, iteration = EXCLUDED.iteration
+    WHERE (EXCLUDED.version, EXCLUDED.iteration) > (head.version, head.iteration);
+
+    INSERT INTO core_streamhead AS head (stream, target_type_id, target_id, task_id, software, version, iteration, updated_at)
+    SELECT DISTINCT ON (target_content_type_id, target_object_id, COALESCE(task_id, 0), software)
+           'publish', target_content_type_id, target_object_id, COALESCE(task_id, 0), software,
+           COALESCE(source_version, 0), COALESCE(source_iteration, 0), NOW()
+    FROM core_publish
+    ORDER BY target_content_type_id, target_object_id, COALESCE(task_id, 0), software,
+             source_version DESC NULLS LAST, source_iteration DESC NULLS LAST
+    ON CONFLICT (stream, target_type_id, target_id, task_id, software) DO UPDATE SET
+        version = CASE WHEN (EXCLUDED.version, EXCLUDED.iteration) > (head.version, head.iteration)
+                       THEN EXCLUDED.version ELSE head.version END,
+        iteration = CASE WHEN (EXCLUDED.version, EXCLUDED.iteration) > (head.version, head.iteration)
+                         THEN EXCLUDED.iteration ELSE head.iteration END;
+
+    UPDATE core_streamhead AS head SET latest_publish_id = latest.id
+    FROM (
+        SELECT DISTINCT ON (target_content_type_id, target_object_id, COALESCE(task_id, 0), software)
+               id, target_content_type_id, target_object_id, COALESCE(task_id, 0) AS task_id, software
+        FROM core_publish
+        WHERE is_latest
+        ORDER BY target_content_type_id, target_object_id, COALESCE(task_id, 0), software, published_at DESC, id DESC
+    ) AS latest
+    WHERE head.stream = 'publish'
+      AND head.target_type_id = latest.target_content_type_id
+      AND head.target_id = latest.target_object_id
+      AND head.task_id = latest.task_id
+      AND head.software = latest.software;
+"""
+
+RESTORE_SQL = """
+    UPDATE core_publish AS publish SET is_latest = EXISTS (
+        SELECT 1 FROM core_streamhead WHERE latest_publish_id = publish.id
+    );
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0032_scenefile_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='streamhead',
+            name='latest_publish',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.publish'),
+        ),
+        migrations.RunSQL(BACKFILL_SQL, reverse_sql=RESTORE_SQL),
+        migrations.RemoveField(
+            model_name='publish',
+            name='is_latest',
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 05:25
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0034_idempotencykey_claimed_at'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='idempotencykey',
+            name='claimed_at',
+        ),
+    ]
@@ -6,13 +6,19 @@ from .shot import Shot
 from .artist import Artist
 from .task import Task, TaskAssignment
 from .tag import Tag, AssetTag, ShotTag, SequenceTag
+from .layer_job import LayerRebuildJob
+from .idempotency import IdempotencyKey
+from .change_event import ChangeEvent
 from .versioning import (
     AssetArtistAssignment,
+    AssetPart,
     AssetTexture,
     AssetVersion,
     Publish,
     PublishComponent,
+    SceneFile,
     ShotAssetUsage,
+    StreamHead,
     VersionLink,
 )
 
@@ -29,11 +35,17 @@ __all__ = [
     "AssetTag",
     "ShotTag",
     "SequenceTag",
+    "LayerRebuildJob",
+    "IdempotencyKey",
+    "ChangeEvent",
     "AssetArtistAssignment",
+    "AssetPart",
     "AssetTexture",
     "AssetVersion",
     "Publish",
     "PublishComponent",
+    "SceneFile",
     "ShotAssetUsage",
+    "StreamHead",
     "VersionLink",
 ]
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from django.db import models
+from django.utils import timezone
+
+
+class ChangeEvent(models.Model):
+    # Append-only change log behind /api/changes/. `txid` is the writing transaction's id (set by the
+    # database), so the feed can hold back events of transactions that may still commit lower ids.
+    ACTION_CHOICES = [
+        ("created", "Created"),
+        ("updated", "Updated"),
+        ("deleted", "Deleted"),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    txid = models.BigIntegerField(db_default=models.Func(function="txid_current", output_field=models.BigIntegerField()))
+    entity = models.CharField(max_length=16)
+    entity_id = models.BigIntegerField()
+    project_id = models.IntegerField(blank=True, null=True)
+    action = models.CharField(max_length=8, choices=ACTION_CHOICES)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["txid", "id"], name="core_changeevent_tx_idx"),
+            models.Index(fields=["project_id", "txid", "id"], name="core_changeevent_proj_tx_idx"),
+            models.Index(fields=["created_at"], name="core_changeevent_created_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"#{self.id} {self.action} {self.entity} {self.entity_id}"
@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+from django.db import models
+from django.utils import timezone
+
+
+class IdempotencyKey(models.Model):
+    # Written in the same transaction as the view's response; core.idempotency holds an advisory lock on the
+    # key while the view runs.
+    endpoint = models.CharField(max_length=64)
+    key = models.CharField(max_length=255)
+    request_hash = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(blank=True, null=True)
+    response_body = models.JSONField(blank=True, null=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["endpoint", "key"], name="core_idempotencykey_uniq"),
+        ]
+        indexes = [
+            models.Index(fields=["expires_at"], name="core_idempotencykey_exp_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.endpoint}:{self.key}"
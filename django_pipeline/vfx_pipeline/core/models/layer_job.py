@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+from django.db import models
+from django.utils import timezone
+
+
+class LayerRebuildJob(models.Model):
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("running", "Running"),
+        ("done", "Done"),
+        ("failed", "Failed"),
+    ]
+
+    project = models.ForeignKey("core.Project", on_delete=models.CASCADE, related_name="layer_jobs")
+    # Last publish that requested this rebuild; earlier requests for the same scope coalesce into it.
+    publish = models.ForeignKey("core.Publish", on_delete=models.SET_NULL, blank=True, null=True, related_name="layer_jobs")
+    seq_code = models.CharField(max_length=64)
+    shot_code = models.CharField(max_length=64)
+    dept = models.CharField(max_length=64)
+    shared_root = models.TextField()
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default="pending")
+    request_count = models.PositiveIntegerField(default=1)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # Part files changed by the coalesced publishes; the rebuild propagates up from these only.
+    dirty_paths = models.JSONField(default=list, blank=True)
+    # Layers the last run rewrote vs. found already current (write amplification per job).
+    written_layers = models.JSONField(default=list, blank=True)
+    layers_skipped = models.PositiveIntegerField(default=0)
+    warning = models.TextField(blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    requested_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ["-requested_at", "-id"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["shared_root"],
+                condition=models.Q(status="pending"),
+                name="core_layerjob_pending_scope_uniq",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["status", "created_at"], name="core_layerjob_status_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.seq_code}/{self.shot_code}/{self.dept} ({self.status})"
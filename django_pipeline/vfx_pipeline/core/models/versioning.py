@@ -4,6 +4,7 @@ from django.conf import settings
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from django.db import models
+from django.db.models.functions import Lower, Now, Upper
 from django.utils import timezone
 
 
@@ -185,15 +186,43 @@ class Publish(models.Model):
     item_usd_path = models.TextField(blank=True)
     asset_usd_path = models.TextField(blank=True)
     preview_path = models.TextField(blank=True)
+    # USD context of part publishes, denormalized from the paths at publish time.
+    seq_code = models.CharField(max_length=64, blank=True)
+    shot_code = models.CharField(max_length=64, blank=True)
+    dept = models.CharField(max_length=64, blank=True)
+    artist_name = models.CharField(max_length=150, blank=True)
+    asset_name = models.CharField(max_length=128, blank=True)
+    part_name = models.CharField(max_length=128, blank=True)
     comment = models.TextField(blank=True)
     metadata = models.JSONField(default=dict, blank=True)
     published_at = models.DateTimeField(default=timezone.now)
-    is_latest = models.BooleanField(default=True)
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["-published_at"]
+        indexes = [
+            models.Index(
+                fields=[
+                    "project",
+                    "seq_code",
+                    "shot_code",
+                    "dept",
+                    "artist_name",
+                    "asset_name",
+                    "part_name",
+                    "-source_version",
+                    "-source_iteration",
+                    "-id",
+                ],
+                include=["asset_usd_path"],
+                name="core_publish_part_latest_idx",
+            ),
+            models.Index(fields=["project", "asset_name", "part_name"], name="core_publish_asset_part_idx"),
+            # Keyset pagination of /api/publishes/ (newest first).
+            models.Index(fields=["-published_at", "-id"], name="core_publish_published_idx"),
+            models.Index(fields=["project", "-published_at", "-id"], name="core_publish_proj_pub_idx"),
+        ]
 
     def __str__(self) -> str:
         target_name = getattr(self.target, "code", None) or getattr(self.target, "name", None)
@@ -227,6 +256,9 @@ class PublishComponent(models.Model):
 
     class Meta:
         ordering = ["publish", "name"]
+        constraints = [
+            models.UniqueConstraint(fields=["publish", "name", "component_type"], name="core_publishcomponent_uniq"),
+        ]
 
     def __str__(self) -> str:
         return f"{self.publish}::{self.name}"
@@ -253,6 +285,101 @@ class VersionLink(models.Model):
         return f"{self.source} -> {self.target} ({self.link_type})"
 
 
+class AssetPart(models.Model):
+    # Authoritative part registry (USD spec section 7): one row per part, pointing at its latest Publish.
+    project = models.ForeignKey("core.Project", on_delete=models.CASCADE, related_name="asset_parts")
+    seq_code = models.CharField(max_length=64, blank=True)
+    shot_code = models.CharField(max_length=64, blank=True)
+    dept = models.CharField(max_length=64, blank=True)
+    artist_name = models.CharField(max_length=150, blank=True)
+    asset_name = models.CharField(max_length=128)
+    part_name = models.CharField(max_length=128)
+    part_usd_path = models.TextField()
+    asset_layer_path = models.TextField(blank=True)
+    shared_root = models.TextField(blank=True)
+    latest_publish = models.ForeignKey(Publish, on_delete=models.CASCADE, related_name="+")
+    source_version = models.IntegerField(default=0)
+    source_iteration = models.IntegerField(default=0)
+    created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["project", "seq_code", "shot_code", "dept", "artist_name", "asset_name", "part_name"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["project", "seq_code", "shot_code", "dept", "artist_name", "asset_name", "part_name"],
+                name="core_assetpart_context_uniq",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["project", "asset_name"], name="core_assetpart_asset_idx"),
+            # Serves the case-insensitive asset lookup of latest_per_part (asset_name__iexact).
+            models.Index(Upper("asset_name"), Lower("part_name"), name="core_assetpart_asset_ci_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.asset_name}/{self.part_name} ({self.seq_code}/{self.shot_code}/{self.dept})"
+
+
+class StreamHead(models.Model):
+    # Last version/iteration handed out per stream. Publish streams are keyed by target + task + software,
+    # scene streams (stream = scene table name) by task + software; unused key parts stay 0/"".
+    # A publish is the latest of its stream when it is the head's latest_publish.
+    stream = models.CharField(max_length=64)
+    target_type_id = models.IntegerField(default=0)
+    target_id = models.IntegerField(default=0)
+    task_id = models.IntegerField(default=0)
+    software = models.CharField(max_length=32, blank=True)
+    version = models.IntegerField(default=0)
+    iteration = models.IntegerField(default=0)
+    latest_publish = models.ForeignKey(Publish, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["stream", "target_type_id", "target_id", "task_id", "software"],
+                name="core_streamhead_key_uniq",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.stream} task={self.task_id} {self.software} v{self.version:03d} i{self.iteration:03d}"
+
+
+class SceneFile(models.Model):
+    # DCC scene saves, written with raw SQL by pipeline_scripts.versioning (also by direct-DB tools);
+    # the model owns the schema so requests no longer run CREATE/ALTER TABLE.
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("saved", "Saved"),
+    ]
+
+    id = models.AutoField(primary_key=True)
+    task = models.ForeignKey("core.Task", on_delete=models.CASCADE, related_name="scene_files", db_index=False)
+    artist = models.ForeignKey("core.Artist", on_delete=models.CASCADE, related_name="scene_files", db_index=False)
+    software = models.CharField(max_length=32)
+    file_path = models.TextField()
+    version = models.IntegerField(default=1, db_default=1)
+    iteration = models.IntegerField(default=1, db_default=1)
+    # "pending" between a reservation (/api/scenes/reserve/) and the DCC finishing the write.
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default="saved", db_default="saved")
+    created_at = models.DateTimeField(db_default=Now(), blank=True, null=True)
+    updated_at = models.DateTimeField(db_default=Now(), blank=True, null=True)
+
+    class Meta:
+        db_table = "core_scene_file"
+        constraints = [
+            models.UniqueConstraint(fields=["task", "software", "version", "iteration"], name="core_scene_file_uniq"),
+        ]
+        indexes = [
+            models.Index(fields=["task", "software", "version"], name="core_scene_file_task_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.file_path} (v{self.version:03d} i{self.iteration:03d})"
+
+
 class ShotAssetUsage(models.Model):
     STATUS_CHOICES = [
         ("planned", "Planned"),
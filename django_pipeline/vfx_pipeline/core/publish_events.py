@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import json
+import logging
+import queue
+import select
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional
+
+import psycopg2
+from django.db import connection, connections
+
+from core.models import Publish
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "pm_publish"
+# NOTIFY payloads must stay under 8000 bytes; long USD paths are dropped rather than the event.
+_MAX_PAYLOAD = 7900
+_FILTER_KEYS = ("seq", "shot", "dept")
+
+
+def publish_payload(publish: Publish) -> Dict[str, Any]:
+    return {
+        "publish_id": publish.id,
+        "project_id": publish.project_id,
+        "seq": publish.seq_code,
+        "shot": publish.shot_code,
+        "dept": publish.dept,
+        "artist": publish.artist_name,
+        "asset": publish.asset_name,
+        "part": publish.part_name,
+        "version": publish.source_version,
+        "iteration": publish.source_iteration,
+        "part_usd_path": publish.asset_usd_path,
+    }
+
+
+def notify_publishes(publishes: Iterable[Publish]) -> None:
+    """Queue one NOTIFY per publish; Postgres delivers them only if the surrounding transaction commits."""
+    payloads = []
+    for publish in publishes:
+        payload = json.dumps(publish_payload(publish), separators=(",", ":"))
+        if len(payload.encode("utf-8")) > _MAX_PAYLOAD:
+            payload = json.dumps({**publish_payload(publish), "part_usd_path": None}, separators=(",", ":"))
+        payloads.append(payload)
+    if not payloads:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_notify(%s, payload) FROM unnest(%s::text[]) AS payload", [CHANNEL, payloads])
+
+
+class Subscription:
+    """Events of one SSE client; `filters` match project_id exactly and seq/shot/dept case-insensitively."""
+
+    def __init__(self, filters: Dict[str, Any], maxsize: int = 1000) -> None:
+        self.filters = {key: str(value).lower() if key in _FILTER_KEYS else value for key, value in filters.items() if value}
+        self.queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=maxsize)
+
+    def matches(self, event: Dict[str, Any]) -> bool:
+        for key, value in self.filters.items():
+            found = event.get(key)
+            if (str(found or "").lower() if key in _FILTER_KEYS else found) != value:
+                return False
+        return True
+
+    def put(self, event: Dict[str, Any]) -> None:
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            # A client this far behind reloads instead of receiving a partial history.
+            with self.queue.mutex:
+                self.queue.queue.clear()
+            self.queue.put_nowait({"resync": True})
+
+    def get(self, timeout: float) -> Optional[Dict[str, Any]]:
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class _Listener:
+    """The one LISTEN connection of this process, fanning notifications out to every subscription.
+
+    The thread starts with the first subscriber and exits (closing its connection) once none are left.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._subscriptions: set[Subscription] = set()
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+
+    def subscribe(self, filters: Dict[str, Any]) -> Subscription:
+        subscription = Subscription(filters)
+        with self._lock:
+            self._subscriptions.add(subscription)
+            if self._thread is None or not self._thread.is_alive():
+                self._ready.clear()
+                self._thread = threading.Thread(target=self._run, args=(dict(connections["default"].settings_dict),), daemon=True)
+                self._thread.start()
+        # Events committed after subscribe() returns must reach the client, so wait for LISTEN.
+        self._ready.wait(timeout=5)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def _dispatch(self, event: Dict[str, Any]) -> None:
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            if event.get("resync") or subscription.matches(event):
+                subscription.put(event)
+
+    def _idle(self) -> bool:
+        with self._lock:
+            if self._subscriptions:
+                return False
+            self._thread = None
+            return True
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def _run(self, db: Dict[str, Any]) -> None:
+        reconnecting = False
+        while True:
+            conn = None
+            try:
+                conn = psycopg2.connect(
+                    dbname=db["NAME"], user=db["USER"], password=db["PASSWORD"], host=db["HOST"], port=db["PORT"] or None
+                )
+                conn.autocommit = True
+                with conn.cursor() as cursor:
+                    cursor.execute(f"LISTEN {CHANNEL}")
+                self._ready.set()
+                if reconnecting:
+                    # Notifications sent while disconnected are lost; let clients reload.
+                    self._dispatch({"resync": True})
+                last_seen = time.monotonic()
+                while not self._idle():
+                    if select.select([conn], [], [], 1) != ([], [], []):
+                        conn.poll()
+                        last_seen = time.monotonic()
+                        while conn.notifies:
+                            notify = conn.notifies.pop(0)
+                            try:
+                                self._dispatch(json.loads(notify.payload))
+                            except ValueError:
+                                logger.warning("Ignoring malformed %s payload: %r", CHANNEL, notify.payload)
+                    elif time.monotonic() - last_seen > 30:
+                        # Detect a dead connection even when nothing is being published.
+                        with conn.cursor() as cursor:
+                            cursor.execute("SELECT 1")
+                        last_seen = time.monotonic()
+                return
+            except psycopg2.Error as exc:
+                logger.warning("Publish listener lost its connection (%s); reconnecting", exc)
+                reconnecting = True
+                time.sleep(1)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+
+listener = _Listener()
@@ -1,7 +1,8 @@
-from django.db.models.signals import post_delete, pre_save
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
 from django.dispatch import receiver
 
-from core.models import Project, Asset, Sequence, Shot, Artist
+from core import api_cache, change_events, stream_heads
+from core.models import Project, Asset, AssetPart, Sequence, Shot, Artist, Publish, Task
 
 
 def _delete_file(fieldfile) -> None:
@@ -44,3 +45,69 @@ def auto_delete_image_on_change(sender, instance, **kwargs):
 @receiver(post_delete, sender=Artist)
 def auto_delete_image_on_delete(sender, instance, **kwargs):
     _delete_file(getattr(instance, "image", None))
+
+
+# Read-cache invalidation (core.api_cache). Bulk writes skip these and invalidate explicitly.
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+@receiver(post_save, sender=Sequence)
+@receiver(post_delete, sender=Sequence)
+@receiver(post_save, sender=Artist)
+@receiver(post_delete, sender=Artist)
+def invalidate_reference_cache(sender, instance, **kwargs):
+    project_id = instance.pk if sender is Project else getattr(instance, "project_id", None)
+    api_cache.invalidate(project_id, meta=True)
+
+
+@receiver(post_save, sender=Asset)
+@receiver(post_delete, sender=Asset)
+@receiver(post_save, sender=Shot)
+@receiver(post_delete, sender=Shot)
+def invalidate_project_cache(sender, instance, **kwargs):
+    api_cache.invalidate(instance.project_id)
+
+
+@receiver(post_save, sender=Task)
+@receiver(pre_delete, sender=Task)
+def invalidate_task_cache(sender, instance, **kwargs):
+    # Tasks also appear in the publish reads (include=task) of every shot their publishes are filed under,
+    # which for asset and sequence tasks is not the task's own scope. Runs before a delete, while the
+    # publishes still point at the task.
+    project_id, shot_code = change_events.task_scope(instance)
+    api_cache.invalidate(project_id, shot_code)
+    publish_scopes = set(Publish.objects.filter(task_id=instance.pk).values_list("project_id", "shot_code").distinct())
+    for publish_project_id, publish_shot_code in publish_scopes - {(project_id, shot_code)}:
+        api_cache.invalidate(publish_project_id, publish_shot_code)
+
+
+@receiver(post_save, sender=Publish)
+@receiver(post_delete, sender=Publish)
+@receiver(post_save, sender=AssetPart)
+@receiver(post_delete, sender=AssetPart)
+def invalidate_publish_cache(sender, instance, **kwargs):
+    api_cache.invalidate(instance.project_id, instance.shot_code)
+
+
+# A new publish becomes the latest of its stream. bulk_create skips this; callers mark explicitly.
+@receiver(post_save, sender=Publish)
+def mark_latest_publish(sender, instance, created=False, **kwargs):
+    if created:
+        stream_heads.mark_latest_publishes([instance])
+
+
+# Change feed (core.change_events, /api/changes/). Bulk writes skip these and record explicitly.
+@receiver(post_save, sender=Publish)
+@receiver(post_delete, sender=Publish)
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+@receiver(post_save, sender=Shot)
+@receiver(post_delete, sender=Shot)
+@receiver(post_save, sender=Asset)
+@receiver(post_delete, sender=Asset)
+def record_change_event(sender, instance, created=False, **kwargs):
+    if kwargs["signal"] is post_delete:
+        action = "deleted"
+    else:
+        action = "created" if created else "updated"
+    project_id = change_events.task_scope(instance)[0] if sender is Task else instance.project_id
+    change_events.record(sender.__name__.lower(), instance.pk, project_id, action)
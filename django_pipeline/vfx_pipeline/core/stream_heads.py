@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+from typing import Iterable, Optional
+
+from django.db import connection, models
+
+from core import api_cache
+from core.models import Publish, StreamHead
+
+PUBLISH_STREAM = "publish"
+
+# Inserts or bumps the head row and returns the numbers in one statement; the row lock taken by
+# ON CONFLICT DO UPDATE serializes concurrent allocations. The stream's newest row is only read to start
+# a head that does not exist yet (the uncorrelated NOT EXISTS is a one-time filter, so the seed query is
+# skipped otherwise); after that, writes with explicit numbers carry the head forward themselves
+# (mark_latest_publishes, versioning.record_scene). Keep in sync with pipeline_scripts/versioning.py.
+ALLOCATE_SQL = """
+    WITH seed AS (
+        SELECT newest.version, newest.iteration FROM ({seed}) AS newest
+        WHERE NOT EXISTS (
+            SELECT 1 FROM core_streamhead
+            WHERE stream = %(stream)s AND target_type_id = %(target_type_id)s AND target_id = %(target_id)s
+              AND task_id = %(task_id)s AND software = %(software)s
+        )
+    ),
+    base AS (
+        SELECT COALESCE((SELECT version FROM seed), 0) AS version,
+               COALESCE((SELECT iteration FROM seed), 0) AS iteration
+    )
+    INSERT INTO core_streamhead AS head (stream, target_type_id, target_id, task_id, software, version, iteration, updated_at)
+    SELECT %(stream)s, %(target_type_id)s, %(target_id)s, %(task_id)s, %(software)s,
+           CASE WHEN %(bump)s = 'version' OR base.version = 0 THEN base.version + 1 ELSE base.version END,
+           CASE WHEN %(bump)s = 'version' OR base.version = 0 THEN 1 ELSE base.iteration + 1 END,
+           NOW()
+    FROM base
+    ON CONFLICT (stream, target_type_id, target_id, task_id, software) DO UPDATE SET
+        version = CASE WHEN %(bump)s = 'version' OR head.version = 0 THEN head.version + 1 ELSE head.version END,
+        iteration = CASE WHEN %(bump)s = 'version' OR head.version = 0 THEN 1 ELSE head.iteration + 1 END,
+        updated_at = NOW()
+    RETURNING version, iteration
+"""
+
+_PUBLISH_SEED_SQL = """
+    SELECT source_version AS version, COALESCE(source_iteration, 0) AS iteration
+    FROM core_publish
+    WHERE target_content_type_id = %(target_type_id)s
+      AND target_object_id = %(target_id)s
+      AND task_id IS NOT DISTINCT FROM %(task_ref)s
+      AND (%(software)s = '' OR software = %(software)s)
+      AND source_version IS NOT NULL
+    ORDER BY source_version DESC, source_iteration DESC NULLS LAST
+    LIMIT 1
+"""
+
+
+def _bump(version: int, iteration: int, bump: str) -> tuple[int, int]:
+    if bump == "version" or version <= 0:
+        return version + 1, 1
+    return version, iteration + 1
+
+
+def allocate_publish_numbers(
+    target_type_id: int,
+    target_id: int,
+    task_id: Optional[int],
+    software: str,
+    bump: str = "iteration",
+) -> tuple[int, int]:
+    """Reserve the next version/iteration of a publish stream in one round trip."""
+    params = {
+        "stream": PUBLISH_STREAM,
+        "target_type_id": target_type_id,
+        "target_id": target_id,
+        "task_id": task_id or 0,
+        "task_ref": task_id,
+        "software": software or "",
+        "bump": "version" if bump == "version" else "iteration",
+    }
+    with connection.cursor() as cursor:
+        cursor.execute(ALLOCATE_SQL.format(seed=_PUBLISH_SEED_SQL), params)
+        version, iteration = cursor.fetchone()
+    return version, iteration
+
+
+def peek_publish_numbers(
+    target_type_id: int,
+    target_id: int,
+    task_id: Optional[int],
+    software: str,
+    bump: str,
+) -> tuple[int, int]:
+    """Numbers the next allocation would return, read from the stream's head row."""
+    bump = "version" if bump == "version" else "iteration"
+    head = (
+        StreamHead.objects.filter(
+            stream=PUBLISH_STREAM,
+            target_type_id=target_type_id,
+            target_id=target_id,
+            task_id=task_id or 0,
+            software=software or "",
+        )
+        .values_list("version", "iteration")
+        .first()
+    )
+    if head is None:
+        # A stream nothing was allocated for yet continues after its newest publish, like allocation does.
+        with connection.cursor() as cursor:
+            cursor.execute(
+                _PUBLISH_SEED_SQL,
+                {
+                    "target_type_id": target_type_id,
+                    "target_id": target_id,
+                    "task_ref": task_id,
+                    "software": software or "",
+                },
+            )
+            head = cursor.fetchone() or (0, 0)
+    return _bump(head[0], head[1], bump)
+
+
+# Points each stream's head at its newest publish and carries explicitly numbered publishes forward,
+# so later allocations and peeks continue after them. Returns the (project, shot) of every publish that
+# stopped being the latest: it can sit under another shot than the new one, and its cached reads still
+# say is_latest. The heads are locked first so one moved by a concurrent publish is read as it left it.
+_MARK_LATEST_SQL = """
+    WITH incoming AS (
+        SELECT * FROM unnest(%(target_type_ids)s::integer[], %(target_ids)s::integer[], %(task_ids)s::integer[],
+                             %(softwares)s::text[], %(versions)s::integer[], %(iterations)s::integer[], %(publish_ids)s::bigint[])
+            AS row(target_type_id, target_id, task_id, software, version, iteration, publish_id)
+    ),
+    superseded AS (
+        SELECT head.latest_publish_id
+        FROM core_streamhead AS head
+        JOIN incoming ON (head.target_type_id, head.target_id, head.task_id, head.software)
+                       = (incoming.target_type_id, incoming.target_id, incoming.task_id, incoming.software)
+        WHERE head.stream = %(stream)s AND head.latest_publish_id <> incoming.publish_id
+        FOR UPDATE OF head
+    ),
+    moved AS (
+        INSERT INTO core_streamhead AS head
+            (stream, target_type_id, target_id, task_id, software, version, iteration, latest_publish_id, updated_at)
+        SELECT %(stream)s, target_type_id, target_id, task_id, software, version, iteration, publish_id, NOW()
+        FROM incoming
+        ON CONFLICT (stream, target_type_id, target_id, task_id, software) DO UPDATE SET
+            version = CASE WHEN (EXCLUDED.version, EXCLUDED.iteration) > (head.version, head.iteration)
+                           THEN EXCLUDED.version ELSE head.version END,
+            iteration = CASE WHEN (EXCLUDED.version, EXCLUDED.iteration) > (head.version, head.iteration)
+                             THEN EXCLUDED.iteration ELSE head.iteration END,
+            latest_publish_id = EXCLUDED.latest_publish_id,
+            updated_at = NOW()
+    )
+    SELECT DISTINCT publish.project_id, publish.shot_code
+    FROM superseded JOIN core_publish AS publish ON publish.id = superseded.latest_publish_id
+"""
+
+
+def mark_latest_publishes(publishes: Iterable[Publish]) -> None:
+    """Make each publish the latest of its stream; of several in one stream, the last one wins.
+
+    Cached reads of the shots whose publish lost its latest flag are invalidated; the callers invalidate
+    the new publishes' own shots.
+    """
+    publishes = list(publishes)
+    heads: dict[tuple, tuple[tuple[int, int], int]] = {}
+    for publish in publishes:
+        key = (publish.target_content_type_id, publish.target_object_id, publish.task_id or 0, publish.software or "")
+        numbers = (publish.source_version or 0, publish.source_iteration or 0)
+        if key in heads:
+            numbers = max(numbers, heads[key][0])
+        heads[key] = (numbers, publish.id)
+    if not heads:
+        return
+    columns = [list(column) for column in zip(*((*key, *numbers, publish_id) for key, (numbers, publish_id) in heads.items()))]
+    names = ("target_type_ids", "target_ids", "task_ids", "softwares", "versions", "iterations", "publish_ids")
+    with connection.cursor() as cursor:
+        cursor.execute(_MARK_LATEST_SQL, {"stream": PUBLISH_STREAM, **dict(zip(names, columns))})
+        superseded = set(cursor.fetchall())
+    for project_id, shot_code in superseded - {(publish.project_id, publish.shot_code) for publish in publishes}:
+        api_cache.invalidate(project_id, shot_code)
+
+
+def with_is_latest(qs: models.QuerySet) -> models.QuerySet:
+    """Annotate publishes with `is_latest`, true for the publish its stream head points at."""
+    return qs.annotate(is_latest=models.Exists(StreamHead.objects.filter(latest_publish_id=models.OuterRef("pk"))))
@@ -1,3 +1,1216 @@
-from django.test import TestCase
+import hashlib
+import importlib
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+import psycopg2
+from django.apps import apps
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.db import IntegrityError, connection, connections, transaction
+from django.test.utils import CaptureQueriesContext
+from django.core.cache import caches
+from django.test import LiveServerTestCase, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from core.models import Artist, Asset, AssetPart, ChangeEvent, IdempotencyKey, LayerRebuildJob, Project, Publish, PublishComponent, SceneFile, Sequence, Shot, StreamHead, Task, VersionLink
+from core import idempotency, publish_events
+from core.layer_jobs import claim_job, claim_next_job, enqueue_layer_rebuild, requeue_stale_jobs
+from core.stream_heads import allocate_publish_numbers
+from core.usd_layers import build_shared_layer_graph, publish_context_fields, register_asset_parts, write_usda_sublayers
+
+SCENE_TABLE = "test_scene_file_allocation"
+
+
+def _reserve_publish_numbers(args):
+    target_type_id, count = args
+    start = time.perf_counter()
+    numbers = [allocate_publish_numbers(target_type_id, 1, None, "houdini") for _ in range(count)]
+    elapsed = time.perf_counter() - start
+    connections.close_all()
+    return numbers, elapsed
+
+
+def _reserve_scene_numbers(args):
+    from pipeline_scripts import versioning
+
+    db, count = args
+    conn = psycopg2.connect(dbname=db["NAME"], user=db["USER"], password=db["PASSWORD"], host=db["HOST"], port=db["PORT"])
+    try:
+        start = time.perf_counter()
+        numbers = [versioning.reserve_numbers(conn, 1, "houdini", table_name=SCENE_TABLE) for _ in range(count)]
+        elapsed = time.perf_counter() - start
+    finally:
+        conn.close()
+    return numbers, elapsed
+
+
+class StreamAllocationConcurrencyTest(TransactionTestCase):
+    processes = 8
+    per_process = 50
+    # Allocation is one statement per call; even on a busy CI box this stays far above the floor.
+    min_allocations_per_second = 50
+
+    def _hammer(self, worker, arg):
+        connections.close_all()
+        pool_context = multiprocessing.get_context("fork")
+        with pool_context.Pool(self.processes) as pool:
+            results = pool.map(worker, [(arg, self.per_process)] * self.processes)
+        numbers = [pair for batch, _ in results for pair in batch]
+        slowest = max(elapsed for _, elapsed in results)
+        return numbers, slowest
+
+    def _assert_unique_and_fast(self, numbers, slowest):
+        total = self.processes * self.per_process
+        self.assertEqual(len(set(numbers)), total)
+        self.assertEqual(sorted(numbers), [(1, iteration) for iteration in range(1, total + 1)])
+        self.assertGreater(total / slowest, self.min_allocations_per_second)
+
+    def test_publish_stream_hands_out_each_number_once(self):
+        content_type = ContentType.objects.get_for_model(Shot)
+        numbers, slowest = self._hammer(_reserve_publish_numbers, content_type.id)
+        self._assert_unique_and_fast(numbers, slowest)
+        head = StreamHead.objects.get(stream="publish", target_type_id=content_type.id, target_id=1)
+        self.assertEqual((head.version, head.iteration), (1, self.processes * self.per_process))
+
+    def _drop_scene_table(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {SCENE_TABLE}")
+
+    def test_scene_stream_hands_out_each_number_once(self):
+        from pipeline_scripts import versioning
+
+        connection.ensure_connection()
+        versioning.ensure_scene_table(connection.connection, SCENE_TABLE)
+        # Not Django-managed, and its foreign keys would block the flush between tests.
+        self.addCleanup(self._drop_scene_table)
+        numbers, slowest = self._hammer(_reserve_scene_numbers, connection.settings_dict)
+        self._assert_unique_and_fast(numbers, slowest)
+
+
+class StreamAllocationSeedTest(TestCase):
+    def test_allocation_continues_from_existing_publishes(self):
+        project = Project.objects.create(name="Seed", code="SEED")
+        sequence = Sequence.objects.create(project=project, name="sq010", code="sq010")
+        shot = Shot.objects.create(project=project, sequence=sequence, name="sh010", code="sh010")
+        content_type = ContentType.objects.get_for_model(Shot)
+        Publish.objects.create(
+            project=project,
+            target_content_type=content_type,
+            target_object_id=shot.id,
+            software="houdini",
+            source_version=3,
+            source_iteration=7,
+        )
+        self.assertEqual(allocate_publish_numbers(content_type.id, shot.id, None, "houdini"), (3, 8))
+        self.assertEqual(allocate_publish_numbers(content_type.id, shot.id, None, "houdini"), (3, 9))
+        self.assertEqual(allocate_publish_numbers(content_type.id, shot.id, None, "houdini", bump="version"), (4, 1))
+        # A row recorded with explicit numbers ahead of the head moves allocation past it.
+        Publish.objects.create(
+            project=project,
+            target_content_type=content_type,
+            target_object_id=shot.id,
+            software="houdini",
+            source_version=6,
+            source_iteration=2,
+        )
+        self.assertEqual(allocate_publish_numbers(content_type.id, shot.id, None, "houdini"), (6, 3))
+
+        # Once the head exists, allocation is a head-row upsert; the stream's rows are not read again.
+        Publish.objects.bulk_create(
+            [
+                Publish(
+                    project=project,
+                    target_content_type=content_type,
+                    target_object_id=shot.id,
+                    software="houdini",
+                    source_version=9,
+                    source_iteration=1,
+                )
+            ]
+        )
+        self.assertEqual(allocate_publish_numbers(content_type.id, shot.id, None, "houdini"), (6, 4))
+
+
+class StreamHeadLatestTest(TestCase):
+    def setUp(self):
+        project = Project.objects.create(name="Head", code="HEAD")
+        sequence = Sequence.objects.create(project=project, name="sq010", code="sq010")
+        shot = Shot.objects.create(project=project, sequence=sequence, name="sh010", code="sh010")
+        self.task = Task.objects.create(shot=shot, sequence=sequence, task_type="fx", task_name="fx")
+        self.stream = {"target_type": "shot", "target_id": shot.id, "task_id": self.task.id, "software": "houdini"}
+
+    def _post(self, url, body):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, json.dumps(body), content_type="application/json")
+        self.assertEqual(response.status_code, 201, response.content)
+        return response.json()["data"]
+
+    def _latest_flags(self):
+        rows = self.client.get("/api/publishes/", {"task_id": self.task.id}).json()["data"]
+        return {row["id"]: row["is_latest"] for row in rows}
+
+    def test_latest_follows_the_head_without_rewriting_older_publishes(self):
+        first = self._post("/api/publishes/", self.stream)["publish_id"]
+        second = self._post("/api/publishes/", self.stream)["publish_id"]
+        self.assertEqual(self._latest_flags(), {first: False, second: True})
+
+        batch = self._post("/api/publishes/batch/", {**self.stream, "publishes": [{"label": "a"}, {"label": "b"}]})["results"]
+        self.assertEqual([row["is_latest"] for row in batch], [False, True])
+        flags = self._latest_flags()
+        self.assertEqual([publish_id for publish_id, latest in flags.items() if latest], [batch[1]["publish_id"]])
+        self.assertEqual(StreamHead.objects.get(stream="publish", task_id=self.task.id).latest_publish_id, batch[1]["publish_id"])
+
+    def test_next_numbers_read_the_head_row(self):
+        self._post("/api/publishes/", {**self.stream, "version": 4, "iteration": 2})
+        with CaptureQueriesContext(connection) as queries:
+            numbers = self.client.get("/api/publishes/next/", self.stream).json()["data"]
+        self.assertEqual((numbers["version"], numbers["iteration"]), (4, 3))
+        self.assertFalse([query for query in queries if "core_publish" in query["sql"]])
+
+
+class PublishBatchTest(TestCase):
+    ROOT = "/show/sequences/sq010/sh010/fx/houdini/scenes/bob/fx/usd/Pinch"
+
+    def setUp(self):
+        caches["api"].clear()
+        self.project = Project.objects.create(name="Batch", code="BATCH")
+        sequence = Sequence.objects.create(project=self.project, name="sq010", code="sq010")
+        shot = Shot.objects.create(project=self.project, sequence=sequence, name="sh010", code="sh010")
+        self.fx = Task.objects.create(shot=shot, sequence=sequence, task_type="fx", task_name="fx")
+        self.sim = Task.objects.create(shot=shot, sequence=sequence, task_type="fx", task_name="sim")
+        self.defaults = {"target_type": "shot", "target_id": shot.id, "software": "houdini"}
+
+    def _item(self, task, part, **extra):
+        return {"task_id": task.id, "item_usd_path": f"{self.ROOT}/{part}/{part}_v001.usd", "asset_usd_path": f"{self.ROOT}/{part}/{part}.usd", **extra}
+
+    def _batch(self, items):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post("/api/publishes/batch/", json.dumps({**self.defaults, "publishes": items}), content_type="application/json")
+
+    def test_items_are_grouped_by_stream(self):
+        items = [self._item(self.fx, "fire01"), self._item(self.sim, "smoke01"), self._item(self.fx, "debris01"), self._item(self.sim, "dust01", version=7, iteration=3)]
+        with mock.patch("core.views.api_views.allocate_publish_numbers", wraps=allocate_publish_numbers) as allocate:
+            response = self._batch(items)
+        self.assertEqual(response.status_code, 201, response.content)
+        results = response.json()["data"]["results"]
+
+        self.assertEqual(allocate.call_count, 2)
+        numbers = [(row["source_version"], row["source_iteration"]) for row in results]
+        self.assertEqual(numbers[0], numbers[2])
+        self.assertEqual(numbers[3], (7, 3))
+        self.assertEqual([row["is_latest"] for row in results], [False, False, True, True])
+        heads = dict(StreamHead.objects.filter(stream="publish").values_list("task_id", "latest_publish_id"))
+        self.assertEqual(heads, {self.fx.id: results[2]["publish_id"], self.sim.id: results[3]["publish_id"]})
+
+    def test_bulk_write_invalidates_cache_and_records_change_events(self):
+        scope = {"project_id": self.project.id, "shot": "sh010"}
+        self.assertEqual(self.client.get("/api/publishes/", scope).json()["data"], [])
+        self.assertEqual(self.client.get("/api/publishes/", scope)["X-Cache"], "HIT")
+
+        results = self._batch([self._item(self.fx, "fire01"), self._item(self.fx, "smoke01")]).json()["data"]["results"]
+        publish_ids = [row["publish_id"] for row in results]
+        fresh = self.client.get("/api/publishes/", scope)
+        self.assertEqual(fresh["X-Cache"], "MISS")
+        self.assertEqual(sorted(row["id"] for row in fresh.json()["data"]), sorted(publish_ids))
+        self.assertEqual(
+            sorted(ChangeEvent.objects.filter(entity="publish").values_list("entity_id", "project_id", "action")),
+            sorted((publish_id, self.project.id, "created") for publish_id in publish_ids),
+        )
+        self.assertEqual(AssetPart.objects.filter(latest_publish_id__in=publish_ids).count(), 2)
+
+    def test_one_invalid_item_creates_nothing(self):
+        response = self._batch([self._item(self.fx, "fire01"), {"task_id": 0}])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([row["ok"] for row in response.json()["results"]], [False])
+        self.assertFalse(Publish.objects.exists())
+        self.assertFalse(ChangeEvent.objects.filter(entity="publish").exists())
+
+
+class IdempotentPublishTest(TestCase):
+    def setUp(self):
+        project = Project.objects.create(name="Idem", code="IDEM")
+        sequence = Sequence.objects.create(project=project, name="sq010", code="sq010")
+        shot = Shot.objects.create(project=project, sequence=sequence, name="sh010", code="sh010")
+        self.task = Task.objects.create(shot=shot, sequence=sequence, task_type="fx", task_name="fx")
+
+    def _post(self, body, key):
+        return self.client.post(
+            "/api/publishes/",
+            json.dumps(body),
+            content_type="application/json",
+            HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def test_replay_returns_first_response_without_inserting(self):
+        body = {"task_id": self.task.id, "software": "houdini", "label": "scene"}
+        first = self._post(body, "save-1")
+        replay = self._post(body, "save-1")
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(replay.status_code, 201)
+        self.assertEqual(replay.json(), first.json())
+        self.assertEqual(replay["Idempotent-Replayed"], "true")
+        self.assertEqual(Publish.objects.count(), 1)
+
+        self.assertEqual(self._post({**body, "label": "other"}, "save-1").status_code, 422)
+        self.assertEqual(self._post(body, "save-2").status_code, 201)
+        self.assertEqual(Publish.objects.count(), 2)
+
+    def test_key_held_by_a_running_request_is_refused_until_it_finishes(self):
+        body = {"task_id": self.task.id, "software": "houdini", "label": "scene"}
+        db = connection.settings_dict
+        other = psycopg2.connect(dbname=db["NAME"], user=db["USER"], password=db["PASSWORD"], host=db["HOST"], port=db["PORT"])
+        self.addCleanup(other.close)
+        with other.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_lock(%s)", [idempotency._lock_id("api_publishes", "running-1")])
+        busy = self._post(body, "running-1")
+        self.assertEqual((busy.status_code, busy["Retry-After"]), (409, "1"))
+        self.assertFalse(Publish.objects.exists())
+
+        other.close()  # the holder's connection goes away, and its lock with it
+        self.assertEqual(self._post(body, "running-1").status_code, 201)
+        self.assertEqual(Publish.objects.count(), 1)
+
+    def test_key_left_in_progress_by_a_dead_request_is_taken_over(self):
+        body = {"task_id": self.task.id, "software": "houdini", "label": "scene"}
+        request_hash = hashlib.sha256(json.dumps(body).encode("utf-8")).hexdigest()
+        expires_at = timezone.now() + timedelta(days=1)
+        IdempotencyKey.objects.create(endpoint="api_publishes", key="crashed-1", request_hash=request_hash, expires_at=expires_at)
+        self.assertEqual(self._post({**body, "label": "other"}, "crashed-1").status_code, 422)
+        taken = self._post(body, "crashed-1")
+        self.assertEqual(taken.status_code, 201)
+        self.assertEqual(IdempotencyKey.objects.get(key="crashed-1").status_code, 201)
+        self.assertEqual(self._post(body, "crashed-1").json(), taken.json())
+        self.assertEqual(Publish.objects.count(), 1)
+
+    def test_raising_view_rolls_back_its_writes_with_the_key(self):
+        body = {"task_id": self.task.id, "software": "houdini", "label": "scene"}
+        with mock.patch("core.views.api_views.register_asset_part", side_effect=RuntimeError("boom")), self.assertRaises(RuntimeError):
+            self._post(body, "boom-1")
+        self.assertFalse(Publish.objects.exists())
+        self.assertFalse(IdempotencyKey.objects.filter(key="boom-1").exists())
+        self.assertEqual(self._post(body, "boom-1").status_code, 201)
+
+    def test_failed_request_releases_key(self):
+        self.assertEqual(self._post({"software": "houdini"}, "bad-1").status_code, 400)
+        self.assertFalse(IdempotencyKey.objects.filter(key="bad-1").exists())
+
+
+class PublishWriteQueryCountTest(TestCase):
+    def setUp(self):
+        project = Project.objects.create(name="Bulk", code="BULK")
+        sequence = Sequence.objects.create(project=project, name="sq010", code="sq010")
+        shot = Shot.objects.create(project=project, sequence=sequence, name="sh010", code="sh010")
+        self.task = Task.objects.create(shot=shot, sequence=sequence, task_type="fx", task_name="fx")
+
+    def _publish(self, components, links):
+        body = {
+            "task_id": self.task.id,
+            "software": "houdini",
+            "preview_path": "/show/preview.mov",
+            "components": [{"name": f"cache{i}", "component_type": "cache", "file_path": f"/cache/{i}.bgeo"} for i in range(components)],
+            "links": [{"target_publish_id": publish_id} for publish_id in links],
+        }
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post("/api/publishes/", json.dumps(body), content_type="application/json")
+        self.assertEqual(response.status_code, 201, response.content)
+        return response.json()["data"]["publish_id"], len(queries)
+
+    def test_query_count_does_not_grow_with_components_or_links(self):
+        upstream = [self._publish(0, [])[0] for _ in range(3)]
+        small_id, small = self._publish(2, upstream[:1])
+        large_id, large = self._publish(200, upstream + [999999])
+        self.assertEqual(small, large)
+        self.assertEqual(PublishComponent.objects.filter(publish_id=large_id, component_type="cache").count(), 200)
+        self.assertEqual(VersionLink.objects.filter(source_id=large_id).count(), 3)
+
+    def test_duplicate_component_keys_keep_last_entry(self):
+        body = {
+            "task_id": self.task.id,
+            "software": "houdini",
+            "components": [
+                {"name": "scene", "file_path": "/a.hip"},
+                {"name": "scene", "file_path": "/b.hip"},
+            ],
+        }
+        response = self.client.post("/api/publishes/", json.dumps(body), content_type="application/json")
+        publish_id = response.json()["data"]["publish_id"]
+        scene_paths = PublishComponent.objects.filter(publish_id=publish_id, component_type="scene").values_list("file_path", flat=True)
+        self.assertEqual(list(scene_paths), ["/b.hip"])
+
+    def test_invalid_component_rejects_publish(self):
+        body = {"task_id": self.task.id, "components": ["not-an-object"]}
+        response = self.client.post("/api/publishes/", json.dumps(body), content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Publish.objects.exists())
+
+
+class WriteUsdaSublayersTest(SimpleTestCase):
+    def test_unchanged_layer_is_not_rewritten(self):
+        with tempfile.TemporaryDirectory() as root:
+            layer = os.path.join(root, "shared", "dept", "fx.usd")
+            self.assertTrue(write_usda_sublayers(layer, [f"{root}/artist/a.usd", f"{root}/artist/b.usd"]))
+            mtime = os.stat(layer).st_mtime_ns
+            self.assertFalse(write_usda_sublayers(layer, [f"{root}/artist/a.usd", f"{root}/artist/b.usd"]))
+            self.assertEqual(os.stat(layer).st_mtime_ns, mtime)
+
+            self.assertTrue(write_usda_sublayers(layer, [f"{root}/artist/a.usd"]))
+            with open(layer, encoding="utf-8") as handle:
+                self.assertIn('@"../../artist/a.usd"@', handle.read())
+            self.assertEqual(os.listdir(os.path.dirname(layer)), ["fx.usd"])
+
+
+class LayerGraphPropagationTest(SimpleTestCase):
+    def _graph(self, root, parts):
+        rows = [
+            ("artist01", "PinchIn", f"{root}/artist01/PinchIn/{part}/{part}.usd", f"{root}/artist01/PinchIn/PinchIn.usd", 1, 1, index)
+            for index, part in enumerate(parts, start=1)
+        ]
+        return build_shared_layer_graph(rows, "010", "0500", "fx", f"{root}/shared")
+
+    def test_only_changed_layers_are_written(self):
+        with tempfile.TemporaryDirectory() as root:
+            graph = self._graph(root, ["particles01", "smoke01"])
+            first = graph.propagate(graph.layers(), write_usda_sublayers)
+            self.assertEqual(len(first.written), 5)
+
+            # New iteration of an existing part: its stable path is already sublayered, nothing above moves.
+            again = graph.propagate([f"{root}/artist01/PinchIn/smoke01/smoke01.usd"], write_usda_sublayers)
+            self.assertEqual(again.written, [])
+            self.assertEqual(again.skipped, [f"{root}/artist01/PinchIn/PinchIn.usd"])
+
+            # A new part changes the asset layer only; the artist layer still lists the same asset layer.
+            graph = self._graph(root, ["particles01", "smoke01", "sparks01"])
+            added = graph.propagate([f"{root}/artist01/PinchIn/sparks01/sparks01.usd"], write_usda_sublayers)
+            self.assertEqual(added.written, [f"{root}/artist01/PinchIn/PinchIn.usd"])
+            self.assertEqual(added.skipped, [f"{root}/shared/artist/artist01.usd"])
+
+
+class RebuildSharedLayersCommandTest(TestCase):
+    def test_dry_run_then_rebuild_then_noop(self):
+        project = Project.objects.create(name="Rebuild", code="RBLD")
+        content_type = ContentType.objects.get_for_model(Project)
+        with tempfile.TemporaryDirectory() as root:
+            for shot in ("0500", "0510"):
+                shared_root = f"{root}/010/{shot}/fx/shared"
+                publish = Publish.objects.create(project=project, target_content_type=content_type, target_object_id=project.id)
+                AssetPart.objects.create(
+                    project=project, seq_code="010", shot_code=shot, dept="fx", artist_name="artist01",
+                    asset_name="PinchIn", part_name="smoke01", part_usd_path=f"{root}/{shot}/smoke01.usd",
+                    asset_layer_path=f"{root}/{shot}/PinchIn.usd", shared_root=shared_root, latest_publish=publish,
+                )
+
+            def run(*args):
+                out = StringIO()
+                call_command("rebuild_shared_layers", "--project", "RBLD", "--jobs", "1", *args, stdout=out)
+                return out.getvalue()
+
+            self.assertIn("2 shot/dept scope(s), would write 10 layer(s), 0 unchanged", run("--dry-run"))
+            self.assertFalse(os.path.exists(f"{root}/010/0500/fx/shared/seq/010.usd"))
+            self.assertIn("wrote 10 layer(s), 0 unchanged", run())
+            self.assertTrue(os.path.exists(f"{root}/010/0500/fx/shared/seq/010.usd"))
+            self.assertIn("wrote 0 layer(s), 10 unchanged", run())
+            self.assertIn("0 shot/dept scope(s)", run("--seq", "020"))
+
+
+class LayerJobQueueTest(TestCase):
+    def setUp(self):
+        self.project = Project.objects.create(name="Queue", code="QUEUE")
+        self.content_type = ContentType.objects.get_for_model(Project)
+
+    def _publish(self, shot, part):
+        root = f"/show/sequences/sq010/{shot}/fx/houdini/scenes/bob/fx/usd/Pinch"
+        return Publish.objects.create(
+            project=self.project, target_content_type=self.content_type, target_object_id=self.project.id,
+            asset_usd_path=f"{root}/{part}/{part}.usd",
+        )
+
+    def test_enqueue_coalesces_into_the_pending_job(self):
+        first, _ = enqueue_layer_rebuild(self._publish("sh010", "fire01"))
+        second_publish = self._publish("sh010", "smoke01")
+        second, warning = enqueue_layer_rebuild(second_publish)
+        other, _ = enqueue_layer_rebuild(self._publish("sh020", "fire01"))
+
+        self.assertIsNone(warning)
+        self.assertEqual(second.id, first.id)
+        self.assertNotEqual(other.id, first.id)
+        self.assertEqual((second.request_count, second.publish_id), (2, second_publish.id))
+        self.assertEqual([path.rsplit("/", 1)[1] for path in second.dirty_paths], ["fire01.usd", "smoke01.usd"])
+
+    def test_one_pending_job_per_shared_root(self):
+        job, _ = enqueue_layer_rebuild(self._publish("sh010", "fire01"))
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            LayerRebuildJob.objects.create(project=self.project, shared_root=job.shared_root)
+        LayerRebuildJob.objects.create(project=self.project, shared_root=job.shared_root, status="running")
+
+    def test_claimed_job_no_longer_absorbs_new_requests(self):
+        job, _ = enqueue_layer_rebuild(self._publish("sh010", "fire01"))
+        claimed = claim_job(job)
+        self.assertEqual((claimed.status, claimed.attempts), ("running", 1))
+        self.assertIsNone(claim_job(job))
+
+        later, _ = enqueue_layer_rebuild(self._publish("sh010", "smoke01"))
+        self.assertNotEqual(later.id, job.id)
+        self.assertEqual((later.status, later.request_count), ("pending", 1))
+        job.refresh_from_db()
+        self.assertEqual(len(job.dirty_paths), 1)
+
+    def test_requeue_stale_jobs(self):
+        stale, _ = enqueue_layer_rebuild(self._publish("sh010", "fire01"))
+        superseded, _ = enqueue_layer_rebuild(self._publish("sh020", "fire01"))
+        fresh, _ = enqueue_layer_rebuild(self._publish("sh030", "fire01"))
+        for job in (stale, superseded, fresh):
+            claim_job(job)
+        an_hour_ago = timezone.now() - timedelta(hours=1)
+        LayerRebuildJob.objects.filter(id__in=[stale.id, superseded.id]).update(started_at=an_hour_ago)
+        pending, _ = enqueue_layer_rebuild(self._publish("sh020", "smoke01"))
+
+        self.assertEqual(requeue_stale_jobs(timedelta(minutes=10)), 2)
+        statuses = dict(LayerRebuildJob.objects.values_list("id", "status"))
+        self.assertEqual(statuses[stale.id], "pending")
+        self.assertEqual(statuses[superseded.id], "failed")
+        self.assertEqual(statuses[pending.id], "pending")
+        self.assertEqual(statuses[fresh.id], "running")
+
+
+class LayerJobClaimTest(TransactionTestCase):
+    def test_claim_skips_jobs_locked_by_another_worker(self):
+        project = Project.objects.create(name="Claim", code="CLAIM")
+        first = LayerRebuildJob.objects.create(project=project, shared_root="/show/a/fx/usd")
+        second = LayerRebuildJob.objects.create(project=project, shared_root="/show/b/fx/usd")
+        db = connection.settings_dict
+        other = psycopg2.connect(dbname=db["NAME"], user=db["USER"], password=db["PASSWORD"], host=db["HOST"], port=db["PORT"])
+        try:
+            with other.cursor() as cur:
+                cur.execute("SELECT id FROM core_layerrebuildjob WHERE id = %s FOR UPDATE", [first.id])
+            claimed = claim_next_job()
+            self.assertEqual((claimed.id, claimed.status), (second.id, "running"))
+            self.assertIsNone(claim_next_job())
+        finally:
+            other.rollback()
+            other.close()
+        self.assertEqual(claim_next_job().id, first.id)
+
+
+class LatestPerPartTest(TestCase):
+    def test_one_row_per_part_name_newest_first(self):
+        project = Project.objects.create(name="Parts", code="PRTS")
+        content_type = ContentType.objects.get_for_model(Project)
+        for shot, part, version in [("0500", "Smoke01", 3), ("0510", "smoke01", 5), ("0500", "fire01", 1), ("0500", "debris01", 2)]:
+            publish = Publish.objects.create(project=project, target_content_type=content_type, target_object_id=project.id)
+            AssetPart.objects.create(
+                project=project, seq_code="010", shot_code=shot, dept="fx", artist_name="artist01", asset_name="PinchIn",
+                part_name=part, part_usd_path=f"/{shot}/{part}.usd", latest_publish=publish, source_version=version,
+            )
+        response = self.client.get("/api/publishes/", {"asset": "pinchin", "latest_per_part": 1})
+        rows = response.json()["data"]
+        self.assertEqual([row["part_usd_path"] for row in rows], ["/0500/debris01.usd", "/0500/fire01.usd", "/0510/smoke01.usd"])
+        self.assertNotIn("part_key", rows[0])
+
+
+class AssetPartRegistryTest(TestCase):
+    ROOT = "/show/sequences/sq010/sh010/fx/houdini/scenes/bob/fx/usd/Pinch"
+
+    def setUp(self):
+        self.project = Project.objects.create(name="Registry", code="REG")
+        self.content_type = ContentType.objects.get_for_model(Project)
+
+    def _publish(self, part, version, iteration=1, **context):
+        asset_usd_path = f"{self.ROOT}/{part}/{part}.usd"
+        return Publish.objects.create(
+            project=self.project, target_content_type=self.content_type, target_object_id=self.project.id,
+            item_usd_path=f"{self.ROOT}/{part}/{part}_v{version:03d}.usd", asset_usd_path=asset_usd_path,
+            source_version=version, source_iteration=iteration,
+            **(context or publish_context_fields(asset_usd_path, "Pinch", part)),
+        )
+
+    def test_first_publish_inserts_and_newer_one_updates(self):
+        first = self._publish("fire01", 1)
+        [part] = register_asset_parts([first])
+        self.assertEqual((part.latest_publish_id, part.source_version), (first.id, 1))
+        self.assertEqual((part.seq_code, part.shot_code, part.artist_name), ("sq010", "sh010", "bob"))
+        self.assertEqual(part.shared_root, "show/sequences/sq010/sh010/fx/usd")
+
+        newer = self._publish("fire01", 2)
+        [updated] = register_asset_parts([newer])
+        self.assertEqual(updated.id, part.id)
+        self.assertEqual((updated.latest_publish_id, updated.source_version), (newer.id, 2))
+
+        register_asset_parts([first])
+        self.assertEqual(AssetPart.objects.get().latest_publish_id, newer.id)
+
+    def test_batch_keeps_the_newest_publish_per_part(self):
+        fire_old, fire_new, smoke = self._publish("fire01", 3), self._publish("fire01", 3, 2), self._publish("smoke01", 1)
+        register_asset_parts([fire_new, smoke, fire_old])
+        self.assertEqual(
+            dict(AssetPart.objects.values_list("part_name", "latest_publish_id")),
+            {"fire01": fire_new.id, "smoke01": smoke.id},
+        )
+
+    def test_publishes_without_a_part_are_ignored(self):
+        self.assertEqual(register_asset_parts([self._publish("fire01", 1, part_name="")]), [])
+        self.assertFalse(AssetPart.objects.exists())
+
+    def test_backfill_migration_registers_the_newest_publish_per_part(self):
+        backfill = importlib.import_module("core.migrations.0022_assetpart").backfill_asset_parts
+        self._publish("fire01", 1)
+        newest = self._publish("fire01", 2)
+        smoke = self._publish("smoke01", 4)
+        Publish.objects.create(project=self.project, target_content_type=self.content_type, target_object_id=self.project.id)
+
+        backfill(apps, None)
+        rows = {row.part_name: row for row in AssetPart.objects.all()}
+        self.assertEqual(sorted(rows), ["fire01", "smoke01"])
+        self.assertEqual((rows["fire01"].latest_publish_id, rows["fire01"].source_version), (newest.id, 2))
+        self.assertEqual(rows["smoke01"].latest_publish_id, smoke.id)
+        self.assertEqual(rows["fire01"].part_usd_path, f"{self.ROOT}/fire01/fire01.usd")
+        self.assertEqual(rows["fire01"].asset_layer_path, "show/sequences/sq010/sh010/fx/houdini/scenes/bob/fx/usd/Pinch/Pinch.usd")
+
+
+class PublishContextColumnsTest(TestCase):
+    ROOT = "/show/sequences/sq010/sh010/fx/houdini/scenes/bob/fx/usd/Pinch"
+    COLUMNS = ("seq_code", "shot_code", "dept", "artist_name", "asset_name", "part_name")
+
+    def setUp(self):
+        self.project = Project.objects.create(name="Context", code="CTX")
+        sequence = Sequence.objects.create(project=self.project, name="sq010", code="sq010")
+        shot = Shot.objects.create(project=self.project, sequence=sequence, name="sh010", code="sh010")
+        task = Task.objects.create(shot=shot, sequence=sequence, task_type="fx", task_name="fx")
+        self.stream = {"target_type": "shot", "target_id": shot.id, "task_id": task.id, "software": "houdini"}
+
+    def _item(self, part):
+        return {"item_usd_path": f"{self.ROOT}/{part}/{part}_v001.usd", "asset_usd_path": f"{self.ROOT}/{part}/{part}.usd"}
+
+    def _columns(self, publish_id):
+        return Publish.objects.filter(id=publish_id).values_list(*self.COLUMNS).get()
+
+    def test_publish_writes_fill_the_context_columns(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            single = self.client.post("/api/publishes/", json.dumps({**self.stream, **self._item("fire01")}), content_type="application/json")
+            batch = self.client.post(
+                "/api/publishes/batch/", json.dumps({**self.stream, "publishes": [self._item("smoke01")]}), content_type="application/json"
+            )
+            bare = self.client.post("/api/publishes/", json.dumps(self.stream), content_type="application/json")
+        self.assertEqual(self._columns(single.json()["data"]["publish_id"]), ("sq010", "sh010", "fx", "bob", "Pinch", "fire01"))
+        self.assertEqual(self._columns(batch.json()["data"]["results"][0]["publish_id"]), ("sq010", "sh010", "fx", "bob", "Pinch", "smoke01"))
+        self.assertEqual(self._columns(bare.json()["data"]["publish_id"]), ("",) * 6)
+
+    def test_backfill_migration_fills_the_context_columns(self):
+        backfill = importlib.import_module("core.migrations.0023_publish_usd_context").backfill_publish_context
+        content_type = ContentType.objects.get_for_model(Project)
+        publish = Publish.objects.create(
+            project=self.project, target_content_type=content_type, target_object_id=self.project.id,
+            metadata={"part_name": "fire_main"}, **self._item("fire01"),
+        )
+        bare = Publish.objects.create(project=self.project, target_content_type=content_type, target_object_id=self.project.id)
+
+        backfill(apps, None)
+        self.assertEqual(self._columns(publish.id), ("sq010", "sh010", "fx", "bob", "Pinch", "fire_main"))
+        self.assertEqual(self._columns(bare.id), ("",) * 6)
+
+
+    def test_detail_page_finds_publishes_listed_under_the_unknown_labels(self):
+        content_type = ContentType.objects.get_for_model(Project)
+        publish = Publish.objects.create(
+            project=self.project, target_content_type=content_type, target_object_id=self.project.id,
+            item_usd_path="/tmp/loose/cache_v001.usd", asset_usd_path="/tmp/loose/cache.usd",
+        )
+        listed = self.client.get("/publishes/", {"project": self.project.id}).context["rows"]
+        self.assertEqual([(row.asset_name, row.part_name) for row in listed], [("unknown_asset", "unknown_part")])
+        detail = self.client.get("/publishes/detail/", {"asset": "unknown_asset", "part": "unknown_part", "project": self.project.id})
+        self.assertEqual([row.publish.id for row in detail.context["history"]], [publish.id])
+
+class KeysetPaginationTest(TestCase):
+    def test_pages_cover_every_row_once(self):
+        project = Project.objects.create(name="Pages", code="PGS")
+        content_type = ContentType.objects.get_for_model(Project)
+        published_at = timezone.now()
+        # Identical timestamps force the id tie-breaker.
+        created = [
+            Publish.objects.create(project=project, target_content_type=content_type, target_object_id=project.id, published_at=published_at).id
+            for _ in range(5)
+        ]
+        seen, cursor, pages = [], None, 0
+        while True:
+            params = {"project_id": project.id, "limit": 2, **({"cursor": cursor} if cursor else {})}
+            body = self.client.get("/api/publishes/", params).json()
+            seen += [row["id"] for row in body["data"]]
+            pages += 1
+            cursor = body["next_cursor"]
+            if not cursor:
+                break
+        self.assertEqual(pages, 3)
+        self.assertEqual(seen, sorted(created, reverse=True))
+
+    @override_settings(API_PAGE_SIZE=2, API_CACHE_ENABLED=False)
+    def test_lists_are_unpaged_unless_limit_or_cursor_is_sent(self):
+        codes = [Project.objects.create(name=f"Unpaged {index}", code=f"UNP{index}").code for index in range(5)]
+        body = self.client.get("/api/projects/").json()
+        self.assertEqual(sorted(row["code"] for row in body["data"]), codes)
+        self.assertIsNone(body["next_cursor"])
+
+        first = self.client.get("/api/projects/", {"limit": 3}).json()
+        self.assertEqual(len(first["data"]), 3)
+        rest = self.client.get("/api/projects/", {"cursor": first["next_cursor"]}).json()
+        self.assertEqual(len(rest["data"]), 2)
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get("/api/projects/", {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(API_CACHE_ENABLED=False)
+class PublishListQueryCountTest(TestCase):
+    def _create(self, project, content_type, count):
+        for index in range(count):
+            publish = Publish.objects.create(project=project, target_content_type=content_type, target_object_id=project.id)
+            PublishComponent.objects.bulk_create(
+                [PublishComponent(publish=publish, name=f"cache{n}", component_type="cache", file_path=f"/{index}/{n}.bgeo") for n in range(3)]
+            )
+
+    def _list(self, project):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/publishes/", {"project_id": project.id, "include_components": 1})
+        return response.json()["data"], len(queries)
+
+    def test_query_count_does_not_grow_with_rows(self):
+        small = Project.objects.create(name="Small", code="SML")
+        large = Project.objects.create(name="Large", code="LRG")
+        content_type = ContentType.objects.get_for_model(Project)
+        self._create(small, content_type, 1)
+        self._create(large, content_type, 25)
+        self._list(small)  # warm the ContentType cache
+        small_rows, small_queries = self._list(small)
+        large_rows, large_queries = self._list(large)
+        self.assertEqual(len(large_rows), 25)
+        self.assertEqual(small_queries, large_queries)
+        # ETag stamp, the page, and the batched components.
+        self.assertEqual(large_queries, 3)
+        self.assertEqual([c["name"] for c in large_rows[0]["components"]], ["cache0", "cache1", "cache2"])
+        self.assertEqual(large_rows[0]["target_type"], "project")
+
+
+class SparseFieldsTest(TestCase):
+    def setUp(self):
+        self.project = Project.objects.create(name="Sparse", code="SPRS")
+        sequence = Sequence.objects.create(project=self.project, name="sq010", code="sq010")
+        shot = Shot.objects.create(project=self.project, sequence=sequence, name="sh010", code="sh010")
+        self.task = Task.objects.create(shot=shot, sequence=sequence, task_type="fx", task_name="pyro")
+        Publish.objects.create(
+            project=self.project,
+            target_content_type=ContentType.objects.get_for_model(Shot),
+            target_object_id=shot.id,
+            task=self.task,
+            part_name="smoke01",
+            item_usd_path="/smoke01.usd",
+        )
+
+    def test_fields_and_includes_join_in_the_page_query(self):
+        ContentType.objects.get_for_model(Shot)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                "/api/publishes/",
+                {"project_id": self.project.id, "fields": "id,part_name,item_usd_path,target_type", "include": "task,project,artist"},
+            )
+        row = response.json()["data"][0]
+        self.assertEqual(set(row), {"id", "part_name", "item_usd_path", "target_type", "task", "project", "artist"})
+        self.assertEqual(row["target_type"], "shot")
+        self.assertEqual(row["task"]["task_name"], "pyro")
+        self.assertEqual(row["project"]["code"], "SPRS")
+        self.assertIsNone(row["artist"])
+        # ETag stamp plus one joined page query.
+        self.assertEqual(len(queries), 2)
+
+    def test_unknown_field_is_rejected(self):
+        response = self.client.get("/api/shots/", {"fields": "id,bogus"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("bogus", response.json()["error"])
+        rows = self.client.get("/api/shots/", {"fields": "code", "include": "sequence"}).json()["data"]
+        self.assertEqual(rows, [{"code": "sh010", "sequence": {"id": self.task.sequence_id, "name": "sq010", "code": "sq010"}}])
+
+
+@override_settings(API_CACHE_ENABLED=False)
+class ConditionalGetTest(TestCase):
+    def test_unchanged_list_returns_304_until_a_write(self):
+        project = Project.objects.create(name="Etag", code="ETAG")
+        sequence = Sequence.objects.create(project=project, name="sq010", code="sq010")
+        shot = Shot.objects.create(project=project, sequence=sequence, name="sh010", code="sh010")
+        first = self.client.get("/api/shots/", {"project_id": project.id})
+        etag = first["ETag"]
+        self.assertTrue(etag.startswith('"'))
+
+        with CaptureQueriesContext(connection) as queries:
+            cached = self.client.get("/api/shots/", {"project_id": project.id}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(len(queries), 1)
+        # Different parameters are a different representation.
+        self.assertEqual(self.client.get("/api/shots/", {"project_id": project.id, "fields": "id"}, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        shot.notes = "retimed"
+        shot.save()
+        changed = self.client.get("/api/shots/", {"project_id": project.id}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed["ETag"], etag)
+
+
+class StreamingListTest(TestCase):
+    def test_stream_emits_every_row_as_ndjson(self):
+        project = Project.objects.create(name="Stream", code="STRM")
+        content_type = ContentType.objects.get_for_model(Project)
+        ids = [
+            Publish.objects.create(project=project, target_content_type=content_type, target_object_id=project.id).id
+            for _ in range(7)
+        ]
+        PublishComponent.objects.create(publish_id=ids[0], name="cache", component_type="cache", file_path="/c.bgeo")
+        response = self.client.get(
+            "/api/publishes/",
+            {"project_id": project.id, "stream": 1, "limit": 2, "fields": "id,target_type", "include": "components"},
+        )
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([row["id"] for row in rows], sorted(ids, reverse=True))
+        self.assertEqual(rows[-1]["components"][0]["name"], "cache")
+        self.assertEqual(rows[0]["target_type"], "project")
+
+
+@override_settings(API_CACHE_ENABLED=True)
+class ApiReadCacheTest(TestCase):
+    def setUp(self):
+        caches["api"].clear()
+        self.project = Project.objects.create(name="Cache", code="CACHE")
+        self.content_type = ContentType.objects.get_for_model(Project)
+
+    def _publish(self, shot_code, software="houdini"):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Publish.objects.create(
+                project=self.project, target_content_type=self.content_type, target_object_id=self.project.id,
+                shot_code=shot_code, software=software,
+            )
+
+    def _get(self, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/publishes/", {"project_id": self.project.id, **params})
+        return response, len(queries)
+
+    def test_writes_only_invalidate_their_branch(self):
+        # One stream per shot, so no write moves the latest publish of another shot.
+        self._publish("0500", software="0500")
+        self.assertEqual(self._get(shot="0500")[0]["X-Cache"], "MISS")
+        hit, queries = self._get(shot="0500")
+        self.assertEqual((hit["X-Cache"], queries), ("HIT", 0))
+        self.assertEqual(len(hit.json()["data"]), 1)
+        self._get()
+        self.assertEqual(self._get()[0]["X-Cache"], "HIT")
+
+        self._publish("0510", software="0510")
+        self.assertEqual(self._get(shot="0500")[0]["X-Cache"], "HIT")
+        project_read = self._get()[0]
+        self.assertEqual(project_read["X-Cache"], "MISS")
+        self.assertEqual(len(project_read.json()["data"]), 2)
+
+        self._publish("0500", software="0500")
+        self.assertEqual(len(self._get(shot="0500")[0].json()["data"]), 2)
+        stats = self.client.get("/api/cache/stats/").json()["data"]
+        self.assertEqual((stats["hits"], stats["misses"]), (3, 4))
+
+    def test_superseded_latest_publish_of_another_shot_is_invalidated(self):
+        # One asset-target stream published from two shots: the second publish moves the head away from
+        # a row cached under the first shot.
+        first = self._publish("0500")
+        self.assertEqual([row["is_latest"] for row in self._get(shot="0500")[0].json()["data"]], [True])
+        self.assertEqual(self._get(shot="0500")[0]["X-Cache"], "HIT")
+
+        self._publish("0510")
+        stale, _ = self._get(shot="0500")
+        self.assertEqual(stale["X-Cache"], "MISS")
+        self.assertEqual([(row["id"], row["is_latest"]) for row in stale.json()["data"]], [(first.id, False)])
+
+    def test_editing_an_asset_task_invalidates_the_shots_of_its_publishes(self):
+        asset = Asset.objects.create(project=self.project, name="Pinch", code="PINCH")
+        task = Task.objects.create(asset=asset, task_type="fx", task_name="fx")
+        with self.captureOnCommitCallbacks(execute=True):
+            Publish.objects.create(
+                project=self.project, target_content_type=self.content_type, target_object_id=self.project.id,
+                task=task, shot_code="0500",
+            )
+        self._get(shot="0500", include="task")
+        with self.captureOnCommitCallbacks(execute=True):
+            task.task_name = "fx_sim"
+            task.save()
+        fresh, _ = self._get(shot="0500", include="task")
+        self.assertEqual(fresh["X-Cache"], "MISS")
+        self.assertEqual(fresh.json()["data"][0]["task"]["task_name"], "fx_sim")
+
+class ChangeFeedTest(TransactionTestCase):
+    def setUp(self):
+        self.project = Project.objects.create(name="Feed", code="FEED")
+        self.content_type = ContentType.objects.get_for_model(Project)
+
+    def _changes(self, since, **params):
+        response = self.client.get("/api/changes/", {"since": since, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def _publish(self):
+        return Publish.objects.create(project=self.project, target_content_type=self.content_type, target_object_id=self.project.id)
+
+    def test_follows_writes_in_commit_order(self):
+        head = self.client.get("/api/changes/").json()["next_since"]
+        publish = self._publish()
+        sequence = Sequence.objects.create(project=self.project, code="SQ01")
+        shot = Shot.objects.create(project=self.project, sequence=sequence, code="0100")
+        shot.save()
+        body = self._changes(head, project_id=self.project.id)
+        self.assertEqual(
+            [(row["entity"], row["id"], row["action"]) for row in body["data"]],
+            [("publish", publish.id, "created"), ("shot", shot.id, "created"), ("shot", shot.id, "updated")],
+        )
+        self.assertEqual(self._changes(body["next_since"])["data"], [])
+        self.assertEqual(self._changes(head, project_id=self.project.id + 1)["data"], [])
+
+        # An event whose transaction is still open holds back every later one, even if its id is lower.
+        db = connection.settings_dict
+        other = psycopg2.connect(dbname=db["NAME"], user=db["USER"], password=db["PASSWORD"], host=db["HOST"], port=db["PORT"])
+        self.addCleanup(other.close)
+        with other.cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO core_changeevent (entity, entity_id, project_id, action, created_at) "
+                "VALUES ('asset', 1, %s, 'created', now())",
+                [self.project.id],
+            )
+        late = self._publish()
+        self.assertEqual(self._changes(body["next_since"])["data"], [])
+        other.commit()
+        self.assertEqual(
+            [(row["entity"], row["id"]) for row in self._changes(body["next_since"])["data"]],
+            [("asset", 1), ("publish", late.id)],
+        )
+
+    def test_purged_position_is_gone(self):
+        self._publish()
+        since = ChangeEvent.objects.latest("id").id
+        ChangeEvent.objects.update(created_at=timezone.now() - timezone.timedelta(days=30))
+        call_command("purge_change_events", stdout=StringIO())
+        self.assertEqual(self.client.get("/api/changes/", {"since": since}).status_code, 410)
+
+
+@override_settings(SSE_KEEPALIVE_SECONDS=0.1)
+class PublishEventStreamTest(TransactionTestCase):
+    def setUp(self):
+        project = Project.objects.create(name="Push", code="PUSH")
+        sequence = Sequence.objects.create(project=project, name="sq010", code="sq010")
+        shot = Shot.objects.create(project=project, sequence=sequence, name="sh010", code="sh010")
+        self.task = Task.objects.create(shot=shot, sequence=sequence, task_type="fx", task_name="fx")
+        self.project = project
+
+    def _item(self, shot, part):
+        root = f"/show/sequences/sq010/{shot}/fx/houdini/scenes/bob/fx/usd/Pinch"
+        return {"item_usd_path": f"{root}/{part}/{part}_v001.usd", "asset_usd_path": f"{root}/{part}/{part}.usd"}
+
+    def _next_event(self, chunks):
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            chunk = next(chunks).decode()
+            if chunk.startswith("id: "):
+                return json.loads(chunk.split("data: ", 1)[1])
+        self.fail("no publish event received")
+
+    def test_streams_committed_publishes_matching_the_filter(self):
+        response = self.client.get("/api/publishes/events/", {"project_id": self.project.id, "shot": "SH020", "dept": "fx"})
+        self.addCleanup(publish_events.listener.join, 5)
+        self.addCleanup(response.close)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        chunks = iter(response.streaming_content)
+        self.assertEqual(next(chunks), b"retry: 3000\n\n")
+
+        base = {"task_id": self.task.id, "software": "houdini"}
+        self.client.post("/api/publishes/", json.dumps({**base, **self._item("sh010", "fire01")}), content_type="application/json")
+        batch = {**base, "publishes": [self._item("sh010", "smoke01"), self._item("sh020", "debris01")]}
+        self.assertEqual(self.client.post("/api/publishes/batch/", json.dumps(batch), content_type="application/json").status_code, 201)
+        single = self.client.post("/api/publishes/", json.dumps({**base, **self._item("sh020", "dust01")}), content_type="application/json")
+
+        first, second = self._next_event(chunks), self._next_event(chunks)
+        self.assertEqual((first["shot"], first["part"]), ("sh020", "debris01"))
+        self.assertEqual((second["publish_id"], second["part"]), (single.json()["data"]["publish_id"], "dust01"))
+        self.assertEqual(second["project_id"], self.project.id)
+
+
+class BatchApiTest(TestCase):
+    def _batch(self, requests, atomic=False):
+        body = {"requests": requests, "atomic": atomic}
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post("/api/batch/", json.dumps(body), content_type="application/json")
+
+    def test_runs_sub_requests_in_order_with_references(self):
+        response = self._batch(
+            [
+                {"method": "POST", "path": "/api/projects/", "params": {"name": "Batch", "code": "BATCH"}},
+                {"method": "POST", "path": "/api/assets/", "params": {"project_id": "$0.body.data.id", "name": "Pinch"}},
+                {"path": "/api/assets/", "params": {"project_id": "$0.body.data.id", "fields": "name"}},
+                {"path": "/api/nowhere/"},
+            ]
+        )
+        self.assertEqual(response.status_code, 200)
+        results = response.json()["data"]
+        self.assertEqual([result["status"] for result in results], [200, 200, 200, 404])
+        project = Project.objects.get(code="BATCH")
+        self.assertEqual(results[1]["body"]["data"]["project_id"], project.id)
+        self.assertEqual(results[2]["body"]["data"], [{"name": "Pinch"}])
+
+    def test_atomic_batch_rolls_back_on_failure(self):
+        response = self._batch(
+            [
+                {"method": "POST", "path": "/api/projects/", "params": {"name": "Gone", "code": "GONE"}},
+                {"method": "POST", "path": "/api/assets/", "params": {"project_id": "$0.body.data.id"}},
+                {"method": "POST", "path": "/api/projects/", "params": {"name": "Never", "code": "NEVER"}},
+            ],
+            atomic=True,
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([result["status"] for result in response.json()["data"]], [200, 400])
+        self.assertFalse(Project.objects.exists())
+        self.assertFalse(Asset.objects.exists())
+
+    def test_streaming_sub_requests_are_refused_before_running(self):
+        with mock.patch.object(publish_events.listener, "subscribe") as subscribe:
+            response = self._batch([{"path": "/api/publishes/events/"}, {"path": "/api/publishes/", "params": {"stream": "1"}}])
+        self.assertEqual([result["status"] for result in response.json()["data"]], [400, 400])
+        subscribe.assert_not_called()
+
+    def test_a_raising_sub_request_is_reported_in_its_own_result(self):
+        requests = [
+            {"method": "POST", "path": "/api/projects/", "params": {"name": "Kept", "code": "KEPT"}},
+            {"path": "/api/cache/stats/"},
+            {"path": "/api/projects/", "params": {"fields": "code"}},
+        ]
+        with mock.patch("core.api_cache.stats", side_effect=RuntimeError("boom")), self.assertLogs("core.views.api_views", "ERROR"):
+            response = self._batch(requests)
+            atomic = self._batch([{**requests[0], "params": {"name": "Gone", "code": "GONE"}}, requests[1]], atomic=True)
+        self.assertEqual(response.status_code, 200)
+        results = response.json()["data"]
+        self.assertEqual([result["status"] for result in results], [200, 500, 200])
+        self.assertIn("boom", results[1]["body"]["error"])
+        self.assertEqual(results[2]["body"]["data"], [{"code": "KEPT"}])
+        self.assertEqual([result["status"] for result in atomic.json()["data"]], [200, 500])
+        self.assertEqual(list(Project.objects.values_list("code", flat=True)), ["KEPT"])
+
+class SceneFileTableTest(TransactionTestCase):
+    # The scene views commit on the raw connection, which would leak rows out of a TestCase.
+    def test_scene_endpoints_use_the_migrated_table(self):
+        project = Project.objects.create(name="Scene", code="SCENE")
+        sequence = Sequence.objects.create(project=project, name="sq010", code="sq010")
+        shot = Shot.objects.create(project=project, sequence=sequence, name="sh010", code="sh010")
+        task = Task.objects.create(shot=shot, sequence=sequence, task_type="fx", task_name="fx")
+        artist = Artist.objects.create(username="scene_artist")
+
+        numbers = self.client.post("/api/scenes/next/", {"task_id": task.id, "software": "houdini"}).json()["data"]
+        body = {"task_id": task.id, "artist_id": artist.id, "software": "houdini", "file_path": "/shots/a.hip"}
+        recorded = self.client.post("/api/scenes/record/", {**body, "version": numbers["version"], "iteration": numbers["iteration"]})
+        scene = SceneFile.objects.get(id=recorded.json()["data"]["id"])
+        self.assertEqual((scene.task_id, scene.version, scene.iteration), (task.id, 1, 1))
+        self.assertIsNotNone(scene.created_at.tzinfo)
+
+        # An explicitly numbered save moves the stream head, so the preview is a head-row read.
+        self.client.post("/api/scenes/record/", {**body, "file_path": "/shots/b.hip", "version": 3, "iteration": 4})
+        preview = self.client.get("/api/scenes/next/", {"task_id": task.id, "software": "houdini"}).json()["data"]
+        self.assertEqual((preview["version"], preview["iteration"]), (3, 5))
+
+
+class SceneReserveConfirmTest(TransactionTestCase):
+    def setUp(self):
+        project = Project.objects.create(name="Reserve", code="RSRV")
+        sequence = Sequence.objects.create(project=project, name="sq010", code="sq010")
+        shot = Shot.objects.create(project=project, sequence=sequence, name="sh010", code="sh010")
+        self.task = Task.objects.create(shot=shot, sequence=sequence, task_type="fx", task_name="fx")
+        self.artist = Artist.objects.create(username="reserve_artist")
+
+    def _reserve(self, **extra):
+        body = {
+            "task_id": self.task.id,
+            "artist_id": self.artist.id,
+            "software": "houdini",
+            "scene_dir": "D:\\show\\sh010\\fx",
+            "artist": "jane doe",
+            "department": "fx",
+            "task": "pyro",
+            **extra,
+        }
+        response = self.client.post("/api/scenes/reserve/", body)
+        self.assertEqual(response.status_code, 201, response.content)
+        return response.json()["data"]
+
+    def test_reserve_returns_path_and_confirm_publishes_the_scene(self):
+        first = self._reserve()
+        self.assertEqual((first["version"], first["iteration"], first["status"]), (1, 1, "pending"))
+        self.assertEqual(first["file_path"], "D:\\show\\sh010\\fx\\jane_doe_fx_pyro_v001_i001.hip")
+        self.assertTrue(self._reserve(bump="version")["file_path"].endswith("\\jane_doe_fx_pyro_v002_i001.hip"))
+
+        listed = lambda: self.client.get("/api/scenes/", {"task_id": self.task.id, "software": "houdini"}).json()["data"]
+        self.assertEqual(listed(), [])
+        confirmed = self.client.post("/api/scenes/confirm/", {"id": first["id"]}).json()["data"]
+        self.assertEqual(confirmed["previous_status"], "pending")
+        self.assertEqual(self.client.post("/api/scenes/confirm/", {"id": first["id"]}).json()["data"]["previous_status"], "saved")
+        self.assertEqual([row["id"] for row in listed()], [first["id"]])
+        self.assertEqual(ChangeEvent.objects.filter(entity="scene", entity_id=first["id"]).count(), 1)
+        self.assertEqual(self.client.post("/api/scenes/confirm/", {"id": 999999}).status_code, 404)
+
+
+class PipelineConnectionPoolTest(TransactionTestCase):
+    def setUp(self):
+        from pipeline_scripts import db
+
+        self.db = db
+        settings_dict = connections["default"].settings_dict
+        env = {
+            "DB_NAME": settings_dict["NAME"],
+            "DB_USER": settings_dict["USER"],
+            # Required by get_db_params_from_env; ignored by trust auth.
+            "DB_PASSWORD": settings_dict["PASSWORD"] or "unused",
+            "DB_HOST": settings_dict["HOST"],
+            "DB_PORT": str(settings_dict["PORT"] or 5432),
+            "PIPELINE_DB_POOL_MAX": "1",
+            "PIPELINE_DB_POOL_WAIT_TIMEOUT": "0.2",
+            "PIPELINE_DB_POOL_CHECK_AFTER": "0",
+        }
+        patcher = mock.patch.dict(os.environ, env)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(db.close_pool)
+        db.close_pool()
+
+    def _backend_pid(self):
+        with self.db.connection_from_env() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT pg_backend_pid()")
+                return cur.fetchone()[0]
+
+    def test_connections_are_reused_checked_and_reaped(self):
+        first = self._backend_pid()
+        self.assertEqual(self._backend_pid(), first)
+        self.assertEqual(self.db.pool_stats()["connects"], 1)
+
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_terminate_backend(%s)", [first])
+        self.assertNotEqual(self._backend_pid(), first)
+        self.assertEqual(self.db.pool_stats()["discarded"], 1)
+
+        pool = self.db.get_pool()
+        pool.idle_timeout = 0
+        self.assertEqual(pool.reap_idle(), 1)
+        self.assertEqual((self.db.pool_stats()["open"], self.db.pool_stats()["reaped"]), (0, 1))
+
+    def test_checkout_waits_for_a_free_connection(self):
+        with self.db.connection_from_env():
+            with self.assertRaises(psycopg2.pool.PoolError):
+                with self.db.connection_from_env():
+                    pass
+        with self.db.connection_from_env() as conn:
+            self.assertFalse(conn.closed)
+        stats = self.db.pool_stats()
+        self.assertEqual((stats["checkouts"], stats["in_use"], stats["idle"]), (2, 0, 1))
+
+
+class ApiClientSessionTest(LiveServerTestCase):
+    def setUp(self):
+        from pipeline_scripts import api_client
+
+        self.api_client = api_client
+        patcher = mock.patch.dict(os.environ, {"PIPELINE_API_BASE": self.live_server_url})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(api_client.close_session)
+        sleep = mock.patch.object(api_client.time, "sleep")
+        sleep.start()
+        self.addCleanup(sleep.stop)
+
+    def test_error_response_is_returned_once_without_fallback(self):
+        session = self.api_client.get_session()
+        with mock.patch.object(session, "post", wraps=session.post) as post:
+            resp = self.api_client.api_post("/api/publishes/", {"software": "houdini"})
+        self.assertFalse(resp["ok"])
+        self.assertEqual(post.call_count, 1)
+        self.assertIs(self.api_client.get_session(), session)
+
+    def test_only_idempotent_calls_are_retried(self):
+        session = self.api_client.get_session()
+        with mock.patch.dict(os.environ, {"PIPELINE_API_BASE": "http://127.0.0.1:9"}):
+            with mock.patch.object(session, "get", wraps=session.get) as get:
+                with self.assertRaises(self.api_client.ApiError):
+                    self.api_client.api_get("/api/projects/")
+            with mock.patch.object(session, "post", wraps=session.post) as post:
+                with self.assertRaises(self.api_client.ApiError):
+                    self.api_client.api_post("/api/projects/", {"name": "x"})
+        self.assertEqual(get.call_count, self.api_client.MAX_RETRIES + 1)
+        self.assertEqual(post.call_count, 1)
+
+    def test_keyed_post_waits_out_an_in_progress_first_attempt(self):
+        project = Project.objects.create(name="Wait", code="WAIT")
+        sequence = Sequence.objects.create(project=project, name="sq010", code="sq010")
+        shot = Shot.objects.create(project=project, sequence=sequence, name="sh010", code="sh010")
+        task = Task.objects.create(shot=shot, sequence=sequence, task_type="fx", task_name="fx")
+        db = connection.settings_dict
+        holder = psycopg2.connect(dbname=db["NAME"], user=db["USER"], password=db["PASSWORD"], host=db["HOST"], port=db["PORT"])
+        self.addCleanup(holder.close)
+        with holder.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_lock(%s)", [idempotency._lock_id("api_publishes", "slow-1")])
+
+        # The first attempt finishes (its connection goes away) while the client waits out the 409.
+        self.api_client.time.sleep.side_effect = lambda seconds: holder.close()
+        resp = self.api_client.api_post(
+            "/api/publishes/", {"task_id": task.id, "software": "houdini"}, headers={"Idempotency-Key": "slow-1"}
+        )
+        self.assertTrue(resp["ok"], resp)
+        self.api_client.time.sleep.assert_called_once_with(1.0)
+        self.assertEqual(Publish.objects.count(), 1)
+
+class SceneApiModeTest(LiveServerTestCase):
+    # PIPELINE_API_BASE is set for the server process too, as in .env.example; the scene views must
+    # still write to the database instead of calling the API again.
+    def setUp(self):
+        from pipeline_scripts import api_client, versioning
+
+        self.versioning = versioning
+        patcher = mock.patch.dict(os.environ, {"PIPELINE_API_BASE": self.live_server_url})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(api_client.close_session)
+        project = Project.objects.create(name="ApiScene", code="APISC")
+        sequence = Sequence.objects.create(project=project, name="sq010", code="sq010")
+        shot = Shot.objects.create(project=project, sequence=sequence, name="sh010", code="sh010")
+        self.task = Task.objects.create(shot=shot, sequence=sequence, task_type="fx", task_name="fx")
+        self.artist = Artist.objects.create(username="api_scene_artist")
+
+    def test_scene_calls_use_the_scene_endpoints(self):
+        version, iteration = self.versioning.next_numbers(None, self.task.id, "houdini")
+        self.assertEqual((version, iteration), (1, 1))
+        scene_id, created = self.versioning.record_scene(
+            None, self.task.id, self.artist.id, "houdini", "/shots/a_v001_i001.hip", version, iteration
+        )
+        self.assertTrue(created)
+        self.assertEqual(self.versioning.next_numbers(None, self.task.id, "houdini", reserve=False), (1, 2))
+        rows = self.versioning.fetch_scenes(None, self.task.id, "houdini")
+        self.assertEqual([row["id"] for row in rows], [scene_id])
+        self.assertFalse(Publish.objects.exists())
+
+    def test_dcc_save_confirms_before_reporting_success(self):
+        from pipeline_scripts import dcc_saver
+
+        context = dcc_saver.PipelineContext(
+            task_id=self.task.id, artist_id=self.artist.id, software="houdini", artist_name="api_scene_artist", task_name="fx"
+        )
+        with tempfile.TemporaryDirectory() as scene_dir, mock.patch.object(dcc_saver, "_perform_save"):
+            context["scene_dir"] = scene_dir
+            file_path, version, iteration = dcc_saver._reserve_save_confirm(None, context, "version")
+            self.assertEqual([row["file_path"] for row in self.versioning.fetch_scenes(None, self.task.id, "houdini")], [str(file_path)])
+
+            with mock.patch.object(self.versioning, "confirm_scene", side_effect=RuntimeError("server gone")):
+                with self.assertRaisesRegex(RuntimeError, "was saved but could not be recorded"):
+                    dcc_saver._reserve_save_confirm(None, context, "version")
+        self.assertEqual(list(SceneFile.objects.order_by("id").values_list("status", flat=True)), ["saved", "pending"])
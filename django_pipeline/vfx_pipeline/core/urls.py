@@ -59,6 +59,14 @@ urlpatterns = [
     path('api/scenes/', api_views.api_scenes, name='api_scenes'),
     path('api/scenes/next/', api_views.api_scenes_next, name='api_scenes_next'),
     path('api/scenes/record/', api_views.api_scenes_record, name='api_scenes_record'),
+    path('api/scenes/reserve/', api_views.api_scenes_reserve, name='api_scenes_reserve'),
+    path('api/scenes/confirm/', api_views.api_scenes_confirm, name='api_scenes_confirm'),
     path('api/publishes/', api_views.api_publishes, name='api_publishes'),
     path('api/publishes/next/', api_views.api_publishes_next, name='api_publishes_next'),
+    path('api/publishes/batch/', api_views.api_publishes_batch, name='api_publishes_batch'),
+    path('api/publishes/events/', api_views.api_publish_events, name='api_publish_events'),
+    path('api/layer-jobs/', api_views.api_layer_jobs, name='api_layer_jobs'),
+    path('api/cache/stats/', api_views.api_cache_stats, name='api_cache_stats'),
+    path('api/changes/', api_views.api_changes, name='api_changes'),
+    path('api/batch/', api_views.api_batch, name='api_batch'),
 ]
@@ -0,0 +1,385 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+from django.db import transaction
+from django.utils import timezone
+
+from core.layer_graph import LayerGraph, LayerRebuildReport
+from core.models import AssetPart, Publish
+
+
+def path_to_posix(value: str) -> str:
+    return str(value or "").replace("\\", "/")
+
+
+def _sver(value: Optional[int]) -> int:
+    return int(value or 0)
+
+
+def extract_usd_context(path_value: str) -> Optional[Dict[str, str]]:
+    path = path_to_posix(path_value).strip()
+    if not path:
+        return None
+    parts = [p for p in path.split("/") if p]
+    if "sequences" not in parts or "usd" not in parts:
+        return None
+    seq_idx = parts.index("sequences")
+    try:
+        seq = parts[seq_idx + 1]
+        shot = parts[seq_idx + 2]
+        dept = parts[seq_idx + 3]
+    except IndexError:
+        return None
+
+    artist = ""
+    task = ""
+    try:
+        houdini_idx = parts.index("houdini", seq_idx + 4)
+        if parts[houdini_idx + 1] == "scenes":
+            artist = parts[houdini_idx + 2]
+            task = parts[houdini_idx + 3]
+    except Exception:
+        pass
+
+    usd_idx = parts.index("usd", seq_idx + 4)
+    asset = parts[usd_idx + 1] if len(parts) > usd_idx + 1 else ""
+    part = parts[usd_idx + 2] if len(parts) > usd_idx + 2 else ""
+
+    prefix = "/".join(parts[:seq_idx])
+    shared_root = "/".join(parts[: seq_idx + 4]) + "/usd"
+    asset_layer_path = "/".join(parts[: usd_idx + 2]) + f"/{asset}.usd" if asset else ""
+    return {
+        "prefix": prefix,
+        "seq": seq,
+        "shot": shot,
+        "dept": dept,
+        "artist": artist,
+        "task": task,
+        "asset": asset,
+        "part": part,
+        "shared_root": shared_root,
+        "asset_layer_path": asset_layer_path,
+    }
+
+
+def derive_asset_part_and_stable_path(
+    asset_usd_path: str,
+    item_usd_path: str,
+    metadata: Optional[Dict[str, Any]] = None,
+    asset_name_hint: Optional[str] = None,
+    part_name_hint: Optional[str] = None,
+) -> tuple[str, str, str]:
+    meta = metadata or {}
+    path = path_to_posix(asset_usd_path or item_usd_path or "")
+    parts = [p for p in path.split("/") if p]
+
+    asset_name = str(
+        asset_name_hint
+        or meta.get("asset_name")
+        or meta.get("asset")
+        or ""
+    ).strip()
+    part_name = str(
+        part_name_hint
+        or meta.get("part_name")
+        or meta.get("fx_layer")
+        or ""
+    ).strip()
+
+    if "usd" in parts:
+        usd_idx = parts.index("usd")
+        if not asset_name and len(parts) > usd_idx + 1:
+            asset_name = parts[usd_idx + 1]
+        if not part_name and len(parts) > usd_idx + 2:
+            part_name = parts[usd_idx + 2]
+
+    if not part_name and path:
+        part_name = Path(path).stem
+    if not asset_name:
+        asset_name = "unknown_asset"
+    if not part_name:
+        part_name = "unknown_part"
+
+    if asset_usd_path:
+        parent = Path(path_to_posix(asset_usd_path)).parent
+    elif item_usd_path:
+        item_parent = Path(path_to_posix(item_usd_path)).parent
+        if item_parent.name.lower() == "data":
+            parent = item_parent.parent
+        else:
+            parent = item_parent
+    else:
+        parent = Path(".")
+    stable_path = path_to_posix(str(parent / f"{part_name}.usd"))
+
+    return asset_name, part_name, stable_path
+
+
+def publish_context_fields(stable_path: str, asset_name: str, part_name: str) -> Dict[str, str]:
+    """Column values for Publish.seq_code/shot_code/dept/artist_name/asset_name/part_name."""
+    context = extract_usd_context(stable_path) or {}
+    return {
+        "seq_code": context.get("seq", ""),
+        "shot_code": context.get("shot", ""),
+        "dept": context.get("dept", ""),
+        "artist_name": context.get("artist", ""),
+        "asset_name": asset_name,
+        "part_name": part_name,
+    }
+
+
+# layer path -> (mtime_ns, size, sha256) of the content last written or verified, so unchanged layers
+# can be skipped from a stat() alone instead of re-reading them from the NAS.
+_LAYER_MANIFEST: Dict[str, tuple[int, int, str]] = {}
+
+
+def render_usda_sublayers(layer_path: str, sublayers: list[str]) -> str:
+    target = Path(layer_path)
+    unique = []
+    seen = set()
+    for candidate in sublayers:
+        normalized = path_to_posix(candidate).strip()
+        if not normalized or normalized in seen:
+            continue
+        seen.add(normalized)
+        unique.append(normalized)
+
+    rel_paths = []
+    for sub in unique:
+        rel = os.path.relpath(sub, str(target.parent)).replace("\\", "/")
+        if not rel.startswith("."):
+            rel = f"./{rel}"
+        rel_paths.append(rel)
+
+    lines = [
+        "#usda 1.0",
+        "(",
+        "    subLayers = [",
+    ]
+    for idx, rel in enumerate(rel_paths):
+        comma = "," if idx < len(rel_paths) - 1 else ""
+        lines.append(f'        @"{rel}"@{comma}')
+    lines.extend(
+        [
+            "    ]",
+            ")",
+            "",
+        ]
+    )
+    return "\n".join(lines)
+
+
+def _layer_unchanged(target: Path, digest: str) -> bool:
+    try:
+        stat = target.stat()
+    except FileNotFoundError:
+        return False
+    key = str(target)
+    cached = _LAYER_MANIFEST.get(key)
+    if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        return cached[2] == digest
+    try:
+        current = hashlib.sha256(target.read_bytes()).hexdigest()
+    except OSError:
+        return False
+    _LAYER_MANIFEST[key] = (stat.st_mtime_ns, stat.st_size, current)
+    return current == digest
+
+
+def usda_sublayers_current(layer_path: str, sublayers: list[str]) -> bool:
+    """True when the layer on disk already has exactly the content write_usda_sublayers would write."""
+    data = render_usda_sublayers(layer_path, sublayers).encode("utf-8")
+    return _layer_unchanged(Path(layer_path), hashlib.sha256(data).hexdigest())
+
+
+def write_usda_sublayers(layer_path: str, sublayers: list[str]) -> bool:
+    """Write the layer unless its content is unchanged; returns True when the file was written.
+
+    Changes go to a temp file in the same directory and are renamed over the layer, so readers
+    see either the old or the new layer, never a partial one.
+    """
+    target = Path(layer_path)
+    data = render_usda_sublayers(layer_path, sublayers).encode("utf-8")
+    digest = hashlib.sha256(data).hexdigest()
+    if _layer_unchanged(target, digest):
+        return False
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = target.with_name(f".{target.name}.{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp")
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(data)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(tmp_path, target)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    stat = target.stat()
+    _LAYER_MANIFEST[str(target)] = (stat.st_mtime_ns, stat.st_size, digest)
+    return True
+
+
+_ASSET_PART_KEY = ("project_id", "seq_code", "shot_code", "dept", "artist_name", "asset_name", "part_name")
+_ASSET_PART_POINTER = ("part_usd_path", "asset_layer_path", "shared_root", "latest_publish", "source_version", "source_iteration", "updated_at")
+
+
+def _asset_part_rank(source_version: Optional[int], source_iteration: Optional[int], publish_id: Optional[int]) -> tuple[int, int, int]:
+    return _sver(source_version), _sver(source_iteration), int(publish_id or 0)
+
+
+def register_asset_parts(publishes: list[Publish]) -> list[AssetPart]:
+    """Point each publish's AssetPart row at it unless a newer publish of the part is already registered.
+
+    Costs one insert, one locking select and at most one bulk update regardless of how many parts are given.
+    """
+    candidates: Dict[tuple, Publish] = {}
+    for publish in publishes:
+        if not (publish.item_usd_path and publish.asset_usd_path and publish.part_name):
+            continue
+        key = tuple(getattr(publish, field) for field in _ASSET_PART_KEY)
+        prev = candidates.get(key)
+        if not prev or _asset_part_rank(publish.source_version, publish.source_iteration, publish.id) > _asset_part_rank(
+            prev.source_version, prev.source_iteration, prev.id
+        ):
+            candidates[key] = publish
+    if not candidates:
+        return []
+
+    now = timezone.now()
+    rows = []
+    for key, publish in candidates.items():
+        context = extract_usd_context(publish.asset_usd_path) or {}
+        rows.append(
+            AssetPart(
+                **dict(zip(_ASSET_PART_KEY, key)),
+                part_usd_path=publish.asset_usd_path,
+                asset_layer_path=context.get("asset_layer_path", ""),
+                shared_root=context.get("shared_root", ""),
+                latest_publish=publish,
+                source_version=_sver(publish.source_version),
+                source_iteration=_sver(publish.source_iteration),
+                updated_at=now,
+            )
+        )
+
+    with transaction.atomic():
+        # New parts land here; existing ones are skipped and compared under lock below.
+        AssetPart.objects.bulk_create(rows, ignore_conflicts=True)
+        wanted = {tuple(getattr(row, field) for field in _ASSET_PART_KEY): row for row in rows}
+        locked = AssetPart.objects.select_for_update().filter(
+            project_id__in={row.project_id for row in rows},
+            asset_name__in={row.asset_name for row in rows},
+            part_name__in={row.part_name for row in rows},
+        )
+        registered = []
+        stale = []
+        for part in locked:
+            row = wanted.get(tuple(getattr(part, field) for field in _ASSET_PART_KEY))
+            if row is None:
+                continue
+            registered.append(part)
+            if part.latest_publish_id == row.latest_publish_id:
+                continue
+            current = _asset_part_rank(part.source_version, part.source_iteration, part.latest_publish_id)
+            if _asset_part_rank(row.source_version, row.source_iteration, row.latest_publish_id) < current:
+                continue
+            for field in _ASSET_PART_POINTER:
+                setattr(part, field, getattr(row, field))
+            stale.append(part)
+        if stale:
+            AssetPart.objects.bulk_update(stale, list(_ASSET_PART_POINTER))
+    return registered
+
+
+def register_asset_part(publish: Publish) -> Optional[AssetPart]:
+    registered = register_asset_parts([publish])
+    return registered[0] if registered else None
+
+
+# Row shape build_shared_layer_graph expects from AssetPart.values_list().
+SHARED_LAYER_PART_FIELDS = ("artist_name", "asset_name", "part_usd_path", "asset_layer_path", "source_version", "source_iteration", "latest_publish_id")
+
+
+def build_shared_layer_graph(
+    parts: Iterable[tuple[str, str, str, str, int, int, int]],
+    seq: str,
+    shot: str,
+    dept: str,
+    shared_root: str,
+) -> LayerGraph:
+    """Layer stack (asset -> artist -> dept -> shot -> seq) of one shot/dept from its AssetPart rows.
+
+    `parts` rows are AssetPart values in SHARED_LAYER_PART_FIELDS order.
+    """
+    graph = LayerGraph()
+
+    # 1) Asset layers from latest part stable paths (DB authoritative).
+    asset_parts: Dict[tuple[str, str], list[str]] = {}
+    asset_layers: Dict[tuple[str, str], tuple[tuple[int, int, int], str]] = {}
+    for artist, asset, part_path, asset_layer_path, version, iteration, publish_id in parts:
+        asset_parts.setdefault((artist, asset), []).append(part_path)
+        if not asset_layer_path:
+            continue
+        rank = (version, iteration, publish_id)
+        prev = asset_layers.get((artist, asset))
+        if not prev or rank > prev[0]:
+            asset_layers[(artist, asset)] = (rank, asset_layer_path)
+    for key, (_, asset_layer_path) in asset_layers.items():
+        graph.add_layer(asset_layer_path, sorted(asset_parts[key]))
+
+    # 2) Artist layers from their asset layers.
+    artist_sublayers: Dict[str, list[str]] = {}
+    for (artist, _asset), (_, asset_layer_path) in sorted(asset_layers.items()):
+        artist_sublayers.setdefault(artist, []).append(asset_layer_path)
+    for artist, sublayers in artist_sublayers.items():
+        graph.add_layer(f"{shared_root}/artist/{artist}.usd", sublayers)
+
+    # 3) Dept layer from artist layers.
+    dept_layer_path = f"{shared_root}/dept/{dept}.usd"
+    dept_sublayers = [f"{shared_root}/artist/{name}.usd" for name in sorted(artist_sublayers.keys())]
+    if dept_sublayers:
+        graph.add_layer(dept_layer_path, dept_sublayers)
+
+    # 4) Shot and seq layers in shared root.
+    shot_layer_path = f"{shared_root}/shot/{shot}.usd"
+    graph.add_layer(shot_layer_path, [dept_layer_path])
+    graph.add_layer(f"{shared_root}/seq/{seq}.usd", [shot_layer_path])
+    return graph
+
+
+def rebuild_shared_usd_layers(
+    project_id: int,
+    seq: str,
+    shot: str,
+    dept: str,
+    shared_root: str,
+    dirty_paths: Optional[list[str]] = None,
+) -> LayerRebuildReport:
+    """Bring the shared layers of one shot/dept scope up to date.
+
+    With `dirty_paths` (changed part files) only layers above them are checked, and propagation stops at
+    the first layer whose content did not change; without it every layer of the scope is checked.
+    """
+    if not all([seq, shot, dept, shared_root]):
+        return LayerRebuildReport(warning="Skipped shared layer rebuild: missing one or more context fields (seq/shot/dept).")
+
+    parts = list(
+        AssetPart.objects.filter(project_id=project_id, seq_code=seq, shot_code=shot, dept=dept)
+        .exclude(artist_name="")
+        .values_list(*SHARED_LAYER_PART_FIELDS)
+    )
+    if not parts:
+        return LayerRebuildReport(warning="Skipped shared layer rebuild: no published parts found for this shot/dept.")
+
+    graph = build_shared_layer_graph(parts, seq, shot, dept, shared_root)
+    return graph.propagate(dirty_paths or graph.layers(), write_usda_sublayers)
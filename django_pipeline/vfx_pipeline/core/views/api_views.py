@@ -1,14 +1,22 @@
 from __future__ import annotations
 
+import base64
+import hashlib
 import json
+import logging
 import os
+import re
 from pathlib import Path
 from decimal import Decimal
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, Optional
 
+from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
-from django.db import connection, models
-from django.http import JsonResponse, HttpRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, models, transaction
+from django.db.models.functions import Lower
+from django.http import HttpRequest, HttpResponse, HttpResponseNotModified, JsonResponse, QueryDict, StreamingHttpResponse
+from django.urls import Resolver404, resolve
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.dateparse import parse_date
 from django.utils import timezone
@@ -27,11 +35,29 @@ from core.models import (
     Publish,
     PublishComponent,
     VersionLink,
+    AssetPart,
+    LayerRebuildJob,
+)
+from core import api_cache, change_events, publish_events
+from core.idempotency import idempotent
+from core.layer_jobs import claim_job, enqueue_layer_rebuild, run_job, serialize_job
+from core.stream_heads import allocate_publish_numbers, mark_latest_publishes, peek_publish_numbers, with_is_latest
+from core.usd_layers import (
+    derive_asset_part_and_stable_path,
+    extract_usd_context,
+    publish_context_fields,
+    register_asset_part,
+    register_asset_parts,
 )
 
+logger = logging.getLogger(__name__)
 
-def _ok(data: Any = None, status: int = 200):
-    return JsonResponse({"ok": True, "data": data}, status=status, safe=False)
+
+def _ok(data: Any = None, status: int = 200, extra: Optional[Dict[str, Any]] = None):
+    payload: Dict[str, Any] = {"ok": True, "data": data}
+    if extra:
+        payload.update(extra)
+    return JsonResponse(payload, status=status, safe=False)
 
 
 def _err(message: str, *, status: int = 400, extra: Optional[Dict[str, Any]] = None):
@@ -97,6 +123,253 @@ def _normalize_file_path(value: Any) -> str:
     return Path(normalized).as_posix()
 
 
+def _encode_cursor(values: list[Any]) -> str:
+    # isoformat() keeps full microsecond precision, which the keyset comparison needs.
+    plain = [value.isoformat() if hasattr(value, "isoformat") else str(value) if isinstance(value, Decimal) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(plain).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str, size: int) -> list[Any]:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor") from None
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def _keyset_after(
+    qs: models.QuerySet,
+    params: Dict[str, Any],
+    ordering: tuple[str, ...],
+    cursor_fields: tuple[str, ...],
+) -> models.QuerySet:
+    """`qs` in `ordering`, starting after the row encoded in the `cursor` param (if any)."""
+    qs = qs.order_by(*ordering)
+    cursor = (params.get("cursor") or "").strip()
+    if not cursor:
+        return qs
+    values = _decode_cursor(cursor, len(cursor_fields))
+    after = models.Q()
+    for index, field in enumerate(cursor_fields):
+        clause = models.Q(**{f"{field.lstrip('-')}__{'lt' if field.startswith('-') else 'gt'}": values[index]})
+        for previous, value in zip(cursor_fields[:index], values):
+            clause &= models.Q(**{previous.lstrip("-"): value})
+        after |= clause
+    return qs.filter(after)
+
+
+def _keyset_page(
+    qs: models.QuerySet,
+    params: Dict[str, Any],
+    ordering: tuple[str, ...],
+    cursor_fields: Optional[tuple[str, ...]] = None,
+) -> tuple[list[Any], Optional[str]]:
+    """One page of `qs` in `ordering` (must end in a unique key) plus the cursor of the next page, if any.
+
+    Paging only starts once the client sends `limit` or `cursor`; without either every row is returned,
+    so callers that predate paging and ignore `next_cursor` still see the whole list.
+    `cursor_fields` overrides the fields the cursor compares on, e.g. the DISTINCT ON key of a grouped query.
+    Raises ValueError for a malformed cursor.
+    """
+    cursor_fields = cursor_fields or ordering
+    if params.get("limit") in (None, "") and params.get("cursor") in (None, ""):
+        return list(qs.order_by(*ordering)), None
+    limit = min(max(_parse_int(params.get("limit"), settings.API_PAGE_SIZE) or 1, 1), settings.API_MAX_PAGE_SIZE)
+    rows = list(_keyset_after(qs, params, ordering, cursor_fields)[: limit + 1])
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    names = [field.lstrip("-") for field in cursor_fields]
+    return rows, _encode_cursor([last[name] if isinstance(last, dict) else getattr(last, name) for name in names])
+
+
+def _field_map(*names: str) -> Dict[str, str]:
+    return {name: name for name in names}
+
+
+def _split_param(value: Any) -> list[str]:
+    items = value if isinstance(value, (list, tuple)) else str(value or "").split(",")
+    return [str(item).strip() for item in items if str(item).strip()]
+
+
+def _list_shape(
+    params: Dict[str, Any],
+    fields: Dict[str, str],
+    includes: Optional[Dict[str, tuple[str, tuple[str, ...]]]] = None,
+) -> tuple[Dict[str, str], Dict[str, tuple[str, tuple[str, ...]]]]:
+    """Output fields (name -> column) and includes picked by the `fields=` / `include=` params.
+
+    Defaults to every field and no includes. Includes map a name to (relation path, related fields);
+    an empty path marks one the view fills itself. Raises ValueError for unknown names.
+    """
+    includes = includes or {}
+    requested = _split_param(params.get("fields"))
+    unknown = [name for name in requested if name not in fields]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}. Available: {', '.join(fields)}")
+    included = _split_param(params.get("include"))
+    unknown = [name for name in included if name not in includes]
+    if unknown:
+        raise ValueError(f"Unknown include(s): {', '.join(unknown)}. Available: {', '.join(includes) or 'none'}")
+    selected = {name: fields[name] for name in requested} if requested else fields
+    return selected, {name: includes[name] for name in included}
+
+
+def _list_columns(fields: Dict[str, str], includes: Dict[str, tuple[str, tuple[str, ...]]], keys: tuple[str, ...]) -> list[str]:
+    # Sort keys are always read so the page cursor can be built, even when not requested.
+    columns = dict.fromkeys(fields.values())
+    columns.update(dict.fromkeys(key.lstrip("-") for key in keys))
+    for path, related_fields in includes.values():
+        if path:
+            columns.update(dict.fromkeys(f"{path}__{name}" for name in related_fields))
+    return list(columns)
+
+
+def _list_row(row: Dict[str, Any], fields: Dict[str, str], includes: Dict[str, tuple[str, tuple[str, ...]]]) -> Dict[str, Any]:
+    item = {name: row[column] for name, column in fields.items()}
+    for name, (path, related_fields) in includes.items():
+        if path:
+            related = {field: row[f"{path}__{field}"] for field in related_fields}
+            item[name] = related if related["id"] is not None else None
+    return item
+
+
+def _list_etag(request: HttpRequest, qs: models.QuerySet, includes: Dict[str, tuple[str, tuple[str, ...]]]) -> str:
+    """Strong ETag of a list response from a cheap stamp of its scope: row count plus newest updated_at.
+
+    Included related tables that track updated_at contribute their newest value too.
+    """
+    stamps: Dict[str, Any] = {"count": models.Count("pk")}
+    for index, path in enumerate([""] + [path for path, _ in includes.values() if path]):
+        model = qs.model._meta.get_field(path).related_model if path else qs.model
+        if any(field.name == "updated_at" for field in model._meta.concrete_fields):
+            stamps[f"updated_{index}"] = models.Max(f"{path}__updated_at" if path else "updated_at")
+    stamp = qs.order_by().aggregate(**stamps)
+    payload = json.dumps([request.get_full_path(), stamp], sort_keys=True, default=str)
+    return '"{}"'.format(hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32])
+
+
+def _etag_matches(request: HttpRequest, etag: str) -> bool:
+    candidates = [candidate.strip() for candidate in (request.headers.get("If-None-Match") or "").split(",")]
+    return etag in candidates or "*" in candidates
+
+
+STREAM_CHUNK_SIZE = 2000
+
+
+def _ndjson_rows(
+    qs: models.QuerySet,
+    fields: Dict[str, str],
+    includes: Dict[str, tuple[str, tuple[str, ...]]],
+    finish: Optional[Callable[[list[Dict[str, Any]], list[Dict[str, Any]], Dict[str, Any]], None]],
+):
+    # A server-side cursor feeds fixed-size chunks, so memory stays flat however many rows match.
+    rows: list[Dict[str, Any]] = []
+    for row in qs.iterator(chunk_size=STREAM_CHUNK_SIZE):
+        rows.append(row)
+        if len(rows) == STREAM_CHUNK_SIZE:
+            yield _ndjson_chunk(rows, fields, includes, finish)
+            rows = []
+    if rows:
+        yield _ndjson_chunk(rows, fields, includes, finish)
+
+
+def _ndjson_chunk(
+    rows: list[Dict[str, Any]],
+    fields: Dict[str, str],
+    includes: Dict[str, tuple[str, tuple[str, ...]]],
+    finish: Optional[Callable[[list[Dict[str, Any]], list[Dict[str, Any]], Dict[str, Any]], None]],
+) -> bytes:
+    data = [_list_row(row, fields, includes) for row in rows]
+    if finish:
+        finish(rows, data, includes)
+    return "".join(json.dumps(item, cls=DjangoJSONEncoder) + "\n" for item in data).encode("utf-8")
+
+
+def _list_response(
+    request: HttpRequest,
+    params: Dict[str, Any],
+    qs: models.QuerySet,
+    ordering: tuple[str, ...],
+    fields: Dict[str, str],
+    includes: Optional[Dict[str, tuple[str, tuple[str, ...]]]] = None,
+    *,
+    cursor_fields: Optional[tuple[str, ...]] = None,
+    stamp_qs: Optional[models.QuerySet] = None,
+    finish: Optional[Callable[[list[Dict[str, Any]], list[Dict[str, Any]], Dict[str, Any]], None]] = None,
+    reference: bool = False,
+):
+    """GET response of a list view: sparse fields/includes, one keyset page and a conditional-GET ETag.
+
+    A request whose If-None-Match carries the current ETag gets 304 before any row is read. With `stream=1`
+    every row from the cursor on is streamed as NDJSON (one object per line) instead of one page.
+    `stamp_qs` is the queryset the ETag is computed on when `qs` cannot be aggregated (DISTINCT ON);
+    `finish(rows, data, includes)` post-processes the serialized rows in place. Pages are served from the
+    API read cache (core.api_cache) keyed on the project/shot of the request; `reference` marks lists that
+    only change with projects/sequences/artists.
+    """
+    stream = params.get("stream") in {"1", "true", "True", True}
+    cache_key = None
+    if settings.API_CACHE_ENABLED and not stream:
+        cache_key = api_cache.response_key(
+            request.get_full_path(),
+            _parse_int(params.get("project_id")),
+            (params.get("shot") or "").strip(),
+            reference=reference,
+        )
+        cached = api_cache.get_response(cache_key)
+        if cached:
+            if _etag_matches(request, cached["etag"]):
+                response = HttpResponseNotModified()
+            else:
+                response = HttpResponse(cached["content"], content_type="application/json")
+            response["ETag"] = cached["etag"]
+            response["X-Cache"] = "HIT"
+            return response
+    try:
+        fields, includes = _list_shape(params, fields, includes)
+    except ValueError as exc:
+        return _err(str(exc))
+    etag = _list_etag(request, stamp_qs if stamp_qs is not None else qs, includes)
+    if _etag_matches(request, etag):
+        response = HttpResponseNotModified()
+        response["ETag"] = etag
+        return response
+    qs = qs.values(*_list_columns(fields, includes, cursor_fields or ordering))
+    if stream:
+        try:
+            qs = _keyset_after(qs, params, ordering, cursor_fields or ordering)
+        except ValueError as exc:
+            return _err(str(exc))
+        response = StreamingHttpResponse(_ndjson_rows(qs, fields, includes, finish), content_type="application/x-ndjson")
+        response["ETag"] = etag
+        return response
+    try:
+        rows, next_cursor = _keyset_page(qs, params, ordering, cursor_fields=cursor_fields)
+    except ValueError as exc:
+        return _err(str(exc))
+    data = [_list_row(row, fields, includes) for row in rows]
+    if finish:
+        finish(rows, data, includes)
+    response = _ok(data, extra={"next_cursor": next_cursor})
+    response["ETag"] = etag
+    if cache_key:
+        api_cache.set_response(cache_key, response.content, etag)
+        response["X-Cache"] = "MISS"
+    return response
+
+
+_PROJECT_INCLUDE = ("project", ("id", "name", "code"))
+_SEQUENCE_INCLUDE = ("sequence", ("id", "name", "code"))
+_SHOT_INCLUDE = ("shot", ("id", "name", "code"))
+_ASSET_INCLUDE = ("asset", ("id", "name", "code", "asset_type"))
+_ARTIST_INCLUDE = ("artist", ("id", "username", "status"))
+_TASK_INCLUDE = ("task", ("id", "task_name", "task_type", "department", "status"))
+
+
 def _is_local_request(request: HttpRequest) -> bool:
     remote_addr = (request.META.get("REMOTE_ADDR") or "").strip()
     try:
@@ -132,8 +405,12 @@ def api_projects(request: HttpRequest):
             qs = qs.filter(code=code)
         if name:
             qs = qs.filter(name=name)
-        data = list(
-            qs.values(
+        return _list_response(
+            request,
+            params,
+            qs,
+            ("name", "id"),
+            _field_map(
                 "id",
                 "name",
                 "code",
@@ -147,9 +424,9 @@ def api_projects(request: HttpRequest):
                 "resolution_height",
                 "color_space",
                 "delivery_notes",
-            )
+            ),
+            reference=True,
         )
-        return _ok(data)
     # POST create/update
     name = (params.get("name") or "").strip()
     if not name:
@@ -219,8 +496,12 @@ def api_assets(request: HttpRequest):
             qs = qs.filter(project_id=project_id)
         if code:
             qs = qs.filter(code=code)
-        data = list(
-            qs.values(
+        return _list_response(
+            request,
+            params,
+            qs,
+            ("project_id", "code", "name", "id"),
+            _field_map(
                 "id",
                 "name",
                 "code",
@@ -234,9 +515,9 @@ def api_assets(request: HttpRequest):
                 "frame_start",
                 "frame_end",
                 "fps",
-            )
+            ),
+            {"project": _PROJECT_INCLUDE},
         )
-        return _ok(data)
     # POST create/update
     project_id = params.get("project_id")
     name = (params.get("name") or "").strip()
@@ -325,22 +606,29 @@ def api_sequences(request: HttpRequest):
             qs = qs.filter(project_id=project_id)
         if code:
             qs = qs.filter(code=code)
-        sequences = qs.values(
-            "id",
-            "name",
-            "code",
-            "description",
-            "status",
-            "project_id",
-            "frame_start",
-            "frame_end",
-            "handles",
-            "fps",
-            "resolution_width",
-            "resolution_height",
-            "color_space",
+        return _list_response(
+            request,
+            params,
+            qs,
+            ("project_id", "code", "name", "id"),
+            _field_map(
+                "id",
+                "name",
+                "code",
+                "description",
+                "status",
+                "project_id",
+                "frame_start",
+                "frame_end",
+                "handles",
+                "fps",
+                "resolution_width",
+                "resolution_height",
+                "color_space",
+            ),
+            {"project": _PROJECT_INCLUDE},
+            reference=True,
         )
-        return _ok(list(sequences))
     # POST create/update
     project_id = params.get("project_id")
     name = (params.get("name") or "").strip()
@@ -404,8 +692,12 @@ def api_shots(request: HttpRequest):
             qs = qs.filter(project_id=project_id)
         if code:
             qs = qs.filter(code=code)
-        data = list(
-            qs.values(
+        return _list_response(
+            request,
+            params,
+            qs,
+            ("sequence_id", "code", "name", "id"),
+            _field_map(
                 "id",
                 "name",
                 "code",
@@ -423,9 +715,9 @@ def api_shots(request: HttpRequest):
                 "color_space",
                 "shot_type",
                 "notes",
-            )
+            ),
+            {"project": _PROJECT_INCLUDE, "sequence": _SEQUENCE_INCLUDE},
         )
-        return _ok(data)
     # POST create/update
     project_id = params.get("project_id")
     sequence_id = params.get("sequence_id")
@@ -520,8 +812,12 @@ def api_tasks(request: HttpRequest):
                     )
                 else:
                     qs = qs.filter(**{key: value})
-        data = list(
-            qs.values(
+        return _list_response(
+            request,
+            params,
+            qs,
+            ("-priority", "task_type", "task_name", "id"),
+            _field_map(
                 "id",
                 "artist_id",
                 "asset_id",
@@ -538,9 +834,9 @@ def api_tasks(request: HttpRequest):
                 "due_date",
                 "bid_hours",
                 "actual_hours",
-            )
+            ),
+            {"artist": _ARTIST_INCLUDE, "asset": _ASSET_INCLUDE, "sequence": _SEQUENCE_INCLUDE, "shot": _SHOT_INCLUDE},
         )
-        return _ok(data)
     # POST create/update
     artist_id = params.get("artist_id")
     task_type = (params.get("task_type") or "").strip()
@@ -626,6 +922,20 @@ def api_tasks(request: HttpRequest):
 
 
 # -------- Scenes (versioning) --------
+def _scene_connection():
+    """Django's psycopg2 connection for pipeline_scripts.versioning.
+
+    core_scene_file is created by migrations (SceneFile); only a custom PIPELINE_SCENE_TABLE is created
+    here, once per process.
+    """
+    from pipeline_scripts import versioning
+
+    connection.ensure_connection()
+    if versioning.get_scene_table_name() != versioning.DEFAULT_TABLE_NAME:
+        versioning.ensure_scene_table(connection.connection)
+    return connection.connection
+
+
 @csrf_exempt
 def api_scenes(request: HttpRequest):
     from pipeline_scripts import versioning
@@ -636,9 +946,7 @@ def api_scenes(request: HttpRequest):
         software = (params.get("software") or "").lower()
         if not (task_id and software):
             return _err("Missing task_id or software")
-        # use Django's underlying psycopg2 connection
-        versioning.ensure_scene_table(connection.connection)
-        rows = versioning.fetch_scenes(connection.connection, task_id, software)
+        rows = versioning.fetch_scenes(_scene_connection(), task_id, software, use_api=False)
         return _ok(rows)
     return _err("Method not allowed", status=405)
 
@@ -653,12 +961,16 @@ def api_scenes_next(request: HttpRequest):
     bump = (params.get("bump") or "iteration").lower()
     if not (task_id and software):
         return _err("Missing task_id or software")
-    versioning.ensure_scene_table(connection.connection)
-    ver, itr = versioning.next_numbers(connection.connection, task_id, software, bump=bump)
-    return _ok({"version": ver, "iteration": itr})
+    # GET previews; POST reserves the numbers so concurrent saves on the task never collide.
+    reserve = request.method == "POST"
+    ver, itr = versioning.next_numbers(
+        _scene_connection(), task_id, software, bump=bump, reserve=reserve, use_api=False
+    )
+    return _ok({"version": ver, "iteration": itr, "reserved": reserve})
 
 
 @csrf_exempt
+@idempotent
 def api_scenes_record(request: HttpRequest):
     from pipeline_scripts import versioning
 
@@ -671,11 +983,61 @@ def api_scenes_record(request: HttpRequest):
     iteration = int(params.get("iteration") or 0)
     if not all([task_id, artist_id, software, file_path, version, iteration]):
         return _err("Missing required fields")
-    versioning.ensure_scene_table(connection.connection)
-    versioning.record_scene(connection.connection, task_id, artist_id, software, file_path, version, iteration)
-    return _ok({"recorded": True})
+    scene_id, created = versioning.record_scene(
+        _scene_connection(), task_id, artist_id, software, file_path, version, iteration, use_api=False
+    )
+    task = Task.objects.filter(id=task_id).first()
+    project_id = change_events.task_scope(task)[0] if task else None
+    change_events.record("scene", scene_id, project_id, "created" if created else "updated")
+    return _ok({"recorded": True, "id": scene_id, "created": created})
+
+
+
+@csrf_exempt
+@idempotent
+def api_scenes_reserve(request: HttpRequest):
+    """Reserve the next numbers of (task, software), record the scene as pending and return its file path."""
+    from pipeline_scripts import versioning
+
+    if request.method != "POST":
+        return _err("Method not allowed", status=405)
+    params = _params(request)
+    task_id = _parse_int(params.get("task_id"), 0)
+    artist_id = _parse_int(params.get("artist_id"), 0)
+    software = (params.get("software") or "").lower()
+    scene_dir = (params.get("scene_dir") or "").strip()
+    if not all([task_id, artist_id, software, scene_dir]):
+        return _err("Missing task_id, artist_id, software or scene_dir")
+    naming = {key: str(params.get(key) or "").strip() for key in ("artist", "department", "task", "asset")}
+    scene = versioning.reserve_scene(
+        _scene_connection(),
+        task_id,
+        artist_id,
+        software,
+        scene_dir,
+        naming=naming,
+        bump=(params.get("bump") or "iteration").lower(),
+        use_api=False,
+    )
+    return _ok(scene, status=201)
 
 
+@csrf_exempt
+def api_scenes_confirm(request: HttpRequest):
+    """Mark a reserved scene saved once the DCC has written it; repeating the call is harmless."""
+    from pipeline_scripts import versioning
+
+    if request.method != "POST":
+        return _err("Method not allowed", status=405)
+    scene_id = _parse_int(_params(request).get("id"), 0)
+    previous_status = versioning.confirm_scene(_scene_connection(), scene_id, use_api=False) if scene_id else None
+    if previous_status is None:
+        return _err("Scene not found", status=404)
+    if previous_status == "pending":
+        task = Task.objects.filter(scene_files__id=scene_id).first()
+        change_events.record("scene", scene_id, change_events.task_scope(task)[0] if task else None, "created")
+    return _ok({"id": scene_id, "status": "saved", "previous_status": previous_status})
+
 TARGET_MAP = {
     "project": Project,
     "sequence": Sequence,
@@ -696,6 +1058,71 @@ def _resolve_target(target_type: str, target_id: Optional[str]):
     return content_type, target
 
 
+_PUBLISH_FIELDS = {
+    "id": "id",
+    "publish_id": "id",
+    "project_id": "project_id",
+    "target_type": "target_content_type_id",
+    "target_id": "target_object_id",
+    "task_id": "task_id",
+    "created_by": "created_by_id",
+    "software": "software",
+    "label": "label",
+    "source_version": "source_version",
+    "source_iteration": "source_iteration",
+    # Backward-compatible keys for older clients.
+    "version": "source_version",
+    "iteration": "source_iteration",
+    "status": "status",
+    "item_usd_path": "item_usd_path",
+    "asset_usd_path": "asset_usd_path",
+    "preview_path": "preview_path",
+    "seq_code": "seq_code",
+    "shot_code": "shot_code",
+    "dept": "dept",
+    "artist_name": "artist_name",
+    "asset_name": "asset_name",
+    "part_name": "part_name",
+    "comment": "comment",
+    "metadata": "metadata",
+    "published_at": "published_at",
+    "is_latest": "is_latest",
+}
+_PUBLISH_INCLUDES = {
+    "project": _PROJECT_INCLUDE,
+    "task": _TASK_INCLUDE,
+    "artist": ("created_by", _ARTIST_INCLUDE[1]),
+    "components": (
+        "",
+        ("id", "name", "component_type", "file_path", "file_size", "hash_md5", "frame_start", "frame_end", "metadata"),
+    ),
+}
+_LATEST_PART_FIELDS = {
+    "part_name": "part_name",
+    "part_usd_path": "part_usd_path",
+    "publish_id": "latest_publish_id",
+    "asset_name": "asset_name",
+}
+
+
+def _finish_publish_rows(rows: list[Dict[str, Any]], data: list[Dict[str, Any]], includes: Dict[str, Any]) -> None:
+    components_by_publish: Dict[int, list[Dict[str, Any]]] = {}
+    if "components" in includes and rows:
+        # One query for every component of the page instead of one per publish.
+        for component in (
+            PublishComponent.objects.filter(publish_id__in=[row["id"] for row in rows])
+            .order_by("publish_id", "name")
+            .values("publish_id", *_PUBLISH_INCLUDES["components"][1])
+        ):
+            components_by_publish.setdefault(component.pop("publish_id"), []).append(component)
+    for row, item in zip(rows, data):
+        if "target_type" in item:
+            # get_for_id is served from ContentType's cache, so no per-row query.
+            item["target_type"] = ContentType.objects.get_for_id(item["target_type"]).model
+        if "components" in includes:
+            item["components"] = components_by_publish.get(row["id"], [])
+
+
 def _publish_queryset(target_type: str, target_id: str, task_id: Optional[str], software: Optional[str] = None) -> models.QuerySet:
     content_type, _ = _resolve_target(target_type, target_id)
     if not content_type:
@@ -708,402 +1135,43 @@ def _publish_queryset(target_type: str, target_id: str, task_id: Optional[str],
     return qs
 
 
-def _next_publish_numbers(qs: models.QuerySet, bump: str) -> tuple[int, int]:
-    latest = qs.order_by("-source_version", "-source_iteration", "-id").first()
-    if not latest:
-        return 1, 1
-    current_version = int(latest.source_version or 0)
-    current_iteration = int(latest.source_iteration or 0)
-    if bump == "version":
-        return current_version + 1, 1
-    return current_version if current_version > 0 else 1, current_iteration + 1 if current_iteration > 0 else 1
-
-
-def _sver(value: Optional[int]) -> int:
-    return int(value or 0)
-
+MAX_PUBLISH_BATCH = 500
 
-def _path_to_posix(value: str) -> str:
-    return str(value or "").replace("\\", "/")
-
-
-def _extract_usd_context(path_value: str) -> Optional[Dict[str, str]]:
-    path = _path_to_posix(path_value).strip()
-    if not path:
-        return None
-    parts = [p for p in path.split("/") if p]
-    if "sequences" not in parts or "usd" not in parts:
-        return None
-    seq_idx = parts.index("sequences")
-    try:
-        seq = parts[seq_idx + 1]
-        shot = parts[seq_idx + 2]
-        dept = parts[seq_idx + 3]
-    except IndexError:
-        return None
-
-    artist = ""
-    task = ""
-    try:
-        houdini_idx = parts.index("houdini", seq_idx + 4)
-        if parts[houdini_idx + 1] == "scenes":
-            artist = parts[houdini_idx + 2]
-            task = parts[houdini_idx + 3]
-    except Exception:
-        pass
-
-    usd_idx = parts.index("usd", seq_idx + 4)
-    asset = parts[usd_idx + 1] if len(parts) > usd_idx + 1 else ""
-    part = parts[usd_idx + 2] if len(parts) > usd_idx + 2 else ""
-
-    prefix = "/".join(parts[:seq_idx])
-    shared_root = "/".join(parts[: seq_idx + 4]) + "/usd"
-    asset_layer_path = "/".join(parts[: usd_idx + 2]) + f"/{asset}.usd" if asset else ""
-    return {
-        "prefix": prefix,
-        "seq": seq,
-        "shot": shot,
-        "dept": dept,
-        "artist": artist,
-        "task": task,
-        "asset": asset,
-        "part": part,
-        "shared_root": shared_root,
-        "asset_layer_path": asset_layer_path,
-    }
-
-
-def _derive_asset_part_and_stable_path(
-    asset_usd_path: str,
-    item_usd_path: str,
-    metadata: Optional[Dict[str, Any]] = None,
-    asset_name_hint: Optional[str] = None,
-    part_name_hint: Optional[str] = None,
-) -> tuple[str, str, str]:
-    meta = metadata or {}
-    path = _path_to_posix(asset_usd_path or item_usd_path or "")
-    parts = [p for p in path.split("/") if p]
-
-    asset_name = str(
-        asset_name_hint
-        or meta.get("asset_name")
-        or meta.get("asset")
-        or ""
-    ).strip()
-    part_name = str(
-        part_name_hint
-        or meta.get("part_name")
-        or meta.get("fx_layer")
-        or ""
-    ).strip()
-
-    if "usd" in parts:
-        usd_idx = parts.index("usd")
-        if not asset_name and len(parts) > usd_idx + 1:
-            asset_name = parts[usd_idx + 1]
-        if not part_name and len(parts) > usd_idx + 2:
-            part_name = parts[usd_idx + 2]
-
-    if not part_name and path:
-        part_name = Path(path).stem
-    if not asset_name:
-        asset_name = "unknown_asset"
-    if not part_name:
-        part_name = "unknown_part"
-
-    if asset_usd_path:
-        parent = Path(_path_to_posix(asset_usd_path)).parent
-    elif item_usd_path:
-        item_parent = Path(_path_to_posix(item_usd_path)).parent
-        if item_parent.name.lower() == "data":
-            parent = item_parent.parent
-        else:
-            parent = item_parent
-    else:
-        parent = Path(".")
-    stable_path = _path_to_posix(str(parent / f"{part_name}.usd"))
 
-    return asset_name, part_name, stable_path
+class _PublishError(Exception):
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
 
 
-def _write_usda_sublayers(layer_path: str, sublayers: list[str]) -> None:
-    target = Path(layer_path)
-    target.parent.mkdir(parents=True, exist_ok=True)
-    unique = []
-    seen = set()
-    for candidate in sublayers:
-        normalized = _path_to_posix(candidate).strip()
-        if not normalized or normalized in seen:
-            continue
-        seen.add(normalized)
-        unique.append(normalized)
-
-    rel_paths = []
-    for sub in unique:
-        rel = os.path.relpath(sub, str(target.parent)).replace("\\", "/")
-        if not rel.startswith("."):
-            rel = f"./{rel}"
-        rel_paths.append(rel)
-
-    lines = [
-        "#usda 1.0",
-        "(",
-        "    subLayers = [",
-    ]
-    for idx, rel in enumerate(rel_paths):
-        comma = "," if idx < len(rel_paths) - 1 else ""
-        lines.append(f'        @"{rel}"@{comma}')
-    lines.extend(
-        [
-            "    ]",
-            ")",
-            "",
-        ]
-    )
-    target.write_text("\n".join(lines), encoding="utf-8")
-
-
-def _collect_latest_publish_paths(project_id: int, matcher) -> Dict[str, str]:
-    latest: Dict[str, tuple[int, int, int, str]] = {}
-    qs = Publish.objects.filter(project_id=project_id).exclude(asset_usd_path="")
-    for candidate in qs:
-        context = _extract_usd_context(candidate.asset_usd_path or "")
-        if not context:
-            continue
-        key = matcher(candidate, context)
-        if not key:
-            continue
-        rank = (
-            _sver(candidate.source_version),
-            _sver(candidate.source_iteration),
-            int(candidate.id or 0),
-            _path_to_posix(candidate.asset_usd_path or ""),
-        )
-        prev = latest.get(key)
-        if not prev or rank[:3] > prev[:3]:
-            latest[key] = rank
-    return {k: v[3] for k, v in latest.items()}
-
-
-def _rebuild_shared_usd_layers(publish: Publish) -> Optional[str]:
-    context = _extract_usd_context(publish.asset_usd_path or "")
-    if not context:
-        return "Skipped shared layer rebuild: could not parse USD context from asset_usd_path."
-
-    seq = context["seq"]
-    shot = context["shot"]
-    dept = context["dept"]
-    artist = context["artist"]
-    asset = context["asset"]
-    shared_root = context["shared_root"]
-    if not all([seq, shot, dept, artist, asset]):
-        return "Skipped shared layer rebuild: missing one or more context fields (seq/shot/dept/artist/asset)."
-
-    # 1) Rebuild asset layer from latest part stable paths (DB authoritative).
-    part_paths = _collect_latest_publish_paths(
-        publish.project_id,
-        lambda p, c: (
-            c["part"]
-            if c["seq"] == seq
-            and c["shot"] == shot
-            and c["dept"] == dept
-            and c["artist"] == artist
-            and c["asset"] == asset
-            else ""
-        ),
-    )
-    asset_layer = context["asset_layer_path"]
-    if asset_layer and part_paths:
-        _write_usda_sublayers(asset_layer, sorted(part_paths.values()))
-
-    # 2) Rebuild artist layer from latest asset layers for the artist context.
-    asset_layer_paths = _collect_latest_publish_paths(
-        publish.project_id,
-        lambda p, c: (
-            c["asset"]
-            if c["seq"] == seq and c["shot"] == shot and c["dept"] == dept and c["artist"] == artist
-            else ""
-        ),
-    )
-    artist_layer_path = f"{shared_root}/artist/{artist}.usd"
-    artist_sublayers = []
-    for _, stable_part_path in sorted(asset_layer_paths.items()):
-        c = _extract_usd_context(stable_part_path)
-        if c and c.get("asset_layer_path"):
-            artist_sublayers.append(c["asset_layer_path"])
-    if artist_sublayers:
-        _write_usda_sublayers(artist_layer_path, artist_sublayers)
-
-    # 3) Rebuild dept layer from artist layers.
-    artist_names = _collect_latest_publish_paths(
-        publish.project_id,
-        lambda p, c: (
-            c["artist"] if c["seq"] == seq and c["shot"] == shot and c["dept"] == dept and c["artist"] else ""
-        ),
-    )
-    dept_layer_path = f"{shared_root}/dept/{dept}.usd"
-    dept_sublayers = [f"{shared_root}/artist/{name}.usd" for name in sorted(artist_names.keys()) if name]
-    if dept_sublayers:
-        _write_usda_sublayers(dept_layer_path, dept_sublayers)
-
-    # 4) Rebuild shot and seq layers in shared root.
-    shot_layer_path = f"{shared_root}/shot/{shot}.usd"
-    _write_usda_sublayers(shot_layer_path, [dept_layer_path])
-    seq_layer_path = f"{shared_root}/seq/{seq}.usd"
-    _write_usda_sublayers(seq_layer_path, [shot_layer_path])
-    return None
-
-
-@csrf_exempt
-def api_publishes_next(request: HttpRequest):
-    params = _params(request)
+def _resolve_publish_scope(params: Dict[str, Any]) -> tuple[Optional[Task], ContentType, models.Model, Project]:
     target_type = (params.get("target_type") or "").lower()
     target_id = params.get("target_id")
     task_id = params.get("task_id")
-    bump = (params.get("bump") or "iteration").lower()
-    software = (params.get("software") or "").strip() or None
-    if target_type not in TARGET_MAP or not target_id:
-        return _err("Missing or invalid target")
-    qs = _publish_queryset(target_type, target_id, task_id, software)
-    version, iteration = _next_publish_numbers(qs, bump)
-    return _ok({"version": version, "iteration": iteration})
 
-
-@csrf_exempt
-def api_publishes(request: HttpRequest):
-    params = _params(request)
-    target_type = (params.get("target_type") or "").lower()
-    target_id = params.get("target_id")
-    task_id = params.get("task_id")
-
-    if request.method == "GET":
-        qs = Publish.objects.select_related("task", "created_by").all()
-        software_filter = (params.get("software") or "").strip() or None
-        latest_per_part = params.get("latest_per_part") in {"1", "true", "True", True}
-        asset_filter = (params.get("asset") or params.get("asset_name") or "").strip()
-        if task_id:
-            qs = qs.filter(task_id=task_id)
-        if target_type and target_id:
-            qs = _publish_queryset(target_type, target_id, task_id, software_filter)
-        if params.get("project_id"):
-            qs = qs.filter(project_id=params.get("project_id"))
-        if software_filter:
-            qs = qs.filter(software=software_filter)
-
-        if latest_per_part:
-            latest_map: Dict[str, Dict[str, Any]] = {}
-            for publish in qs.order_by("-source_version", "-source_iteration", "-published_at", "-id"):
-                meta = publish.metadata if isinstance(publish.metadata, dict) else {}
-                asset_name, part_name, stable_path = _derive_asset_part_and_stable_path(
-                    publish.asset_usd_path,
-                    publish.item_usd_path,
-                    metadata=meta,
-                )
-                if asset_filter and asset_name.lower() != asset_filter.lower():
-                    continue
-                if not part_name or not stable_path:
-                    continue
-                key = part_name.lower()
-                if key in latest_map:
-                    continue
-                latest_map[key] = {
-                    "part_name": part_name,
-                    "part_usd_path": stable_path,
-                    "publish_id": publish.id,
-                    "asset_name": asset_name,
-                }
-            data = list(latest_map.values())
-            data.sort(key=lambda item: item["part_name"].lower())
-            return _ok(data)
-
-        include_components = params.get("include_components") in {"1", "true", "True", True}
-        data = []
-        for publish in qs.order_by("-published_at"):
-            item = {
-                "id": publish.id,
-                "publish_id": publish.id,
-                "project_id": publish.project_id,
-                "target_type": publish.target_content_type.model,
-                "target_id": publish.target_object_id,
-                "task_id": publish.task_id,
-                "created_by": publish.created_by_id,
-                "software": publish.software,
-                "label": publish.label,
-                "source_version": publish.source_version,
-                "source_iteration": publish.source_iteration,
-                # Backward-compatible keys for older clients.
-                "version": publish.source_version,
-                "iteration": publish.source_iteration,
-                "status": publish.status,
-                "item_usd_path": publish.item_usd_path,
-                "asset_usd_path": publish.asset_usd_path,
-                "preview_path": publish.preview_path,
-                "comment": publish.comment,
-                "metadata": publish.metadata,
-                "published_at": publish.published_at,
-                "is_latest": publish.is_latest,
-            }
-            if include_components:
-                item["components"] = list(
-                    publish.components.values(
-                        "id",
-                        "name",
-                        "component_type",
-                        "file_path",
-                        "file_size",
-                        "hash_md5",
-                        "frame_start",
-                        "frame_end",
-                        "metadata",
-                    )
-                )
-            data.append(item)
-        return _ok(data)
-
-    # POST -> create publish
-    if not (_is_local_request(request) or _has_valid_pm_token(request)):
-        return _err("Forbidden", status=403)
-
-    item_usd_path = _normalize_file_path(params.get("item_usd_path"))
-    part_usd_path = _normalize_file_path(params.get("part_usd_path"))
-    asset_usd_path = _normalize_file_path(params.get("asset_usd_path") or part_usd_path)
-    preview_path = _normalize_file_path(params.get("preview_path"))
-
-    if not task_id:
-        return _err("Missing task_id")
-    # Backward-compatible behavior:
-    # - Existing scene/version saver posts components without item/asset USD fields.
-    # - Part-publish flow posts both item_usd_path + asset_usd_path.
-    has_item = bool(item_usd_path)
-    has_asset = bool(asset_usd_path)
-    if has_item ^ has_asset:
-        return _err("Provide both item_usd_path and asset_usd_path, or neither.")
-
-    task = None
-    if task_id:
-        task = Task.objects.select_related(
-            "asset__project",
-            "shot__project",
-            "shot__sequence__project",
-            "sequence__project",
-        ).filter(id=task_id).first()
-        if task and not target_type:
-            if task.asset_id:
-                target_type = "asset"
-                target_id = str(task.asset_id)
-            elif task.shot_id:
-                target_type = "shot"
-                target_id = str(task.shot_id)
-            elif task.sequence_id:
-                target_type = "sequence"
-                target_id = str(task.sequence_id)
+    task = Task.objects.select_related(
+        "asset__project",
+        "shot__project",
+        "shot__sequence__project",
+        "sequence__project",
+    ).filter(id=task_id).first()
+    if task and not target_type:
+        if task.asset_id:
+            target_type = "asset"
+            target_id = str(task.asset_id)
+        elif task.shot_id:
+            target_type = "shot"
+            target_id = str(task.shot_id)
+        elif task.sequence_id:
+            target_type = "sequence"
+            target_id = str(task.sequence_id)
 
     if target_type not in TARGET_MAP or not target_id:
-        return _err("Missing or invalid target")
+        raise _PublishError("Missing or invalid target")
 
     content_type, target = _resolve_target(target_type, target_id)
     if not target:
-        return _err("Target not found", status=404)
+        raise _PublishError("Target not found", status=404)
 
     project = getattr(target, "project", None)
     if not project and hasattr(target, "sequence"):
@@ -1122,13 +1190,50 @@ def api_publishes(request: HttpRequest):
         elif task.sequence_id and task.sequence:
             project = task.sequence.project
     if not project:
-        return _err("Cannot resolve project for publish", status=400)
+        raise _PublishError("Cannot resolve project for publish", status=400)
+    return task, content_type, target, project
+
+
+def _prepare_publish(params: Dict[str, Any], cache: Optional[Dict[Any, Any]] = None) -> Dict[str, Any]:
+    """Validate one publish payload and build its unsaved Publish row.
+
+    `cache` lets a batch share task/target/artist lookups between items.
+    """
+    cache = {} if cache is None else cache
+    item_usd_path = _normalize_file_path(params.get("item_usd_path"))
+    part_usd_path = _normalize_file_path(params.get("part_usd_path"))
+    asset_usd_path = _normalize_file_path(params.get("asset_usd_path") or part_usd_path)
+    preview_path = _normalize_file_path(params.get("preview_path"))
+
+    if not params.get("task_id"):
+        raise _PublishError("Missing task_id")
+    # Backward-compatible behavior:
+    # - Existing scene/version saver posts components without item/asset USD fields.
+    # - Part-publish flow posts both item_usd_path + asset_usd_path.
+    has_item = bool(item_usd_path)
+    has_asset = bool(asset_usd_path)
+    if has_item ^ has_asset:
+        raise _PublishError("Provide both item_usd_path and asset_usd_path, or neither.")
+
+    scope_key = (
+        "scope",
+        str(params.get("task_id")),
+        (params.get("target_type") or "").lower(),
+        str(params.get("target_id") or ""),
+        str(params.get("project_id") or ""),
+    )
+    if scope_key not in cache:
+        cache[scope_key] = _resolve_publish_scope(params)
+    task, content_type, target, project = cache[scope_key]
 
     artist = None
     if params.get("artist_id"):
-        artist = Artist.objects.filter(id=params.get("artist_id")).first()
+        artist_key = ("artist", str(params.get("artist_id")))
+        if artist_key not in cache:
+            cache[artist_key] = Artist.objects.filter(id=params.get("artist_id")).first()
+        artist = cache[artist_key]
 
-    bump = (params.get("bump") or "iteration").lower()
+    software = (params.get("software") or "").strip()
     source_version = _parse_int(
         params.get("source_version")
         or params.get("houdini_version")
@@ -1141,12 +1246,9 @@ def api_publishes(request: HttpRequest):
         or params.get("dcc_iteration")
         or params.get("iteration")
     )
-    if not (source_version and source_iteration):
-        qs = _publish_queryset(target_type, target_id, task_id, (params.get("software") or "").strip() or None)
-        source_version, source_iteration = _next_publish_numbers(qs, bump)
 
-    metadata = _parse_metadata(params.get("metadata"))
-    asset_name, part_name, stable_part_path = _derive_asset_part_and_stable_path(
+    metadata = dict(_parse_metadata(params.get("metadata")))
+    asset_name, part_name, stable_part_path = derive_asset_part_and_stable_path(
         asset_usd_path,
         item_usd_path,
         metadata=metadata,
@@ -1157,14 +1259,15 @@ def api_publishes(request: HttpRequest):
     metadata["asset"] = asset_name
     metadata["part_name"] = part_name
     metadata["fx_layer"] = part_name
+    context_fields = publish_context_fields(stable_part_path, asset_name, part_name) if has_item else {}
 
-    publish = Publish.objects.create(
+    publish = Publish(
         project=project,
         target_content_type=content_type,
         target_object_id=target.id,
         task=task,
         created_by=artist,
-        software=(params.get("software") or "").strip(),
+        software=software,
         label=(params.get("label") or "").strip(),
         source_version=source_version,
         source_iteration=source_iteration,
@@ -1174,108 +1277,258 @@ def api_publishes(request: HttpRequest):
         preview_path=preview_path,
         comment=(params.get("comment") or "").strip(),
         metadata=metadata,
-        is_latest=True,
         published_at=timezone.now(),
+        **context_fields,
     )
 
-    # Ensure latest flag for the same stream (target + task + software scope).
-    latest_qs = Publish.objects.filter(
-        target_content_type=content_type,
-        target_object_id=target.id,
-        task=task,
-    )
-    if publish.software:
-        latest_qs = latest_qs.filter(software=publish.software)
-    latest_qs.exclude(id=publish.id).update(is_latest=False)
-
     components = params.get("components")
     if isinstance(components, str):
         try:
             components = json.loads(components)
         except Exception:
             components = []
-    if isinstance(components, list):
-        for component in components:
-            if not isinstance(component, dict):
-                continue
-            component_name = component.get("name") or component.get("label") or "main"
-            component_type = component.get("component_type", "scene")
-            PublishComponent.objects.update_or_create(
-                publish=publish,
-                name=component_name,
-                component_type=component_type,
-                defaults={
-                    "file_path": component.get("file_path", ""),
-                    "file_size": _parse_int(component.get("file_size")),
-                    "hash_md5": component.get("hash_md5", ""),
-                    "frame_start": _parse_int(component.get("frame_start")),
-                    "frame_end": _parse_int(component.get("frame_end")),
-                    "metadata": _parse_metadata(component.get("metadata")),
-                },
-            )
-    else:
-        components = []
-
-    if item_usd_path:
-        PublishComponent.objects.update_or_create(
-            publish=publish,
-            name="item_usd",
-            component_type="data",
-            defaults={
-                "file_path": item_usd_path,
-                "metadata": {"role": "item_usd"},
-            },
-        )
-    if stable_part_path:
-        PublishComponent.objects.update_or_create(
-            publish=publish,
-            name="asset_usd",
-            component_type="data",
-            defaults={
-                "file_path": stable_part_path,
-                "metadata": {"role": "asset_usd"},
-            },
-        )
-    if preview_path:
-        PublishComponent.objects.update_or_create(
-            publish=publish,
-            name="preview",
-            component_type="preview",
-            defaults={
-                "file_path": preview_path,
-                "metadata": {"role": "preview"},
-            },
-        )
-
     links = params.get("links")
     if isinstance(links, str):
         try:
             links = json.loads(links)
         except Exception:
             links = []
-    if isinstance(links, list):
-        for link in links:
-            if not isinstance(link, dict):
-                continue
-            target_publish_id = link.get("target_publish_id")
-            if not target_publish_id:
-                continue
-            try:
-                target_publish = Publish.objects.get(id=int(target_publish_id))
-            except (ValueError, Publish.DoesNotExist):
-                continue
-            VersionLink.objects.get_or_create(
+
+    return {
+        "publish": publish,
+        "stream_key": (content_type.id, target.id, task.id if task else None, software),
+        "bump": (params.get("bump") or "iteration").lower(),
+        "asset_name": asset_name,
+        "part_name": part_name,
+        "item_usd_path": item_usd_path,
+        "stable_part_path": stable_part_path,
+        "preview_path": preview_path,
+        "component_rows": _publish_component_rows(
+            publish,
+            components if isinstance(components, list) else [],
+            item_usd_path,
+            stable_part_path,
+            preview_path,
+        ),
+        "links": [link for link in links if isinstance(link, dict) and link.get("target_publish_id")] if isinstance(links, list) else [],
+    }
+
+
+def _publish_component_rows(
+    publish: Publish,
+    components: list[Any],
+    item_usd_path: str,
+    stable_part_path: str,
+    preview_path: str,
+) -> list[PublishComponent]:
+    """Validated, unsaved components for a publish; later entries win on (name, component_type)."""
+    rows: Dict[tuple[str, str], PublishComponent] = {}
+    for index, component in enumerate(components):
+        if not isinstance(component, dict):
+            raise _PublishError(f"components[{index}] must be an object")
+        name = str(component.get("name") or component.get("label") or "main")
+        component_type = str(component.get("component_type") or "scene")
+        file_path = str(component.get("file_path") or "")
+        if len(name) > 128 or len(component_type) > 32 or len(file_path) > 512:
+            raise _PublishError(f"components[{index}] name, component_type or file_path is too long")
+        rows[(name, component_type)] = PublishComponent(
+            publish=publish,
+            name=name,
+            component_type=component_type,
+            file_path=file_path,
+            file_size=_parse_int(component.get("file_size")),
+            hash_md5=component.get("hash_md5", ""),
+            frame_start=_parse_int(component.get("frame_start")),
+            frame_end=_parse_int(component.get("frame_end")),
+            metadata=_parse_metadata(component.get("metadata")),
+        )
+    for name, component_type, file_path in (
+        ("item_usd", "data", item_usd_path),
+        ("asset_usd", "data", stable_part_path),
+        ("preview", "preview", preview_path),
+    ):
+        if file_path:
+            rows[(name, component_type)] = PublishComponent(
+                publish=publish,
+                name=name,
+                component_type=component_type,
+                file_path=file_path,
+                metadata={"role": name},
+            )
+    return list(rows.values())
+
+
+def _write_components_and_links(prepared_items: list[Dict[str, Any]]) -> None:
+    """Upsert the components and create the links of saved publishes in a constant number of queries."""
+    component_rows = [row for prepared in prepared_items for row in prepared["component_rows"]]
+    if component_rows:
+        PublishComponent.objects.bulk_create(
+            component_rows,
+            update_conflicts=True,
+            unique_fields=["publish", "name", "component_type"],
+            update_fields=["file_path", "file_size", "hash_md5", "frame_start", "frame_end", "metadata"],
+        )
+
+    link_requests = [
+        (prepared["publish"], _parse_int(link.get("target_publish_id")), link)
+        for prepared in prepared_items
+        for link in prepared["links"]
+    ]
+    target_ids = {target_id for _, target_id, _ in link_requests if target_id}
+    if not target_ids:
+        return
+    existing = set(Publish.objects.filter(id__in=target_ids).values_list("id", flat=True))
+    VersionLink.objects.bulk_create(
+        [
+            VersionLink(
                 source=publish,
-                target=target_publish,
+                target_id=target_id,
                 link_type=link.get("link_type", "dependency"),
-                defaults={"notes": link.get("notes", "")},
+                notes=link.get("notes", ""),
             )
+            for publish, target_id, link in link_requests
+            if target_id in existing
+        ],
+        # Matches get_or_create: an existing (source, target, link_type) keeps its notes.
+        ignore_conflicts=True,
+    )
+
+
+def _enqueue_layer_job(publish: Publish, dirty_paths: Optional[list[str]] = None) -> tuple[Optional[LayerRebuildJob], Optional[str]]:
+    layer_job, layer_warning = enqueue_layer_rebuild(publish, dirty_paths)
+    claimed = claim_job(layer_job) if layer_job and settings.SHARED_LAYER_REBUILD_INLINE else None
+    if claimed:
+        layer_job = run_job(claimed)
+        if layer_job.status == "failed":
+            layer_warning = f"Shared layer rebuild failed: {layer_job.error}"
+        elif layer_job.warning:
+            layer_warning = layer_job.warning
+    return layer_job, layer_warning
+
+
+@csrf_exempt
+def api_publishes_next(request: HttpRequest):
+    """GET previews the next numbers of a publish stream; POST reserves them for the caller."""
+    params = _params(request)
+    target_type = (params.get("target_type") or "").lower()
+    target_id = params.get("target_id")
+    task_id = _parse_int(params.get("task_id"))
+    bump = (params.get("bump") or "iteration").lower()
+    software = (params.get("software") or "").strip()
+    if target_type not in TARGET_MAP or not target_id:
+        return _err("Missing or invalid target")
+    content_type, target = _resolve_target(target_type, target_id)
+    if request.method == "POST":
+        if not (_is_local_request(request) or _has_valid_pm_token(request)):
+            return _err("Forbidden", status=403)
+        if not target:
+            return _err("Target not found", status=404)
+        version, iteration = allocate_publish_numbers(content_type.id, target.id, task_id, software, bump)
+        return _ok({"version": version, "iteration": iteration, "reserved": True})
+    if not target:
+        return _ok({"version": 1, "iteration": 1, "reserved": False})
+    version, iteration = peek_publish_numbers(content_type.id, target.id, task_id, software, bump)
+    return _ok({"version": version, "iteration": iteration, "reserved": False})
+
+
+@csrf_exempt
+@idempotent
+def api_publishes(request: HttpRequest):
+    params = _params(request)
+    target_type = (params.get("target_type") or "").lower()
+    target_id = params.get("target_id")
+    task_id = params.get("task_id")
+
+    if request.method == "GET":
+        qs = Publish.objects.all()
+        software_filter = (params.get("software") or "").strip() or None
+        latest_per_part = params.get("latest_per_part") in {"1", "true", "True", True}
+        asset_filter = (params.get("asset") or params.get("asset_name") or "").strip()
+        part_filter = (params.get("part") or params.get("part_name") or "").strip()
+        if task_id:
+            qs = qs.filter(task_id=task_id)
+        if target_type and target_id:
+            qs = _publish_queryset(target_type, target_id, task_id, software_filter)
+        if params.get("project_id"):
+            qs = qs.filter(project_id=params.get("project_id"))
+        if software_filter:
+            qs = qs.filter(software=software_filter)
+        context_filters = {
+            column: (params.get(key) or "").strip()
+            for key, column in (("seq", "seq_code"), ("shot", "shot_code"), ("dept", "dept"), ("artist", "artist_name"))
+            if (params.get(key) or "").strip()
+        }
+        qs = qs.filter(**context_filters)
+        if asset_filter:
+            qs = qs.filter(asset_name__iexact=asset_filter)
+        if part_filter:
+            qs = qs.filter(part_name__iexact=part_filter)
+
+        if latest_per_part:
+            # AssetPart holds one row per part pointing at its latest publish, so this reads O(parts) rows.
+            parts_qs = AssetPart.objects.all()
+            if task_id:
+                parts_qs = parts_qs.filter(latest_publish__task_id=task_id)
+            if target_type and target_id:
+                content_type, _ = _resolve_target(target_type, target_id)
+                if not content_type:
+                    return _ok([])
+                parts_qs = parts_qs.filter(
+                    latest_publish__target_content_type=content_type,
+                    latest_publish__target_object_id=int(target_id),
+                )
+            if params.get("project_id"):
+                parts_qs = parts_qs.filter(project_id=params.get("project_id"))
+            if software_filter:
+                parts_qs = parts_qs.filter(latest_publish__software=software_filter)
+            parts_qs = parts_qs.filter(**context_filters)
+            if asset_filter:
+                parts_qs = parts_qs.filter(asset_name__iexact=asset_filter)
+            if part_filter:
+                parts_qs = parts_qs.filter(part_name__iexact=part_filter)
+            # Parts of the same name from several shots/artists collapse to the newest one in SQL (DISTINCT ON).
+            return _list_response(
+                request,
+                params,
+                parts_qs.annotate(part_key=Lower("part_name")).distinct("part_key"),
+                ("part_key", "-source_version", "-source_iteration", "-latest_publish__published_at", "-latest_publish_id"),
+                _LATEST_PART_FIELDS,
+                cursor_fields=("part_key",),
+                stamp_qs=parts_qs,
+            )
+
+        if params.get("include_components") in {"1", "true", "True", True}:
+            params["include"] = ",".join(dict.fromkeys(_split_param(params.get("include")) + ["components"]))
+        return _list_response(
+            request,
+            params,
+            with_is_latest(qs),
+            ("-published_at", "-id"),
+            _PUBLISH_FIELDS,
+            _PUBLISH_INCLUDES,
+            finish=_finish_publish_rows,
+        )
+
+    # POST -> create publish
+    if not (_is_local_request(request) or _has_valid_pm_token(request)):
+        return _err("Forbidden", status=403)
 
-    layer_warning = None
     try:
-        layer_warning = _rebuild_shared_usd_layers(publish)
-    except Exception as exc:
-        layer_warning = f"Shared layer rebuild failed: {exc}"
+        prepared = _prepare_publish(params)
+    except _PublishError as exc:
+        return _err(str(exc), status=exc.status)
+    publish = prepared["publish"]
+    if not (publish.source_version and publish.source_iteration):
+        publish.source_version, publish.source_iteration = allocate_publish_numbers(*prepared["stream_key"], bump=prepared["bump"])
+
+    with transaction.atomic():
+        # post_save makes it the latest of its stream (target + task + software).
+        publish.save()
+        register_asset_part(publish)
+        _write_components_and_links([prepared])
+        publish_events.notify_publishes([publish])
+
+    layer_job, layer_warning = _enqueue_layer_job(publish)
 
     response_data = {
         "publish_id": publish.id,
@@ -1285,9 +1538,11 @@ def api_publishes(request: HttpRequest):
         # Backward-compatible keys for older clients.
         "version": publish.source_version,
         "iteration": publish.source_iteration,
-        "is_latest": publish.is_latest,
-        "part_name": part_name,
-        "part_usd_path": stable_part_path,
+        "is_latest": True,
+        "part_name": prepared["part_name"],
+        "part_usd_path": prepared["stable_part_path"],
+        "layer_job_id": layer_job.id if layer_job else None,
+        "layer_job_status": layer_job.status if layer_job else None,
     }
     if layer_warning:
         response_data["layer_warning"] = layer_warning
@@ -1295,3 +1550,349 @@ def api_publishes(request: HttpRequest):
     return _ok(response_data, status=201)
 
 
+@csrf_exempt
+@idempotent
+def api_publishes_batch(request: HttpRequest):
+    """Create many part publishes in one transaction.
+
+    Body: {"publishes": [{...}, ...], ...}. Keys outside "publishes" are defaults merged into every item,
+    so a typical FX batch sends task_id/software/version once and only item/asset USD paths per part.
+    """
+    if request.method != "POST":
+        return _err("Method not allowed", status=405)
+    if not (_is_local_request(request) or _has_valid_pm_token(request)):
+        return _err("Forbidden", status=403)
+
+    params = _params(request)
+    items = params.pop("publishes", None)
+    if isinstance(items, str):
+        try:
+            items = json.loads(items)
+        except Exception:
+            items = None
+    if not isinstance(items, list) or not items:
+        return _err("Provide a non-empty publishes list")
+    if len(items) > MAX_PUBLISH_BATCH:
+        return _err(f"Too many publishes in one batch (max {MAX_PUBLISH_BATCH})")
+
+    cache: Dict[Any, Any] = {}
+    prepared_items = []
+    results: list[Dict[str, Any]] = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            results.append({"index": index, "ok": False, "error": "Publish entry must be an object"})
+            continue
+        try:
+            prepared = _prepare_publish({**params, **item}, cache)
+        except _PublishError as exc:
+            results.append({"index": index, "ok": False, "error": str(exc)})
+            continue
+        prepared["index"] = index
+        prepared_items.append(prepared)
+    if len(prepared_items) != len(items):
+        return _err("One or more publishes are invalid; nothing was created", extra={"results": results})
+
+    # Group by stream (target + task + software); numbers are allocated once per stream and the last
+    # item of each stream in request order becomes the latest publish, as sequential POSTs would leave it.
+    streams: Dict[tuple, list[Dict[str, Any]]] = {}
+    for prepared in prepared_items:
+        streams.setdefault(prepared["stream_key"], []).append(prepared)
+
+    for stream_key, stream_items in streams.items():
+        missing = [p for p in stream_items if not (p["publish"].source_version and p["publish"].source_iteration)]
+        if missing:
+            version, iteration = allocate_publish_numbers(*stream_key, bump=missing[0]["bump"])
+            for prepared in missing:
+                prepared["publish"].source_version = version
+                prepared["publish"].source_iteration = iteration
+        stream_items[-1]["is_latest"] = True
+
+    with transaction.atomic():
+        publishes = Publish.objects.bulk_create([prepared["publish"] for prepared in prepared_items])
+        mark_latest_publishes(publishes)
+        register_asset_parts(publishes)
+        _write_components_and_links(prepared_items)
+        # bulk_create sends no post_save, so drop the cached reads of every written scope here.
+        for project_id, shot_code in {(publish.project_id, publish.shot_code) for publish in publishes}:
+            api_cache.invalidate(project_id, shot_code)
+        change_events.record_many("publish", [(publish.id, publish.project_id) for publish in publishes], "created")
+        publish_events.notify_publishes(publishes)
+
+    # One rebuild per shared root covers the whole asset -> artist -> dept -> shot -> seq chain.
+    scopes: Dict[str, list[Publish]] = {}
+    for publish in publishes:
+        context = extract_usd_context(publish.asset_usd_path or "")
+        if context:
+            scopes.setdefault(context["shared_root"], []).append(publish)
+    layer_jobs = {}
+    layer_warnings = []
+    for shared_root, scope_publishes in scopes.items():
+        layer_job, layer_warning = _enqueue_layer_job(
+            scope_publishes[-1],
+            [publish.asset_usd_path for publish in scope_publishes],
+        )
+        if layer_job:
+            layer_jobs[shared_root] = layer_job
+        if layer_warning:
+            layer_warnings.append(layer_warning)
+
+    for prepared in prepared_items:
+        publish = prepared["publish"]
+        context = extract_usd_context(publish.asset_usd_path or "")
+        layer_job = layer_jobs.get(context["shared_root"]) if context else None
+        results.append(
+            {
+                "index": prepared["index"],
+                "ok": True,
+                "publish_id": publish.id,
+                "source_version": publish.source_version,
+                "source_iteration": publish.source_iteration,
+                "is_latest": prepared.get("is_latest", False),
+                "part_name": prepared["part_name"],
+                "part_usd_path": prepared["stable_part_path"],
+                "layer_job_id": layer_job.id if layer_job else None,
+            }
+        )
+
+    response_data: Dict[str, Any] = {
+        "results": results,
+        "layer_jobs": [{"id": job.id, "status": job.status} for job in layer_jobs.values()],
+    }
+    if layer_warnings:
+        response_data["layer_warnings"] = layer_warnings
+    return _ok(response_data, status=201)
+
+
+def api_cache_stats(request: HttpRequest):
+    if request.method != "GET":
+        return _err("Method not allowed", status=405)
+    return _ok(api_cache.stats())
+
+
+def api_publish_events(request: HttpRequest):
+    """Server-sent events of new publishes, optionally filtered by project_id, seq, shot and dept."""
+    if request.method != "GET":
+        return _err("Method not allowed", status=405)
+    params = _params(request)
+    subscription = publish_events.listener.subscribe(
+        {
+            "project_id": _parse_int(params.get("project_id"), 0),
+            **{key: (params.get(key) or "").strip() for key in ("seq", "shot", "dept")},
+        }
+    )
+    keepalive = settings.SSE_KEEPALIVE_SECONDS
+
+    def events():
+        try:
+            yield f"retry: {settings.SSE_RETRY_MS}\n\n"
+            while True:
+                event = subscription.get(timeout=keepalive)
+                if event is None:
+                    yield ": keepalive\n\n"
+                elif event.get("resync"):
+                    yield "event: resync\ndata: {}\n\n"
+                else:
+                    yield f"id: {event['publish_id']}\nevent: publish\ndata: {json.dumps(event)}\n\n"
+        finally:
+            publish_events.listener.unsubscribe(subscription)
+
+    response = StreamingHttpResponse(events(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+def api_changes(request: HttpRequest):
+    if request.method != "GET":
+        return _err("Method not allowed", status=405)
+    params = _params(request)
+    since = params.get("since")
+    limit = min(_parse_int(params.get("limit"), settings.API_PAGE_SIZE), settings.API_MAX_PAGE_SIZE)
+    try:
+        events, next_since, has_more = change_events.changes_since(
+            None if since in (None, "") else _parse_int(since, 0),
+            project_id=_parse_int(params.get("project_id"), 0) or None,
+            limit=max(1, limit),
+        )
+    except change_events.ChangeLogGap:
+        return _err("Events after this point were purged; reload and restart from since=", status=410)
+    data = [
+        {
+            "seq": event.id,
+            "entity": event.entity,
+            "id": event.entity_id,
+            "project_id": event.project_id,
+            "action": event.action,
+            "at": event.created_at,
+        }
+        for event in events
+    ]
+    return _ok(data, extra={"next_since": next_since, "has_more": has_more})
+
+
+@csrf_exempt
+def api_layer_jobs(request: HttpRequest):
+    params = _params(request)
+    if request.method != "GET":
+        return _err("Method not allowed", status=405)
+    job_id = params.get("id")
+    if job_id:
+        job = LayerRebuildJob.objects.filter(id=_parse_int(job_id, 0)).first()
+        if not job:
+            return _err("Layer job not found", status=404)
+        return _ok(serialize_job(job))
+    qs = LayerRebuildJob.objects.all()
+    if params.get("project_id"):
+        qs = qs.filter(project_id=params.get("project_id"))
+    if params.get("publish_id"):
+        qs = qs.filter(publish_id=params.get("publish_id"))
+    if params.get("status"):
+        qs = qs.filter(status=params.get("status"))
+    return _ok([serialize_job(job) for job in qs.order_by("-requested_at", "-id")[:200]])
+
+
+# -------- Batch --------
+MAX_BATCH_REQUESTS = 50
+# Parent headers a sub-request keeps (host and credentials); conditional and body headers are per sub-request.
+_BATCH_INHERITED_META = ("REMOTE_ADDR", "SERVER_NAME", "SERVER_PORT", "HTTP_HOST", "HTTP_AUTHORIZATION", "HTTP_X_PM_TOKEN")
+# These commit on the raw connection themselves, so they cannot take part in an atomic batch.
+_BATCH_SELF_COMMITTING = {"api_scenes_next", "api_scenes_record", "api_scenes_reserve", "api_scenes_confirm"}
+# Streaming views hold resources (e.g. a listener subscription) from the call on; they are refused before running.
+_BATCH_STREAMING = {"api_publish_events"}
+# A param value "$<index>.<path>" is replaced by that field of an earlier result, e.g. "$0.body.data.id".
+_BATCH_REFERENCE = re.compile(r"^\$(\d+)((?:\.[\w-]+)+)$")
+
+
+def _resolve_batch_references(params: Dict[str, Any], results: list[Dict[str, Any]]) -> Dict[str, Any]:
+    resolved = {}
+    for key, value in params.items():
+        match = _BATCH_REFERENCE.match(value) if isinstance(value, str) else None
+        if match:
+            index = int(match.group(1))
+            if index >= len(results):
+                raise ValueError(f"{value} refers to a later sub-request")
+            value = results[index]
+            for step in match.group(2)[1:].split("."):
+                if isinstance(value, list) and step.isdigit() and int(step) < len(value):
+                    value = value[int(step)]
+                elif isinstance(value, dict) and step in value:
+                    value = value[step]
+                else:
+                    raise ValueError(f"{match.group(0)} does not resolve")
+        resolved[key] = value
+    return resolved
+
+
+def _batch_subrequest(parent: HttpRequest, method: str, path: str, params: Dict[str, Any], headers: Dict[str, Any]) -> HttpRequest:
+    sub = HttpRequest()
+    sub.method = method
+    sub.path = sub.path_info = path
+    sub.META = {key: parent.META[key] for key in _BATCH_INHERITED_META if key in parent.META}
+    sub.META["REQUEST_METHOD"] = method
+    sub.META["PATH_INFO"] = path
+    for name, value in headers.items():
+        sub.META["HTTP_" + str(name).upper().replace("-", "_")] = str(value)
+    if method == "GET":
+        query = QueryDict(mutable=True)
+        for key, value in params.items():
+            query.setlist(key, [str(item) for item in value] if isinstance(value, list) else [str(value)])
+        sub.GET = query
+        sub.META["QUERY_STRING"] = query.urlencode()
+    else:
+        sub._body = json.dumps(params).encode("utf-8")
+        sub.content_type = "application/json"
+        sub.META["CONTENT_TYPE"] = "application/json"
+        sub.META["CONTENT_LENGTH"] = str(len(sub._body))
+    for attribute in ("user", "session"):
+        if hasattr(parent, attribute):
+            setattr(sub, attribute, getattr(parent, attribute))
+    return sub
+
+
+def _run_batch_entry(request: HttpRequest, entry: Any, results: list[Dict[str, Any]], atomic: bool) -> Dict[str, Any]:
+    if not isinstance(entry, dict):
+        return {"status": 400, "body": {"ok": False, "error": "Sub-request must be an object"}}
+    method = str(entry.get("method") or "GET").upper()
+    path = str(entry.get("path") or "").split("?", 1)[0]
+    params = entry.get("params") or {}
+    headers = entry.get("headers") or {}
+    if method not in {"GET", "POST"} or not isinstance(params, dict) or not isinstance(headers, dict):
+        return {"status": 400, "body": {"ok": False, "error": "Sub-request needs method GET/POST and object params/headers"}}
+    try:
+        match = resolve(path)
+    except Resolver404:
+        match = None
+    if match is None or not path.startswith("/api/") or match.url_name == "api_batch":
+        return {"status": 404, "body": {"ok": False, "error": f"Not a batchable API path: {path}"}}
+    if atomic and match.url_name in _BATCH_SELF_COMMITTING:
+        return {"status": 400, "body": {"ok": False, "error": f"{path} cannot run inside an atomic batch"}}
+    if match.url_name in _BATCH_STREAMING or params.get("stream") in {"1", "true", "True", True, 1}:
+        return {"status": 400, "body": {"ok": False, "error": "Streaming responses cannot be batched"}}
+    try:
+        params = _resolve_batch_references(params, results)
+    except ValueError as exc:
+        return {"status": 400, "body": {"ok": False, "error": str(exc)}}
+
+    try:
+        response = match.func(_batch_subrequest(request, method, path, params, headers), *match.args, **match.kwargs)
+    except Exception as exc:  # noqa: BLE001
+        # Earlier sub-requests may have committed; their results still have to reach the client.
+        logger.exception("Batch sub-request %s %s failed", method, path)
+        return {"status": 500, "body": {"ok": False, "error": f"Internal error: {exc}"}}
+    if response.streaming:
+        # Safety net for streaming views missing from _BATCH_STREAMING.
+        response.close()
+        return {"status": 400, "body": {"ok": False, "error": "Streaming responses cannot be batched"}}
+    result: Dict[str, Any] = {"status": response.status_code}
+    if response.content:
+        try:
+            result["body"] = json.loads(response.content)
+        except ValueError:
+            result["body"] = response.content.decode("utf-8", "replace")
+    if response.has_header("ETag"):
+        result["etag"] = response["ETag"]
+    return result
+
+
+@csrf_exempt
+def api_batch(request: HttpRequest):
+    """Run several API requests in one round trip.
+
+    Body: {"requests": [{"method": "GET", "path": "/api/shots/", "params": {...}, "headers": {...}}, ...],
+    "atomic": false}. Sub-requests run in order with the caller's credentials; a param "$0.body.data.id"
+    takes that field from an earlier result. With "atomic", they share one transaction that is rolled back
+    at the first sub-request answering 4xx/5xx, and later ones don't run.
+    """
+    if request.method != "POST":
+        return _err("Method not allowed", status=405)
+    params = _params(request)
+    entries = params.get("requests")
+    if isinstance(entries, str):
+        try:
+            entries = json.loads(entries)
+        except ValueError:
+            entries = None
+    if not isinstance(entries, list) or not entries:
+        return _err("Provide a non-empty requests list")
+    if len(entries) > MAX_BATCH_REQUESTS:
+        return _err(f"Too many sub-requests in one batch (max {MAX_BATCH_REQUESTS})")
+    atomic = params.get("atomic") in {True, 1, "1", "true", "True"}
+
+    results: list[Dict[str, Any]] = []
+    if not atomic:
+        for entry in entries:
+            results.append(_run_batch_entry(request, entry, results, atomic=False))
+        return _ok(results)
+
+    with transaction.atomic():
+        for index, entry in enumerate(entries):
+            result = _run_batch_entry(request, entry, results, atomic=True)
+            results.append(result)
+            if result["status"] >= 400:
+                transaction.set_rollback(True)
+                return _err(
+                    f"Sub-request {index} failed; the batch was rolled back",
+                    status=result["status"],
+                    extra={"data": results},
+                )
+    return _ok(results)
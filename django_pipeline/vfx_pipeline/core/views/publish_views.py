@@ -1,15 +1,26 @@
 from __future__ import annotations
 
-import os
 from dataclasses import dataclass
-from pathlib import PurePosixPath
 from typing import Optional
 
+from django.db.models import Q
 from django.shortcuts import render
 
 from core.models import Project, Publish
 
 
+# Labels shown for publishes whose asset/part columns are blank; the detail page links carry them back.
+UNKNOWN_ASSET = "unknown_asset"
+UNKNOWN_PART = "unknown_part"
+
+
+def _label_filter(column: str, label: str, unknown: str) -> Q:
+    # The list page groups blank names under the unknown label, so its detail link has to match both.
+    if label == unknown:
+        return Q(**{column: ""}) | Q(**{column: unknown})
+    return Q(**{column: label})
+
+
 @dataclass
 class PublishRow:
     publish: Publish
@@ -18,54 +29,29 @@ class PublishRow:
     preview_path: str
 
 
-def _path_to_posix(value: str) -> str:
-    return str(value or "").replace("\\", "/")
-
-
-def _derive_asset_part(publish: Publish) -> tuple[str, str]:
-    metadata = publish.metadata or {}
-    asset_name = str(metadata.get("asset") or metadata.get("asset_name") or "").strip()
-    part_name = str(metadata.get("fx_layer") or metadata.get("part_name") or "").strip()
-
-    if asset_name and part_name:
-        return asset_name, part_name
-
-    path = _path_to_posix(publish.asset_usd_path or publish.item_usd_path or "")
-    if not path:
-        return asset_name or "unknown_asset", part_name or "unknown_part"
-
-    # Expected convention: .../usd/<asset>/<part>/<file>.usd
-    parts = [p for p in PurePosixPath(path).parts if p not in {"/", ""}]
-    if "usd" in parts:
-        usd_idx = parts.index("usd")
-        if not asset_name and len(parts) > usd_idx + 1:
-            asset_name = parts[usd_idx + 1]
-        if not part_name and len(parts) > usd_idx + 2:
-            part_name = parts[usd_idx + 2]
-
-    if not part_name:
-        part_name = PurePosixPath(path).parent.name or "unknown_part"
-    if not asset_name:
-        asset_name = PurePosixPath(path).name.split("_")[0] or "unknown_asset"
-    return asset_name, part_name
-
-
-def _publish_rows(project_id: Optional[str] = None) -> list[PublishRow]:
+def _publish_rows(
+    project_id: Optional[str] = None,
+    asset_name: Optional[str] = None,
+    part_name: Optional[str] = None,
+) -> list[PublishRow]:
     qs = Publish.objects.select_related("project", "task", "created_by").order_by("-published_at")
     if project_id:
         qs = qs.filter(project_id=project_id)
+    if asset_name is not None:
+        qs = qs.filter(_label_filter("asset_name", asset_name, UNKNOWN_ASSET))
+    if part_name is not None:
+        qs = qs.filter(_label_filter("part_name", part_name, UNKNOWN_PART))
     # Focus page on Houdini/asset publishes.
     qs = qs.exclude(item_usd_path="").exclude(asset_usd_path="")
 
     rows: list[PublishRow] = []
     for publish in qs:
-        asset_name, part_name = _derive_asset_part(publish)
         preview_path = publish.preview_path or ""
         rows.append(
             PublishRow(
                 publish=publish,
-                asset_name=asset_name,
-                part_name=part_name,
+                asset_name=publish.asset_name or UNKNOWN_ASSET,
+                part_name=publish.part_name or UNKNOWN_PART,
                 preview_path=preview_path,
             )
         )
@@ -97,8 +83,7 @@ def publish_detail_page(request):
     part_name = (request.GET.get("part") or "").strip()
     project_id = (request.GET.get("project") or "").strip()
 
-    rows = _publish_rows(project_id or None)
-    rows = [row for row in rows if row.asset_name == asset_name and row.part_name == part_name]
+    rows = _publish_rows(project_id or None, asset_name=asset_name, part_name=part_name)
     latest = rows[0] if rows else None
 
     context = {
@@ -57,6 +57,40 @@ ASSET_SOFTWARES = [
 
 PIPELINE_ROOT = os.environ.get("PIPELINE_ROOT", str(BASE_DIR / "pipeline_workspace"))
 
+# Shared USD layers are rebuilt by `manage.py run_layer_worker`; set to 1 to rebuild inside the publish request instead.
+SHARED_LAYER_REBUILD_INLINE = os.environ.get("PM_LAYER_REBUILD_INLINE", "0").lower() in {"1", "true", "yes", "on"}
+# How long an Idempotency-Key and its stored response are replayed for publish/scene-record POSTs.
+IDEMPOTENCY_KEY_TTL_SECONDS = int(os.environ.get("PM_IDEMPOTENCY_TTL_SECONDS", "86400"))
+# Page size of API list responses once a client pages with `cursor` (no `limit`), and the cap on `limit`.
+# Requests sending neither get every row.
+API_PAGE_SIZE = int(os.environ.get("PM_API_PAGE_SIZE", "500"))
+API_MAX_PAGE_SIZE = int(os.environ.get("PM_API_MAX_PAGE_SIZE", "2000"))
+# Read cache for API list GETs (core.api_cache). LocMem is per process: when several server processes run,
+# point PM_API_CACHE_DIR at a directory they share so write invalidations reach all of them.
+# PM_API_CACHE_TIMEOUT bounds staleness for rows written outside Django (direct-DB pipeline tools).
+API_CACHE_ENABLED = os.environ.get("PM_API_CACHE", "1").lower() in {"1", "true", "yes", "on"}
+API_CACHE_ALIAS = "api"
+API_CACHE_TIMEOUT = int(os.environ.get("PM_API_CACHE_TIMEOUT", "300"))
+# Days of /api/changes/ history kept by `manage.py purge_change_events`; clients further behind get 410 and resync.
+CHANGE_EVENT_RETENTION_DAYS = int(os.environ.get("PM_CHANGE_EVENT_RETENTION_DAYS", "7"))
+# /api/publishes/events/ (SSE): comment line sent to idle clients, and the reconnect delay advertised to them.
+SSE_KEEPALIVE_SECONDS = float(os.environ.get("PM_SSE_KEEPALIVE_SECONDS", "15"))
+SSE_RETRY_MS = int(os.environ.get("PM_SSE_RETRY_MS", "3000"))
+_API_CACHE_DIR = os.environ.get("PM_API_CACHE_DIR", "").strip()
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    API_CACHE_ALIAS: {
+        "BACKEND": (
+            "django.core.cache.backends.filebased.FileBasedCache"
+            if _API_CACHE_DIR
+            else "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": _API_CACHE_DIR or "pm-api",
+        "TIMEOUT": API_CACHE_TIMEOUT,
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    },
+}
+
 # Application definition
 INSTALLED_APPS = [
     'django.contrib.admin',
@@ -64,10 +98,9 @@ INSTALLED_APPS = [
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
-    'django.contrib.staticfiles',
-    
-    # your apps
+    # your apps; ahead of staticfiles so core's runserver (TCP_NODELAY for keep-alive clients) is used
     'core',
+    'django.contrib.staticfiles',
 ]
 
 
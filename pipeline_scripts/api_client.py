@@ -2,7 +2,9 @@ from __future__ import annotations
 
 import json
 import os
-from typing import Any, Dict, Optional
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 from urllib.parse import urlsplit, urlunsplit
 
 
@@ -19,45 +21,244 @@ def _base_url() -> Optional[str]:
     return urlunsplit(normalized_parts).rstrip("/")
 
 
-def _request(method: str, path: str, params: Optional[Dict[str, Any]] = None, data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-    base = _base_url()
-    if not base:
-        raise RuntimeError("PIPELINE_API_BASE is not set")
-    url = f"{base}{path}"
+# (connect, read) timeouts in seconds; the longest matching path prefix wins over the per-method default.
+DEFAULT_TIMEOUTS = {"GET": (3.05, 10.0), "POST": (3.05, 15.0)}
+ENDPOINT_TIMEOUTS = {
+    # Publishing may rebuild shared USD layers inline.
+    ("POST", "/api/publishes/"): (3.05, 60.0),
+    ("POST", "/api/batch/"): (3.05, 60.0),
+}
+MAX_RETRIES = 3
+BACKOFF_SECONDS = 0.25
+RETRY_STATUSES = frozenset({502, 503, 504})
+# How long a POST carrying an Idempotency-Key keeps waiting on "409 + Retry-After" (the first attempt of
+# the same key is still running on the server, e.g. after a read timeout) before giving up.
+IN_PROGRESS_WAIT_SECONDS = 120.0
+# Rows per request when api_get_all() pages through a list endpoint.
+PAGE_SIZE = 500
+
+_session_lock = threading.Lock()
+_session: Any = None
+_session_pid: Optional[int] = None
+
+
+class ApiError(RuntimeError):
+    """The API could not be reached, or answered without a JSON body."""
+
+
+def _timeout_for(method: str, path: str) -> Tuple[float, float]:
+    matches = [prefix for (verb, prefix) in ENDPOINT_TIMEOUTS if verb == method and path.startswith(prefix)]
+    if matches:
+        return ENDPOINT_TIMEOUTS[(method, max(matches, key=len))]
+    return DEFAULT_TIMEOUTS.get(method, DEFAULT_TIMEOUTS["POST"])
+
+
+def get_session() -> Any:
+    """The process-wide keep-alive `requests` session, or None when `requests` is not installed."""
+    global _session, _session_pid
     try:
         import requests  # type: ignore
+        from requests.adapters import HTTPAdapter  # type: ignore
+        from urllib3.util.retry import Retry  # type: ignore
+    except ImportError:
+        return None
+    with _session_lock:
+        if _session is None or _session_pid != os.getpid():
+            session = requests.Session()
+            # urllib3 only retries failed connects here: nothing was sent, so that is safe for any method.
+            retry = Retry(total=MAX_RETRIES, connect=MAX_RETRIES, read=0, status=0, other=0, redirect=0, backoff_factor=BACKOFF_SECONDS)
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=retry)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session, _session_pid = session, os.getpid()
+        return _session
 
-        if method.upper() == "GET":
-            resp = requests.get(url, params=params, timeout=10)
-        else:
-            # Send as form-encoded by default
-            resp = requests.post(url, data=data or params, timeout=15)
-        resp.raise_for_status()
-        return resp.json()
-    except Exception:
-        # Fallback to stdlib
-        from urllib.parse import urlencode
-        from urllib.request import Request, urlopen
-
-        if method.upper() == "GET" and params:
+
+def close_session() -> None:
+    global _session, _session_pid
+    with _session_lock:
+        if _session is not None and _session_pid == os.getpid():
+            _session.close()
+        _session = _session_pid = None
+
+
+def _decode(status: int, raw: bytes) -> Dict[str, Any]:
+    try:
+        return json.loads(raw.decode("utf-8"))
+    except ValueError:
+        # Error pages (proxy 502s, Django 500 HTML) keep the same {"ok": False} shape callers check.
+        return {"ok": False, "error": f"HTTP {status}: invalid JSON response", "status": status, "raw": raw.decode("utf-8", "replace")[:2000]}
+
+
+def _retry_after(headers: Any) -> Optional[float]:
+    value = (headers or {}).get("Retry-After")
+    try:
+        return max(0.0, float(value)) if value not in (None, "") else None
+    except ValueError:
+        return None
+
+
+def _send_urllib(method: str, url: str, params, data, headers, timeout: Tuple[float, float]) -> Tuple[int, bytes, Any]:
+    from urllib.error import HTTPError
+    from urllib.parse import urlencode
+    from urllib.request import Request, urlopen
+
+    request_headers = dict(headers or {})
+    if method == "GET":
+        if params:
             url = url + ("?" + urlencode(params))
-            body = None
-            headers = {}
+        body = None
+    else:
+        body = urlencode(data or params or {}).encode("utf-8")
+        request_headers["Content-Type"] = "application/x-www-form-urlencoded"
+    req = Request(url, data=body, headers=request_headers, method=method)
+    try:
+        with urlopen(req, timeout=max(timeout)) as resp:  # nosec - internal
+            return resp.status, resp.read(), resp.headers
+    except HTTPError as exc:
+        return exc.code, exc.read(), exc.headers
+
+
+def _request(
+    method: str,
+    path: str,
+    params: Optional[Dict[str, Any]] = None,
+    data: Optional[Dict[str, Any]] = None,
+    headers: Optional[Dict[str, str]] = None,
+    idempotent: Optional[bool] = None,
+    timeout: Optional[Tuple[float, float]] = None,
+) -> Dict[str, Any]:
+    """Send one API call and return its JSON body, including {"ok": false, ...} error bodies.
+
+    GETs, and POSTs that are `idempotent` or carry an Idempotency-Key, are retried with exponential
+    backoff after timeouts, dropped connections and 502/503/504. A keyed POST answered 409 with Retry-After
+    (an earlier attempt is still running) waits as told, up to IN_PROGRESS_WAIT_SECONDS, and asks again for
+    the stored result. Other POSTs are sent exactly once. Raises ApiError when the server cannot be reached.
+    """
+    base = _base_url()
+    if not base:
+        raise RuntimeError("PIPELINE_API_BASE is not set")
+    method = method.upper()
+    url = f"{base}{path}"
+    timeout = timeout or _timeout_for(method, path)
+    keyed = any(key.lower() == "idempotency-key" for key in (headers or {}))
+    if idempotent is None:
+        idempotent = method == "GET" or keyed
+    attempts = MAX_RETRIES + 1 if idempotent else 1
+    session = get_session()
+    attempt = 0
+    waited = 0.0
+    while True:
+        try:
+            if session is None:
+                status, raw, response_headers = _send_urllib(method, url, params, data, headers, timeout)
+            elif method == "GET":
+                resp = session.get(url, params=params, headers=headers, timeout=timeout)
+                status, raw, response_headers = resp.status_code, resp.content, resp.headers
+            else:
+                # Send as form-encoded by default
+                resp = session.post(url, data=data or params, headers=headers, timeout=timeout)
+                status, raw, response_headers = resp.status_code, resp.content, resp.headers
+        except OSError as exc:  # requests.RequestException is an OSError too
+            if attempt + 1 >= attempts:
+                raise ApiError(f"{method} {path} failed: {exc}") from exc
         else:
-            body = urlencode(data or params or {}).encode("utf-8")
-            headers = {"Content-Type": "application/x-www-form-urlencoded"}
-        req = Request(url, data=body, headers=headers, method=method.upper())
-        with urlopen(req, timeout=15) as resp:  # nosec - internal
-            raw = resp.read().decode("utf-8")
-            try:
-                return json.loads(raw)
-            except Exception:
-                return {"ok": False, "error": "Invalid JSON response", "raw": raw}
+            delay = _retry_after(response_headers) if keyed and status == 409 else None
+            if delay is not None and waited < IN_PROGRESS_WAIT_SECONDS:
+                delay = min(max(delay, BACKOFF_SECONDS), IN_PROGRESS_WAIT_SECONDS - waited)
+                waited += delay
+                time.sleep(delay)
+                continue
+            if status not in RETRY_STATUSES or attempt + 1 >= attempts:
+                return _decode(status, raw)
+        attempt += 1
+        time.sleep(BACKOFF_SECONDS * (2 ** (attempt - 1)))
+
+
+def api_get(path: str, params: Optional[Dict[str, Any]] = None, timeout: Optional[Tuple[float, float]] = None) -> Dict[str, Any]:
+    return _request("GET", path, params=params, timeout=timeout)
+
+
+def api_post(
+    path: str,
+    data: Optional[Dict[str, Any]] = None,
+    headers: Optional[Dict[str, str]] = None,
+    idempotent: Optional[bool] = None,
+    timeout: Optional[Tuple[float, float]] = None,
+) -> Dict[str, Any]:
+    """POST form data; pass `idempotent=True` for calls that are safe to repeat so they are retried."""
+    return _request("POST", path, data=data, headers=headers, idempotent=idempotent, timeout=timeout)
+
+
+def api_get_all(path: str, params: Optional[Dict[str, Any]] = None) -> List[Any]:
+    """GET a paged list endpoint and follow `next_cursor` until every row has been read."""
+    query = {"limit": PAGE_SIZE, **(params or {})}
+    rows: List[Any] = []
+    while True:
+        resp = api_get(path, query)
+        if not resp.get("ok"):
+            raise RuntimeError(f"API error: {resp}")
+        rows.extend(resp.get("data") or [])
+        cursor = resp.get("next_cursor")
+        if not cursor:
+            return rows
+        query["cursor"] = cursor
+
+
+def api_stream(path: str, params: Optional[Dict[str, Any]] = None, timeout: float = 300) -> Iterator[Dict[str, Any]]:
+    """Yield every row of a list endpoint from its `stream=1` NDJSON response, one line at a time."""
+    base = _base_url()
+    if not base:
+        raise RuntimeError("PIPELINE_API_BASE is not set")
+    query = {**(params or {}), "stream": 1}
+    session = get_session()
+    if session is not None:
+        with session.get(f"{base}{path}", params=query, timeout=(DEFAULT_TIMEOUTS["GET"][0], timeout), stream=True) as resp:
+            resp.raise_for_status()
+            for line in resp.iter_lines():
+                if line.strip():
+                    yield json.loads(line)
+        return
+    from urllib.parse import urlencode
+    from urllib.request import urlopen
+
+    with urlopen(f"{base}{path}?{urlencode(query)}", timeout=timeout) as resp:  # nosec - internal
+        for line in resp:
+            if line.strip():
+                yield json.loads(line)
+
+
+class Batch:
+    """Collect API calls and send them to `/api/batch/` in one round trip.
+
+    `get`/`post` return the sub-request's index; `Batch.ref(index, "data.id")` passes a field of an
+    earlier result as a param. With `atomic=True` the server runs every call in one transaction.
+    """
+
+    def __init__(self, atomic: bool = False) -> None:
+        self.atomic = atomic
+        self.requests: List[Dict[str, Any]] = []
+
+    @staticmethod
+    def ref(index: int, field: str) -> str:
+        return f"${index}.body.{field}"
 
+    def _add(self, method: str, path: str, params: Optional[Dict[str, Any]], headers: Optional[Dict[str, str]]) -> int:
+        entry: Dict[str, Any] = {"method": method, "path": path, "params": params or {}}
+        if headers:
+            entry["headers"] = headers
+        self.requests.append(entry)
+        return len(self.requests) - 1
 
-def api_get(path: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-    return _request("GET", path, params=params)
+    def get(self, path: str, params: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None) -> int:
+        return self._add("GET", path, params, headers)
 
+    def post(self, path: str, data: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None) -> int:
+        return self._add("POST", path, data, headers)
 
-def api_post(path: str, data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-    return _request("POST", path, data=data)
+    def send(self) -> List[Dict[str, Any]]:
+        """Run the batch; returns each sub-request's {"status", "body"} in order."""
+        resp = api_post("/api/batch/", {"requests": json.dumps(self.requests), "atomic": "1" if self.atomic else "0"})
+        if not resp.get("ok"):
+            raise RuntimeError(f"API error: {resp}")
+        return resp.get("data") or []
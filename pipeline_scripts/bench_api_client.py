@@ -0,0 +1,51 @@
+"""Round-trip latency of sequential API calls: a new connection per call vs the keep-alive session.
+
+Usage: PIPELINE_API_BASE=http://127.0.0.1:8002 python -m pipeline_scripts.bench_api_client [--calls 100] [--path /api/projects/]
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+from typing import Callable, List
+
+from pipeline_scripts import api_client
+
+
+def _time_calls(call: Callable[[], object], calls: int) -> List[float]:
+    call()  # warm-up: DNS, first connection, server-side caches
+    timings = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        call()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def _report(label: str, timings: List[float]) -> None:
+    ordered = sorted(timings)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    print(
+        f"{label:<28} total {sum(timings):8.1f} ms  mean {statistics.mean(timings):6.2f} ms  "
+        f"p50 {statistics.median(timings):6.2f} ms  p95 {p95:6.2f} ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=100)
+    parser.add_argument("--path", default="/api/projects/")
+    args = parser.parse_args()
+
+    import requests  # type: ignore
+
+    url = f"{api_client._base_url()}{args.path}"
+    print(f"{args.calls} sequential GET {url}")
+    # What api_client did before: a module-level requests.get, i.e. a new TCP connection per call.
+    _report("new connection per call", _time_calls(lambda: requests.get(url, timeout=10).json(), args.calls))
+    _report("keep-alive session", _time_calls(lambda: api_client.api_get(args.path), args.calls))
+    api_client.close_session()
+
+
+if __name__ == "__main__":
+    main()
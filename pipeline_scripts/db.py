@@ -1,8 +1,12 @@
+import atexit
 import os
+import threading
+import time
 from contextlib import contextmanager
-from typing import Dict
+from typing import Dict, Optional
 
 import psycopg2
+from psycopg2 import extensions, pool
 
 REQUIRED_DB_VARS = [
     ("DB_NAME", "PIPELINE_DB_NAME", "dbname"),
@@ -29,11 +33,201 @@ def get_db_params_from_env() -> Dict[str, str]:
     return params
 
 
+def _env_number(name: str, default: float) -> float:
+    value = os.environ.get(name)
+    try:
+        return float(value) if value not in (None, "") else default
+    except ValueError:
+        return default
+
+
+class PipelineConnectionPool(pool.ThreadedConnectionPool):
+    """ThreadedConnectionPool that waits for a free slot, checks stale connections and closes idle ones.
+
+    Up to `keep_idle` connections stay open between checkouts; at most `maxconn` are open at once.
+    Connections nobody used for `idle_timeout` seconds are closed, and one idle for longer than
+    `check_after` seconds is tested with SELECT 1 before it is handed out.
+    """
+
+    def __init__(
+        self,
+        keep_idle: int,
+        maxconn: int,
+        idle_timeout: float = 300.0,
+        check_after: float = 30.0,
+        wait_timeout: float = 30.0,
+        **kwargs,
+    ) -> None:
+        # Start empty: the parent would open `minconn` connections up front.
+        super().__init__(0, maxconn, **kwargs)
+        self.minconn = max(0, min(keep_idle, maxconn))
+        self.idle_timeout = idle_timeout
+        self.check_after = check_after
+        self.wait_timeout = wait_timeout
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._idle_since: Dict[int, float] = {}
+        self._stats = {
+            "checkouts": 0,
+            "waits": 0,
+            "wait_seconds_total": 0.0,
+            "wait_seconds_max": 0.0,
+            "connects": 0,
+            "discarded": 0,
+            "reaped": 0,
+        }
+
+    def _connect(self, key=None):
+        # Called by getconn with the pool lock held.
+        self._stats["connects"] += 1
+        return super()._connect(key)
+
+    def acquire(self):
+        started = time.monotonic()
+        if not self._slots.acquire(timeout=self.wait_timeout):
+            raise pool.PoolError(f"no database connection free after {self.wait_timeout:g}s")
+        waited = time.monotonic() - started
+        try:
+            with self._lock:
+                self._stats["checkouts"] += 1
+                if waited > 0.001:
+                    self._stats["waits"] += 1
+                    self._stats["wait_seconds_total"] += waited
+                    self._stats["wait_seconds_max"] = max(self._stats["wait_seconds_max"], waited)
+            self.reap_idle()
+            while True:
+                conn = self.getconn()
+                idle_for = time.monotonic() - self._idle_since.pop(id(conn), time.monotonic())
+                if conn.closed or (idle_for > self.check_after and not self._healthy(conn)):
+                    with self._lock:
+                        self._stats["discarded"] += 1
+                    self.putconn(conn, close=True)
+                    continue
+                return conn
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, conn) -> None:
+        close = conn.closed or conn.info.transaction_status == extensions.TRANSACTION_STATUS_UNKNOWN
+        if not close:
+            try:
+                if conn.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+                if conn.autocommit:
+                    conn.autocommit = False
+            except psycopg2.Error:
+                close = True
+        try:
+            if self.closed:
+                # The pool was replaced (DB settings changed) while this connection was out.
+                conn.close()
+                return
+            self.putconn(conn, close=close)
+            with self._lock:
+                if any(pooled is conn for pooled in self._pool):
+                    self._idle_since[id(conn)] = time.monotonic()
+        finally:
+            self._slots.release()
+
+    @staticmethod
+    def _healthy(conn) -> bool:
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def reap_idle(self) -> int:
+        """Close pooled connections unused for longer than idle_timeout; returns how many were closed."""
+        cutoff = time.monotonic() - self.idle_timeout
+        with self._lock:
+            if self.closed:
+                return 0
+            stale = [conn for conn in self._pool if self._idle_since.get(id(conn), cutoff) <= cutoff]
+            for conn in stale:
+                self._pool.remove(conn)
+                self._idle_since.pop(id(conn), None)
+                conn.close()
+            self._stats["reaped"] += len(stale)
+        return len(stale)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "open": len(self._pool) + len(self._used),
+                "idle": len(self._pool),
+                "in_use": len(self._used),
+                "max": self.maxconn,
+                **self._stats,
+            }
+
+
+_pool_lock = threading.Lock()
+_pool: Optional[PipelineConnectionPool] = None
+_pool_key: Optional[tuple] = None
+
+
+def pooling_enabled() -> bool:
+    return os.environ.get("PIPELINE_DB_POOL", "1").lower() not in {"0", "false", "no", "off"}
+
+
+def get_pool() -> PipelineConnectionPool:
+    """The process-wide pool for the current DB_* settings; rebuilt if they change or the process forked."""
+    global _pool, _pool_key
+    params = get_db_params_from_env()
+    key = (os.getpid(), tuple(sorted(params.items())))
+    with _pool_lock:
+        if _pool is None or _pool_key != key:
+            if _pool is not None and _pool_key[0] == os.getpid():
+                _pool.closeall()
+            _pool = PipelineConnectionPool(
+                keep_idle=int(_env_number("PIPELINE_DB_POOL_IDLE", 2)),
+                maxconn=max(1, int(_env_number("PIPELINE_DB_POOL_MAX", 8))),
+                idle_timeout=_env_number("PIPELINE_DB_POOL_IDLE_TIMEOUT", 300),
+                check_after=_env_number("PIPELINE_DB_POOL_CHECK_AFTER", 30),
+                wait_timeout=_env_number("PIPELINE_DB_POOL_WAIT_TIMEOUT", 30),
+                **params,
+            )
+            _pool_key = key
+        return _pool
+
+
+def close_pool() -> None:
+    global _pool, _pool_key
+    with _pool_lock:
+        if _pool is not None and _pool_key[0] == os.getpid() and not _pool.closed:
+            _pool.closeall()
+        _pool = _pool_key = None
+
+
+atexit.register(close_pool)
+
+
+def pool_stats() -> Dict[str, float]:
+    """Open/idle/in-use counts and wait times of the process pool (empty when none was created)."""
+    with _pool_lock:
+        current = _pool
+    return current.stats() if current is not None and not current.closed else {}
+
+
 @contextmanager
 def connection_from_env():
-    params = get_db_params_from_env()
-    conn = psycopg2.connect(**params)
+    """A connection from the process pool, handed back (rolled back if left mid-transaction) on exit.
+
+    PIPELINE_DB_POOL=0 opens and closes a connection per call instead.
+    """
+    if not pooling_enabled():
+        conn = psycopg2.connect(**get_db_params_from_env())
+        try:
+            yield conn
+        finally:
+            conn.close()
+        return
+    connection_pool = get_pool()
+    conn = connection_pool.acquire()
     try:
         yield conn
     finally:
-        conn.close()
+        connection_pool.release(conn)
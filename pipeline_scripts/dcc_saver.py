@@ -1,7 +1,6 @@
 from __future__ import annotations
 
 import os
-import re
 import traceback
 from pathlib import Path
 from typing import Dict, Tuple
@@ -9,10 +8,7 @@ from typing import Dict, Tuple
 from . import db
 from . import versioning
 
-SAVE_EXTENSIONS = {
-    "houdini": ".hip",
-    "maya": ".mb",
-}
+SAVE_EXTENSIONS = versioning.SCENE_EXTENSIONS
 
 SAVE_TYPES_MAYA = {
     ".ma": "mayaAscii",
@@ -112,42 +108,10 @@ def _save_scene(bump: str) -> None:
     try:
         use_api = bool(os.environ.get("PIPELINE_API_BASE") or os.environ.get("API_BASE_URL"))
         if use_api:
-            conn = None  # type: ignore[assignment]
-            version, iteration = versioning.next_numbers(
-                conn, context.task_id, context.software, bump=bump
-            )
-            file_path = _build_scene_path(context, version, iteration)
-            file_path.parent.mkdir(parents=True, exist_ok=True)
-            _perform_save(context.software, file_path)
-            versioning.record_scene(
-                conn,
-                context.task_id,
-                context.artist_id,
-                context.software,
-                str(file_path),
-                version,
-                iteration,
-            )
+            file_path, version, iteration = _reserve_save_confirm(None, context, bump)
         else:
             with db.connection_from_env() as conn:
-                version, iteration = versioning.next_numbers(
-                    conn,
-                    context.task_id,
-                    context.software,
-                    bump=bump,
-                )
-                file_path = _build_scene_path(context, version, iteration)
-                file_path.parent.mkdir(parents=True, exist_ok=True)
-                _perform_save(context.software, file_path)
-                versioning.record_scene(
-                    conn,
-                    context.task_id,
-                    context.artist_id,
-                    context.software,
-                    str(file_path),
-                    version,
-                    iteration,
-                )
+                file_path, version, iteration = _reserve_save_confirm(conn, context, bump)
         os.environ["PIPELINE_SCENE_PATH"] = str(file_path)
         version_label = versioning.format_version_label(version)
         iteration_label = versioning.format_iteration_label(iteration)
@@ -160,6 +124,39 @@ def _save_scene(bump: str) -> None:
         _display_message(f"Pipeline save failed: {exc}", level="error")
 
 
+def _scene_naming(context: PipelineContext) -> Dict[str, str]:
+    return {
+        "artist": context.artist_name,
+        "department": context.department,
+        "task": context.task_name or context.task_folder,
+        "asset": context.asset,
+    }
+
+
+def _reserve_save_confirm(conn, context: PipelineContext, bump: str) -> Tuple[Path, int, int]:
+    # One call reserves the numbers and returns the path; the confirm after the save only flips the row
+    # to saved. It is done before reporting success: a row left pending is hidden from every scene list.
+    scene = versioning.reserve_scene(
+        conn,
+        context.task_id,
+        context.artist_id,
+        context.software,
+        str(context.scene_dir),
+        naming=_scene_naming(context),
+        bump=bump,
+    )
+    file_path = Path(str(scene["file_path"]))
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    _perform_save(context.software, file_path)
+    try:
+        previous_status = versioning.confirm_scene(conn, int(scene["id"]))
+    except Exception as exc:  # noqa: BLE001
+        raise RuntimeError(f"{file_path.name} was saved but could not be recorded as saved: {exc}") from exc
+    if previous_status is None:
+        raise RuntimeError(f"{file_path.name} was saved but its scene record {scene['id']} no longer exists")
+    return file_path, int(scene["version"]), int(scene["iteration"])
+
+
 def _collect_context() -> PipelineContext:
     def _get_any(*keys: str) -> str:
         for key in keys:
@@ -217,39 +214,6 @@ def _collect_context() -> PipelineContext:
     return ctx
 
 
-def _build_scene_path(context: PipelineContext, version: int, iteration: int) -> Path:
-    extension = SAVE_EXTENSIONS.get(context.software, ".scene")
-    parts: list[str] = []
-
-    artist = context.artist_name or f"artist{context.artist_id}"
-    parts.append(_sanitize_name(artist))
-
-    department = context.department or ""
-    if department:
-        parts.append(_sanitize_name(department))
-
-    # Naming spec: {artist}_{dept}_{task}_v{VER:03}_i{ITER:03}.{ext}
-    # TASK is preferred semantic field for scene naming, even if TASK == ASSET.
-    task_label = context.task_name or context.task_folder
-    if task_label:
-        parts.append(_sanitize_name(task_label))
-    elif context.asset:
-        parts.append(_sanitize_name(context.asset))
-    else:
-        parts.append(f"task{context.task_id}")
-
-    base = _sanitize_name("_".join(filter(None, parts)))
-    version_label = versioning.format_version_label(version)
-    iteration_label = versioning.format_iteration_label(iteration)
-    filename = f"{base}_{version_label}_{iteration_label}{extension}"
-    return context.scene_dir / filename
-
-
-def _sanitize_name(value: str) -> str:
-    cleaned = re.sub(r"[^A-Za-z0-9_\-]+", "_", value)
-    return cleaned.strip("_") or "scene"
-
-
 def _perform_save(software: str, file_path: Path) -> None:
     if software == "houdini":
         import hou
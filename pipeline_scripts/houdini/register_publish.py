@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import hashlib
 import json
 import os
 from pathlib import Path
@@ -15,8 +16,9 @@ def _normalize_path(value: str) -> str:
     return Path(os.path.normpath(raw)).as_posix()
 
 
-def _headers(token: str) -> Dict[str, str]:
-    headers = {"Content-Type": "application/json"}
+def _headers(token: str, body: bytes) -> Dict[str, str]:
+    # Retrying the same publish sends the same key, so the server replays the first response.
+    headers = {"Content-Type": "application/json", "Idempotency-Key": hashlib.sha256(body).hexdigest()}
     if token:
         headers["X-PM-Token"] = token
     return headers
@@ -59,8 +61,8 @@ def register_publish_to_pm(
     if iteration is not None:
         payload["iteration"] = int(iteration)
 
-    body = json.dumps(payload).encode("utf-8")
-    request = Request(api_url, data=body, headers=_headers(api_token), method="POST")
+    body = json.dumps(payload, sort_keys=True).encode("utf-8")
+    request = Request(api_url, data=body, headers=_headers(api_token, body), method="POST")
 
     try:
         with urlopen(request, timeout=20) as response:  # nosec - local pipeline service
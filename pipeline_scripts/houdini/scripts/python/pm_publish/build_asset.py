@@ -2,6 +2,7 @@ def build_asset():
     import os, json, hou
     from urllib.request import Request, urlopen
     from urllib.error import HTTPError, URLError
+    from urllib.parse import urlencode
 
     node = hou.pwd()
 
@@ -35,48 +36,49 @@ def build_asset():
         headers["Authorization"] = "Bearer " + token
         headers["X-PM-Token"] = token
 
-    # Fetch publishes for this asset (server may ignore filter; we filter client-side)
-    url = api_url + ("&" if "?" in api_url else "?") + "asset_name=" + asset
-    try:
-        raw = urlopen(Request(url, headers=headers, method="GET"), timeout=20).read().decode("utf-8", "replace")
-    except HTTPError as e:
-        raise RuntimeError("GET publishes failed (HTTP {}): {}".format(
-            e.code, e.read().decode("utf-8", "replace")
-        ))
-    except URLError as e:
-        raise RuntimeError("GET publishes connection failed: {}".format(e))
-
-    data = json.loads(raw)
-    rows = data["data"] if isinstance(data, dict) and "data" in data else data
-
-    # Collect one stable part path per part
+    # Latest publish per part for this asset in the node's shot/dept/artist scope (filtered server-side)
+    query = {
+        "asset": asset,
+        "seq": seq,
+        "shot": shot,
+        "dept": dep_str,
+        "artist": artist,
+        "latest_per_part": 1,
+        "fields": "part_name,part_usd_path",
+    }
+    rows = []
+    while True:
+        url = api_url + ("&" if "?" in api_url else "?") + urlencode(query)
+        try:
+            raw = urlopen(Request(url, headers=headers, method="GET"), timeout=20).read().decode("utf-8", "replace")
+        except HTTPError as e:
+            raise RuntimeError("GET publishes failed (HTTP {}): {}".format(
+                e.code, e.read().decode("utf-8", "replace")
+            ))
+        except URLError as e:
+            raise RuntimeError("GET publishes connection failed: {}".format(e))
+
+        data = json.loads(raw)
+        if not isinstance(data, dict) or "data" not in data:
+            rows.extend(data)
+            break
+        rows.extend(data["data"])
+        # Results are paged; follow the cursor until the last page.
+        if not data.get("next_cursor"):
+            break
+        query["cursor"] = data["next_cursor"]
+
+    # One stable part path per part
     parts = {}  # part_name -> part_usd_path
     for r in rows:
-        md = r.get("metadata") or {}
-        a = (md.get("asset") or r.get("asset_name") or "").strip()
-        if a.lower() != asset.lower():
-            continue
-
-        part = (md.get("fx_layer") or r.get("part_name") or "").strip()
-        if not part:
+        part = (r.get("part_name") or "").strip()
+        p = (r.get("part_usd_path") or "").strip()
+        if not part or not p:
             continue
 
-        # Prefer explicit part_usd_path, fallback to asset_usd_path (older backend)
-        p = (r.get("part_usd_path") or r.get("asset_usd_path") or "").strip()
-        if not p:
-            continue
-
-        # Force stable path to "{PART}.usd" under the part folder
-        # (prevents random filenames ending up in the asset)
         p_norm = os.path.normpath(p)
-        part_dir = os.path.dirname(p_norm)
-        stable = os.path.join(part_dir, "{}.usd".format(part))
-
         # Keep if it exists (for demo clarity)
-        if os.path.isfile(stable):
-            parts[part] = stable
-        elif os.path.isfile(p_norm):
-            # if stable doesn't exist but p points to something real, use p (fallback)
+        if os.path.isfile(p_norm):
             parts[part] = p_norm
 
     if not parts:
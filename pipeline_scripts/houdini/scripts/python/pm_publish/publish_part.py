@@ -1,6 +1,7 @@
 def save_asset():
     import os
     import json
+    import hashlib
     import hou
     from urllib.request import Request, urlopen
     from urllib.error import HTTPError, URLError
@@ -172,9 +173,13 @@ def save_asset():
         headers["Authorization"] = "Bearer {}".format(api_token)
         headers["X-PM-Token"] = api_token
 
+    body = json.dumps(payload, default=str, sort_keys=True).encode("utf-8")
+    # Same payload -> same key, so a re-click after a timeout replays the first publish instead of duplicating it.
+    headers["Idempotency-Key"] = hashlib.sha256(body).hexdigest()
+
     req = Request(
         api_url,
-        data=json.dumps(payload, default=str).encode("utf-8"),
+        data=body,
         headers=headers,
         method="POST",
     )
@@ -199,10 +204,12 @@ def save_asset():
         raise RuntimeError("PM publish API returned non-JSON: {}".format(raw))
 
     publish_id = None
+    layer_job_id = None
     if isinstance(data, dict) and data.get("ok") is True:
         d = data.get("data")
         if isinstance(d, dict):
             publish_id = d.get("publish_id") or d.get("id")
+            layer_job_id = d.get("layer_job_id")
         elif isinstance(d, list) and d and isinstance(d[0], dict):
             # your API sometimes returns list; take first id
             publish_id = d[0].get("id")
@@ -210,5 +217,9 @@ def save_asset():
     if not publish_id:
         raise RuntimeError("PM publish API response missing publish_id: {}".format(data))
 
-    hou.ui.displayMessage("DB publish registered. ID: {}".format(int(publish_id)))
+    message = "DB publish registered. ID: {}".format(int(publish_id))
+    if layer_job_id:
+        # Shared layers are rebuilt asynchronously; poll /api/layer-jobs/?id=<id> for status.
+        message += "\nShared layer rebuild queued (job {}).".format(int(layer_job_id))
+    hou.ui.displayMessage(message)
     return int(publish_id)
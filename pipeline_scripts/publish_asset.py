@@ -163,15 +163,20 @@ def publish_asset(
 
     # API mode
     if api_client and (os.environ.get("PIPELINE_API_BASE") or os.environ.get("API_BASE_URL")):
-        project = _ensure_project(None, project_name)  # type: ignore[arg-type]
-        project_id = int(project.get("id") or 0)
-        resp = api_client.api_post(
+        # Project and asset in one round trip; the asset takes the id the project call returns.
+        batch = api_client.Batch()
+        project_call = batch.post("/api/projects/", {"name": project_name, "base_path": _default_base_path()})
+        batch.post(
             "/api/assets/",
-            {"project_id": project_id, "name": name, "asset_type": asset_type},
+            {"project_id": batch.ref(project_call, "data.id"), "name": name, "asset_type": asset_type},
         )
-        if not resp.get("ok"):
-            raise RuntimeError(f"API error creating asset: {resp}")
-        data = resp.get("data", {})
+        project_result, asset_result = batch.send()
+        if not project_result.get("body", {}).get("ok"):
+            raise RuntimeError(f"API error creating project: {project_result}")
+        if not asset_result.get("body", {}).get("ok"):
+            raise RuntimeError(f"API error creating asset: {asset_result}")
+        project_id = int(project_result["body"]["data"].get("id") or 0)
+        data = asset_result["body"].get("data", {})
         return AssetRecord(
             id=int(data.get("id", 0)),
             name=str(data.get("name", name)),
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
+import hashlib
 import json
 import os
-from pathlib import Path
+import re
 from typing import Dict, List, Optional, Tuple
 
 import psycopg2
@@ -16,6 +17,8 @@ except Exception:  # noqa: BLE001
 
 DEFAULT_TABLE_NAME = "core_scene_file"
 TABLE_ENV_VAR = "PIPELINE_SCENE_TABLE"
+# Django-managed per-stream counter (core.StreamHead); scene streams use the scene table name as stream.
+STREAM_HEAD_TABLE = "core_streamhead"
 
 # Optional HTTP API base; when present, we prefer the Django API
 API_BASE_ENV = "PIPELINE_API_BASE"
@@ -24,25 +27,9 @@ def _use_api() -> bool:
     return bool(os.environ.get(API_BASE_ENV))
 
 
-def _current_target_payload() -> Dict[str, Optional[str]]:
-    env = os.environ
-    payload: Dict[str, Optional[str]] = {}
-    project_id = env.get("PIPELINE_PROJECT_ID") or env.get("PROJECT_ID")
-    if project_id:
-        payload["project_id"] = project_id
-    if env.get("PIPELINE_ASSET_ID") or env.get("ASSET_ID"):
-        payload["target_type"] = "asset"
-        payload["target_id"] = env.get("PIPELINE_ASSET_ID") or env.get("ASSET_ID")
-    elif env.get("PIPELINE_SHOT_ID") or env.get("SHOT_ID"):
-        payload["target_type"] = "shot"
-        payload["target_id"] = env.get("PIPELINE_SHOT_ID") or env.get("SHOT_ID")
-    elif env.get("PIPELINE_SEQUENCE_ID") or env.get("SEQUENCE_ID"):
-        payload["target_type"] = "sequence"
-        payload["target_id"] = env.get("PIPELINE_SEQUENCE_ID") or env.get("SEQUENCE_ID")
-    elif project_id:
-        payload["target_type"] = "project"
-        payload["target_id"] = project_id
-    return payload
+def _api_mode(use_api: Optional[bool]) -> bool:
+    # `use_api=False` forces the direct-DB path; the API views pass it so they never call themselves.
+    return bool(api_client) and (_use_api() if use_api is None else use_api)
 
 
 def get_scene_table_name() -> str:
@@ -53,8 +40,15 @@ def _table_identifier(table_name: Optional[str] = None) -> sql.Identifier:
     return sql.Identifier((table_name or get_scene_table_name()).strip())
 
 
+# (dsn, table) pairs already ensured by this process; the DDL below takes an exclusive table lock.
+_ENSURED_TABLES: set[Tuple[str, str]] = set()
+
+
 def ensure_scene_table(conn: PGConnection, table_name: Optional[str] = None) -> None:
+    """Create or upgrade a scene table once per process (the default one is also a Django migration)."""
     table = (table_name or get_scene_table_name()).strip()
+    if (conn.dsn, table) in _ENSURED_TABLES:
+        return
     ident = sql.Identifier(table)
     unique_name = sql.Identifier(f"{table}_uniq")
     task_idx_name = sql.Identifier(f"{table}_task_idx")
@@ -87,6 +81,11 @@ def ensure_scene_table(conn: PGConnection, table_name: Optional[str] = None) ->
                 "ALTER TABLE {table} ADD COLUMN IF NOT EXISTS iteration INTEGER NOT NULL DEFAULT 1;"
             ).format(table=ident)
         )
+        cur.execute(
+            sql.SQL(
+                "ALTER TABLE {table} ADD COLUMN IF NOT EXISTS status VARCHAR(16) NOT NULL DEFAULT 'saved';"
+            ).format(table=ident)
+        )
         cur.execute(
             sql.SQL(
                 """
@@ -104,6 +103,7 @@ def ensure_scene_table(conn: PGConnection, table_name: Optional[str] = None) ->
             ).format(task_idx=task_idx_name, table=ident)
         )
     conn.commit()
+    _ENSURED_TABLES.add((conn.dsn, table))
 
 
 def fetch_scenes(
@@ -111,17 +111,11 @@ def fetch_scenes(
     task_id: int,
     software: str,
     table_name: Optional[str] = None,
+    use_api: Optional[bool] = None,
 ) -> List[Dict[str, object]]:
-    if _use_api() and api_client:
-        payload: Dict[str, Optional[str]] = {
-            "task_id": str(task_id),
-            "software": software,
-        }
-        payload.update(_current_target_payload())
-        resp = api_client.api_get("/api/publishes/", payload)
-        if resp.get("ok"):
-            return resp.get("data", [])  # type: ignore[return-value]
-        raise RuntimeError(f"API error: {resp}")
+    if _api_mode(use_api):
+        # DCC saves are scene rows in both modes (reserve_scene/confirm_scene), not publishes.
+        return api_client.api_get_all("/api/scenes/", {"task_id": str(task_id), "software": software})
     ident = _table_identifier(table_name)
     with conn.cursor() as cur:
         cur.execute(
@@ -129,7 +123,7 @@ def fetch_scenes(
                 """
                 SELECT id, task_id, artist_id, software, file_path, version, iteration, created_at, updated_at
                 FROM {table}
-                WHERE task_id = %s AND software = %s
+                WHERE task_id = %s AND software = %s AND status = 'saved'
                 ORDER BY version DESC, iteration DESC, id DESC;
                 """
             ).format(table=ident),
@@ -139,47 +133,98 @@ def fetch_scenes(
         return [dict(zip(column_names, row)) for row in cur.fetchall()]
 
 
-def _max_version(
+def _head_numbers(
     conn: PGConnection,
     task_id: int,
     software: str,
     table_name: Optional[str] = None,
-) -> int:
-    ident = _table_identifier(table_name)
+) -> Tuple[int, int]:
+    """Last (version, iteration) handed out for a scene stream: its head row, else its newest scene row."""
+    table = (table_name or get_scene_table_name()).strip()
     with conn.cursor() as cur:
         cur.execute(
             sql.SQL(
-                "SELECT COALESCE(MAX(version), 0) FROM {table} WHERE task_id = %s AND software = %s;"
-            ).format(table=ident),
-            (task_id, software),
+                """
+                SELECT version, iteration FROM {head}
+                WHERE stream = %s AND target_type_id = 0 AND target_id = 0 AND task_id = %s AND software = %s;
+                """
+            ).format(head=sql.Identifier(STREAM_HEAD_TABLE)),
+            (table, task_id, software),
         )
-        result = cur.fetchone()
-    return int(result[0]) if result and result[0] is not None else 0
+        row = cur.fetchone()
+        if row is None:
+            cur.execute(
+                sql.SQL(
+                    """
+                    SELECT version, iteration FROM {table}
+                    WHERE task_id = %s AND software = %s
+                    ORDER BY version DESC, iteration DESC
+                    LIMIT 1;
+                    """
+                ).format(table=sql.Identifier(table)),
+                (task_id, software),
+            )
+            row = cur.fetchone()
+    return (int(row[0]), int(row[1])) if row else (0, 0)
 
 
-def _max_iteration_for_version(
+# Same statement as core/stream_heads.py: insert or bump the head row under its row lock and return the
+# reserved numbers in one round trip; the newest scene row is only read to start a missing head.
+_ALLOCATE_SQL = """
+    WITH seed AS (
+        SELECT newest.version, newest.iteration FROM (
+            SELECT version, iteration FROM {table}
+            WHERE task_id = %(task_id)s AND software = %(software)s
+            ORDER BY version DESC, iteration DESC
+            LIMIT 1
+        ) AS newest
+        WHERE NOT EXISTS (
+            SELECT 1 FROM {head}
+            WHERE stream = %(stream)s AND target_type_id = 0 AND target_id = 0
+              AND task_id = %(task_id)s AND software = %(software)s
+        )
+    ),
+    base AS (
+        SELECT COALESCE((SELECT version FROM seed), 0) AS version,
+               COALESCE((SELECT iteration FROM seed), 0) AS iteration
+    )
+    INSERT INTO {head} AS head (stream, target_type_id, target_id, task_id, software, version, iteration, updated_at)
+    SELECT %(stream)s, 0, 0, %(task_id)s, %(software)s,
+           CASE WHEN %(bump)s = 'version' OR base.version = 0 THEN base.version + 1 ELSE base.version END,
+           CASE WHEN %(bump)s = 'version' OR base.version = 0 THEN 1 ELSE base.iteration + 1 END,
+           NOW()
+    FROM base
+    ON CONFLICT (stream, target_type_id, target_id, task_id, software) DO UPDATE SET
+        version = CASE WHEN %(bump)s = 'version' OR head.version = 0 THEN head.version + 1 ELSE head.version END,
+        iteration = CASE WHEN %(bump)s = 'version' OR head.version = 0 THEN 1 ELSE head.iteration + 1 END,
+        updated_at = NOW()
+    RETURNING version, iteration;
+"""
+
+
+def reserve_numbers(
     conn: PGConnection,
     task_id: int,
     software: str,
-    version: int,
+    bump: str = "iteration",
     table_name: Optional[str] = None,
-) -> int:
-    if version <= 0:
-        return 0
-    ident = _table_identifier(table_name)
+) -> Tuple[int, int]:
+    """Atomically hand out the next version/iteration of a scene stream; concurrent callers never share one."""
+    table = (table_name or get_scene_table_name()).strip()
+    query = sql.SQL(_ALLOCATE_SQL).format(table=sql.Identifier(table), head=sql.Identifier(STREAM_HEAD_TABLE))
     with conn.cursor() as cur:
         cur.execute(
-            sql.SQL(
-                """
-                SELECT COALESCE(MAX(iteration), 0)
-                FROM {table}
-                WHERE task_id = %s AND software = %s AND version = %s;
-                """
-            ).format(table=ident),
-            (task_id, software, version),
+            query,
+            {
+                "stream": table,
+                "task_id": task_id,
+                "software": software,
+                "bump": "version" if (bump or "").lower() == "version" else "iteration",
+            },
         )
-        result = cur.fetchone()
-    return int(result[0]) if result and result[0] is not None else 0
+        version, iteration = cur.fetchone()
+    conn.commit()
+    return int(version), int(iteration)
 
 
 def next_numbers(
@@ -188,26 +233,48 @@ def next_numbers(
     software: str,
     bump: str = "iteration",
     table_name: Optional[str] = None,
+    reserve: bool = True,
+    use_api: Optional[bool] = None,
 ) -> Tuple[int, int]:
-    if _use_api() and api_client:
+    """Next version/iteration for a save. `reserve=False` only previews them and may race with other savers."""
+    if _api_mode(use_api):
         payload: Dict[str, Optional[str]] = {
             "task_id": str(task_id),
             "software": software,
             "bump": bump,
         }
-        payload.update(_current_target_payload())
-        resp = api_client.api_get("/api/publishes/next/", payload)
+        if reserve:
+            resp = api_client.api_post("/api/scenes/next/", payload)
+        else:
+            resp = api_client.api_get("/api/scenes/next/", payload)
         if resp.get("ok"):
             data = resp.get("data", {})
             return int(data.get("version", 0)), int(data.get("iteration", 0))
         raise RuntimeError(f"API error: {resp}")
+    if reserve:
+        return reserve_numbers(conn, task_id, software, bump=bump, table_name=table_name)
     bump = (bump or "iteration").lower()
-    current_version = _max_version(conn, task_id, software, table_name)
+    current_version, current_iteration = _head_numbers(conn, task_id, software, table_name)
     if bump == "version" or current_version == 0:
-        next_version = current_version + 1
-        return next_version, 1
-    latest_iteration = _max_iteration_for_version(conn, task_id, software, current_version, table_name)
-    return current_version, (latest_iteration + 1) if latest_iteration else 1
+        return current_version + 1, 1
+    return current_version, current_iteration + 1
+
+
+# Upserts the scene row and carries its stream head forward past explicitly numbered saves.
+_RECORD_SCENE_SQL = """
+    WITH advanced AS (
+        INSERT INTO {head} AS head (stream, target_type_id, target_id, task_id, software, version, iteration, updated_at)
+        VALUES (%(stream)s, 0, 0, %(task_id)s, %(software)s, %(version)s, %(iteration)s, NOW())
+        ON CONFLICT (stream, target_type_id, target_id, task_id, software) DO UPDATE SET
+            version = EXCLUDED.version, iteration = EXCLUDED.iteration, updated_at = NOW()
+        WHERE (EXCLUDED.version, EXCLUDED.iteration) > (head.version, head.iteration)
+    )
+    INSERT INTO {table} (task_id, artist_id, software, file_path, version, iteration)
+    VALUES (%(task_id)s, %(artist_id)s, %(software)s, %(file_path)s, %(version)s, %(iteration)s)
+    ON CONFLICT (task_id, software, version, iteration)
+    DO UPDATE SET file_path = EXCLUDED.file_path, status = 'saved', updated_at = NOW()
+    RETURNING id, (xmax = 0);
+"""
 
 
 def record_scene(
@@ -219,48 +286,148 @@ def record_scene(
     version: int,
     iteration: int,
     table_name: Optional[str] = None,
-) -> None:
-    if _use_api() and api_client:
+    use_api: Optional[bool] = None,
+) -> Tuple[int, bool]:
+    """Upsert a scene row; returns (id, created)."""
+    if _api_mode(use_api):
         payload: Dict[str, Optional[str]] = {
             "task_id": str(task_id),
             "artist_id": str(artist_id),
             "software": software,
+            "file_path": file_path,
             "version": str(version),
             "iteration": str(iteration),
-            "label": Path(file_path).name,
         }
-        payload.update(_current_target_payload())
-        payload["components"] = json.dumps(
-            [
-                {
-                    "name": "scene",
-                    "component_type": "scene",
-                    "file_path": file_path,
-                }
-            ]
-        )
-        payload["metadata"] = json.dumps({"software": software, "path": file_path})
+        # One key per recorded file, so a retried save replays the first record.
+        idempotency_key = hashlib.sha256(
+            json.dumps(payload, sort_keys=True).encode("utf-8")
+        ).hexdigest()
         resp = api_client.api_post(
-            "/api/publishes/",
+            "/api/scenes/record/",
             payload,
+            headers={"Idempotency-Key": idempotency_key},
         )
         if not resp.get("ok"):
             raise RuntimeError(f"API error: {resp}")
-        return
+        return int(resp["data"]["id"]), bool(resp["data"].get("created"))
+    table = (table_name or get_scene_table_name()).strip()
+    with conn.cursor() as cur:
+        cur.execute(
+            sql.SQL(_RECORD_SCENE_SQL).format(table=sql.Identifier(table), head=sql.Identifier(STREAM_HEAD_TABLE)),
+            {
+                "stream": table,
+                "task_id": task_id,
+                "artist_id": artist_id,
+                "software": software,
+                "file_path": file_path,
+                "version": version,
+                "iteration": iteration,
+            },
+        )
+        scene_id, created = cur.fetchone()
+    conn.commit()
+    return scene_id, created
+
+
+# Allocation and the pending scene row in one statement, so it is atomic even on an autocommit connection.
+# The file name labels match format_version_label/format_iteration_label.
+_RESERVE_SCENE_SQL = """
+    WITH allocated AS ({allocate})
+    INSERT INTO {table} (task_id, artist_id, software, file_path, version, iteration, status)
+    SELECT %(task_id)s, %(artist_id)s, %(software)s,
+           %(prefix)s || 'v' || lpad(version::text, GREATEST(3, length(version::text)), '0')
+                      || '_i' || lpad(iteration::text, GREATEST(3, length(iteration::text)), '0') || %(extension)s,
+           version, iteration, 'pending'
+    FROM allocated
+    ON CONFLICT (task_id, software, version, iteration)
+    DO UPDATE SET artist_id = EXCLUDED.artist_id, file_path = EXCLUDED.file_path, status = 'pending', updated_at = NOW()
+    RETURNING id, version, iteration, file_path;
+"""
+
+
+def reserve_scene(
+    conn: PGConnection,
+    task_id: int,
+    artist_id: int,
+    software: str,
+    scene_dir: str,
+    naming: Optional[Dict[str, str]] = None,
+    bump: str = "iteration",
+    table_name: Optional[str] = None,
+    use_api: Optional[bool] = None,
+) -> Dict[str, object]:
+    """Reserve the next numbers of (task, software) and record the scene as pending, in one call.
+
+    Returns id, version, iteration and the file_path to save to (named by scene_file_name from `naming`);
+    finalize the row with confirm_scene() once the DCC has written the file.
+    """
+    naming = dict(naming or {})
+    if _api_mode(use_api):
+        payload: Dict[str, Optional[str]] = {
+            "task_id": str(task_id),
+            "artist_id": str(artist_id),
+            "software": software,
+            "scene_dir": scene_dir,
+            "bump": bump,
+            **naming,
+        }
+        # Fresh per call: lets a transport-level retry replay this reservation, but never a later save.
+        resp = api_client.api_post("/api/scenes/reserve/", payload, headers={"Idempotency-Key": os.urandom(16).hex()})
+        if not resp.get("ok"):
+            raise RuntimeError(f"API error: {resp}")
+        return resp["data"]
+    table = (table_name or get_scene_table_name()).strip()
+    base = _scene_base_name(task_id=task_id, artist_id=artist_id, **naming)
+    allocate = sql.SQL(_ALLOCATE_SQL.strip().rstrip(";")).format(
+        table=sql.Identifier(table), head=sql.Identifier(STREAM_HEAD_TABLE)
+    )
+    query = sql.SQL(_RESERVE_SCENE_SQL).format(allocate=allocate, table=sql.Identifier(table))
+    with conn.cursor() as cur:
+        cur.execute(
+            query,
+            {
+                "stream": table,
+                "task_id": task_id,
+                "artist_id": artist_id,
+                "software": software,
+                "bump": "version" if (bump or "").lower() == "version" else "iteration",
+                "prefix": scene_path(scene_dir, f"{base}_"),
+                "extension": SCENE_EXTENSIONS.get(software, ".scene"),
+            },
+        )
+        scene_id, version, iteration, file_path = cur.fetchone()
+    conn.commit()
+    return {"id": scene_id, "version": version, "iteration": iteration, "file_path": file_path, "status": "pending"}
+
+
+def confirm_scene(
+    conn: PGConnection,
+    scene_id: int,
+    table_name: Optional[str] = None,
+    use_api: Optional[bool] = None,
+) -> Optional[str]:
+    """Mark a reserved scene saved; returns its previous status ("pending"/"saved") or None if it doesn't exist."""
+    if _api_mode(use_api):
+        resp = api_client.api_post("/api/scenes/confirm/", {"id": str(scene_id)}, idempotent=True)
+        if not resp.get("ok"):
+            raise RuntimeError(f"API error: {resp}")
+        return resp["data"].get("previous_status")
     ident = _table_identifier(table_name)
     with conn.cursor() as cur:
         cur.execute(
             sql.SQL(
                 """
-                INSERT INTO {table} (task_id, artist_id, software, file_path, version, iteration)
-                VALUES (%s, %s, %s, %s, %s, %s)
-                ON CONFLICT (task_id, software, version, iteration)
-                DO UPDATE SET file_path = EXCLUDED.file_path, updated_at = NOW();
+                UPDATE {table} AS scene SET status = 'saved', updated_at = NOW()
+                FROM (SELECT id, status FROM {table} WHERE id = %s FOR UPDATE) AS previous
+                WHERE scene.id = previous.id
+                RETURNING previous.status;
                 """
             ).format(table=ident),
-            (task_id, artist_id, software, file_path, version, iteration),
+            (scene_id,),
         )
+        row = cur.fetchone()
     conn.commit()
+    return row[0] if row else None
 
 
 def touch_scene_record(
@@ -279,6 +446,53 @@ def touch_scene_record(
     conn.commit()
 
 
+SCENE_EXTENSIONS = {
+    "houdini": ".hip",
+    "maya": ".mb",
+}
+
+
+def _sanitize_name(value: str) -> str:
+    cleaned = re.sub(r"[^A-Za-z0-9_\-]+", "_", value)
+    return cleaned.strip("_") or "scene"
+
+
+def _scene_base_name(
+    *,
+    task_id: int = 0,
+    artist_id: int = 0,
+    artist: str = "",
+    department: str = "",
+    task: str = "",
+    asset: str = "",
+) -> str:
+    # Naming spec: {artist}_{dept}_{task}_v{VER:03}_i{ITER:03}.{ext}
+    # TASK is preferred semantic field for scene naming, even if TASK == ASSET.
+    parts = [_sanitize_name(artist or f"artist{artist_id}")]
+    if department:
+        parts.append(_sanitize_name(department))
+    if task:
+        parts.append(_sanitize_name(task))
+    elif asset:
+        parts.append(_sanitize_name(asset))
+    else:
+        parts.append(f"task{task_id}")
+    return _sanitize_name("_".join(filter(None, parts)))
+
+
+def scene_file_name(software: str, version: int, iteration: int, **naming: object) -> str:
+    """File name of a scene save; `naming` takes task_id, artist_id, artist, department, task and asset."""
+    base = _scene_base_name(**naming)  # type: ignore[arg-type]
+    extension = SCENE_EXTENSIONS.get(software, ".scene")
+    return f"{base}_{format_version_label(version)}_{format_iteration_label(iteration)}{extension}"
+
+
+def scene_path(scene_dir: str, file_name: str) -> str:
+    """Join keeping the directory's own separator, so a Windows scene_dir survives a server-side join."""
+    separator = "\\" if "\\" in scene_dir and "/" not in scene_dir else "/"
+    return scene_dir.rstrip("/\\") + separator + file_name
+
+
 def format_version_label(version: Optional[int]) -> str:
     value = int(version or 0)
     return f"v{value:03d}"